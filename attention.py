@@ -2,48 +2,58 @@
 # attention.py — Halcyon Working & Hybrid Recall Buffer
 # ============================================================
 
+import logging
 import threading
 import datetime
-import os
-import json
+
+import numpy as np
+
+from turn_buffer import RingBuffer, TurnRecord
+from journal import Journal, read_window
+
+logger = logging.getLogger(__name__)
 
 class Attention:
     """Manages layered short-term cognition: working, recall, and narrative windows."""
 
-    def __init__(self, hippocampus=None, working_limit=10, narrative_limit=7):
+    def __init__(self, hippocampus=None, working_limit=10, narrative_limit=7,
+                 skip_threshold=0.9, live_threshold=0.5, live_max=2, reuse_max=2):
         # Reference to long-term memory (Hippocampus) for hybrid recall
         self.hippocampus = hippocampus
         self._lock = threading.Lock()
 
-        # Short-term layers
-        self._working_buffer = []      # immediate conversation context (turn snapshots)
-        self._recall_window = []       # ephemeral recalled memories (clears per turn)
-        self._narrative_window = []    # rolling storyline buffer (few recent turns persisted)
-
         # Parameters
         self.working_limit = int(working_limit)
         self.narrative_limit = int(narrative_limit)
+        # Working-memory cache (recall_for_turn): cosine similarity of the query to a buffered
+        # turn's query above which that turn's recall is reused instead of searching again,
+        # and above which older buffered turns are merged into recall as live context
+        self.skip_threshold = float(skip_threshold)
+        self.live_threshold = float(live_threshold)
+        self.live_max = int(live_max)
+        # Consecutive turns that may be answered from working memory before a real search runs,
+        # so a chain of similar follow-ups still sees memories committed in between
+        self.reuse_max = int(reuse_max)
+        self._reuse_streak = 0
+
+        # Short-term layers (fixed-capacity ring buffers; the oldest entry falls off)
+        self._working_buffer = RingBuffer(self.working_limit)       # immediate conversation context (turn snapshots)
+        self._recall_window = []                                     # ephemeral recalled memories (clears per turn)
+        self._narrative_window = RingBuffer(self.narrative_limit)   # rolling storyline buffer (few recent turns persisted)
+        self._narrative_journal = None                               # set by save_narrative/load_narrative
 
-        print(f"[Attention] Initialized: working={self.working_limit}, narrative={self.narrative_limit}")
+        logger.info("Initialized: working=%s, narrative=%s", self.working_limit, self.narrative_limit)
 
     # ---------------------------
     # Working Memory
     # ---------------------------
-    def push_turn(self, user_query, reflection, response, state=None, keywords=None, turn_id=None, task_id=None):
-        with self._lock:
-            self._working_buffer.append({
-                "turn_id": turn_id,
-                "task_id": task_id,
-                "user_query": user_query,
-                "reflection": reflection,
-                "response": response,
-                "state": state or {},
-                "keywords": keywords or [],
-                "timestamp": datetime.datetime.now().isoformat(),
-            })
-            if len(self._working_buffer) > self.working_limit:
-                self._working_buffer.pop(0)
-        print(f"[Attention] Working buffer updated: {len(self._working_buffer)} turns stored.")
+    def push_turn(self, user_query, reflection, response, state=None, keywords=None, turn_id=None, task_id=None,
+                  embedding=None, recalled=None):
+        self._working_buffer.append(TurnRecord(
+            user_query, reflection, response, state=state, keywords=keywords, turn_id=turn_id, task_id=task_id,
+            embedding=embedding, recalled=recalled,
+        ))
+        logger.debug("Working buffer updated: %s turns stored.", len(self._working_buffer))
 
     def sustain_context(self, payload: dict):
         """Hook for Thalamus to update live working memory."""
@@ -58,28 +68,33 @@ class Attention:
                 task_id=payload.get("task_id"),
             )
         except Exception as e:
-            print(f"[Attention.sustain_context] Error: {e}")
+            logger.error("sustain_context failed: %s", e)
 
     def get_recent_turns(self, n=None):
-        with self._lock:
-            buf = list(self._working_buffer)
-        return buf[-(n or self.working_limit):]
+        # Copies only the n newest references; records are read-only, so they are shared
+        return self._working_buffer.tail(n or self.working_limit)
 
     def get_focus(self):
-        with self._lock:
-            return self._working_buffer[-1] if self._working_buffer else None
+        return self._working_buffer.last()
+
+    def seed(self, turns):
+        """Fill an empty working buffer from logged turns (oldest first), e.g. after a restart."""
+        if self._working_buffer:
+            return
+        self._working_buffer.replace(TurnRecord.from_dict(t) for t in turns)
+        logger.debug("Working buffer seeded with %s turns.", len(self._working_buffer))
 
     # ---------------------------
     # Hybrid Recall (Working + Episodic)
     # ---------------------------
     def recall_with_context(self, query, n_results=25):
-        print("[Attention] Performing hybrid recall...")
+        logger.debug("Performing hybrid recall...")
         long_term = []
         if self.hippocampus:
             long_term = self.hippocampus.recall_with_context(query=query, n_results=n_results)
 
+        live = self._working_buffer.tail()
         with self._lock:
-            live = list(self._working_buffer)
             self._recall_window = list(long_term)
 
         merged = []
@@ -92,13 +107,92 @@ class Attention:
         merged.extend(long_term)
         merged.sort(key=lambda x: x.get("weight", 0.0), reverse=True)
 
-        print(f"[Attention] Hybrid recall returned {len(merged)} combined items.")
+        logger.debug("Hybrid recall returned %s combined items.", len(merged))
         return merged
 
+    @staticmethod
+    def _similarities(query_vector, turns):
+        """Cosine similarity of the query to each turn's stored query embedding (None if it has none)."""
+        sims = [None] * len(turns)
+        if query_vector is None:
+            return sims
+        q = np.asarray(query_vector, dtype=np.float32)
+        q_norm = float(np.linalg.norm(q))
+        if q_norm == 0.0:
+            return sims
+        idx = [i for i, t in enumerate(turns) if t.embedding is not None and len(t.embedding) == len(q)]
+        if idx:
+            mat = np.stack([np.asarray(turns[i].embedding, dtype=np.float32) for i in idx])
+            scores = mat @ q / np.maximum(np.linalg.norm(mat, axis=1) * q_norm, 1e-12)
+            for i, s in zip(idx, scores.tolist()):
+                sims[i] = s
+        return sims
+
+    def recall_for_turn(self, query, query_vector, recall, exclude_recent=3, stats=None):
+        """
+        Working-memory front for long-term recall.
+
+        If a buffered turn's query is at least skip_threshold similar to this one,
+        its recalled memories are reused and `recall` (a callable running the
+        long-term search, e.g. Hippocampus.recall_adaptive) is not called. Buffered
+        turns older than the `exclude_recent` newest (those are already in the
+        prompt as recent turns) that clear live_threshold are prepended as live
+        context, unless long-term recall already returned them.
+
+        Only recalls from a real search are reusable: a reused list is not
+        handed back for storage, and after reuse_max reuses in a row the next
+        turn searches again.
+
+        Returns (memories, searched): the merged list for the prompt and the
+        long-term results when a search ran (None when they were reused), to be
+        stored with the turn via push_turn(recalled=...).
+        """
+        turns = self._working_buffer.tail()
+        sims = self._similarities(query_vector, turns)
+
+        best = max((i for i, s in enumerate(sims) if s is not None and turns[i].recalled is not None),
+                   key=lambda i: sims[i], default=None)
+        if best is not None and sims[best] >= self.skip_threshold and self._reuse_streak < self.reuse_max:
+            self._reuse_streak += 1
+            long_term, searched = list(turns[best].recalled), None
+            if stats is not None:
+                stats.update({"fetched": 0, "kept": len(long_term), "stop_reason": "working_memory",
+                              "similarity": round(sims[best], 3)})
+            logger.debug("Working memory answered the query (similarity %.3f); skipped long-term search.", sims[best])
+        else:
+            self._reuse_streak = 0
+            long_term = recall()
+            searched = long_term
+
+        older = turns[:-exclude_recent] if exclude_recent else turns
+        candidates = sorted(
+            ((s, t) for s, t in zip(sims, older) if s is not None and s >= self.live_threshold),
+            key=lambda st: st[0], reverse=True,
+        )
+        recalled_texts = {(m.get("text") or "").strip() for m in long_term}
+        live = []
+        for s, t in candidates:
+            if len(live) >= self.live_max:
+                break
+            fused_prefix = f"USER QUERY:\n{(t['user_query'] or '').strip()}\n"
+            if any(text.startswith(fused_prefix) for text in recalled_texts):
+                continue  # already committed and recalled
+            live.append({
+                "text": f"[Live Context] {t['user_query']} → {t['response']}",
+                "meta": {"timestamp": t["timestamp"], "source": "working_buffer"},
+                "timestamp": t["timestamp"],
+                "weight": s,
+                "source": "working_buffer",
+            })
+
+        with self._lock:
+            self._recall_window = list(long_term)
+        return live + long_term, searched
+
     def clear_recall_window(self):
         with self._lock:
             self._recall_window = []
-        print("[Attention] Cleared recall window.")
+        logger.debug("Cleared recall window.")
 
     # ---------------------------
     # Narrative Thread
@@ -113,52 +207,71 @@ class Attention:
             ],
             "timestamp": datetime.datetime.now().isoformat(),
         }
-        with self._lock:
+        if self._narrative_journal is not None:
+            self._narrative_journal.append(entry, apply=self._narrative_window.append)
+        else:
             self._narrative_window.append(entry)
-            if len(self._narrative_window) > self.narrative_limit:
-                self._narrative_window.pop(0)
-        print(f"[Attention] Narrative window updated ({len(self._narrative_window)} entries).")
+        logger.debug("Narrative window updated (%s entries).", len(self._narrative_window))
         return "[Attention.update_narrative] OK"
 
     def get_narrative_summary(self):
-        with self._lock:
-            if not self._narrative_window:
-                return "(no narrative yet)"
-            summary = []
-            for i, n in enumerate(self._narrative_window):
-                snippet = (n.get('response') or '')[:160].replace("\n", " ")
-                summary.append(f"{i+1}. {n.get('query','')} → {snippet}")
-            return "\n".join(summary)
-
-    def get_narrative_window(self):
-        with self._lock:
-            return list(self._narrative_window)
+        window = self._narrative_window.tail()
+        if not window:
+            return "(no narrative yet)"
+        summary = []
+        for i, n in enumerate(window):
+            snippet = (n.get('response') or '')[:160].replace("\n", " ")
+            summary.append(f"{i+1}. {n.get('query','')} → {snippet}")
+        return "\n".join(summary)
+
+    def get_narrative_window(self, n=None):
+        return self._narrative_window.tail(n)
 
 # ============================================================
 # 💾 Narrative Persistence (load/save across restarts)
 # ============================================================
 
     def save_narrative(self, path="./memory_journals/narrative_window.json"):
+        """
+        Persist the narrative window. The first save (or a save to a new path)
+        checkpoints the whole window and starts a journal there; after that,
+        updates are appended by the journal's autosave and a save only writes
+        the entries since the last one.
+        """
         try:
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(self._narrative_window, f, indent=2)
-            print(f"[Attention] Saved narrative ({len(self._narrative_window)} entries).")
+            if self._narrative_journal is not None and self._narrative_journal.path == path:
+                self._narrative_journal.flush()
+            else:
+                self._attach_narrative_journal(path, seq=0).checkpoint()
+            logger.info("Saved narrative (%s entries).", len(self._narrative_window))
         except Exception as e:
-            print(f"[Attention.save_narrative] Error: {e}")
+            logger.error("save_narrative failed: %s", e)
 
     def load_narrative(self, path="./memory_journals/narrative_window.json"):
+        """Restore the window from its checkpoint plus journal, then keep journaling there."""
         try:
-            if os.path.exists(path):
-                with open(path, "r", encoding="utf-8") as f:
-                    self._narrative_window = json.load(f)
-                print(f"[Attention] Loaded narrative ({len(self._narrative_window)} entries).")
+            entries, seq = read_window(path)
+            self._narrative_window.replace(entries)
+            if entries:
+                logger.info("Loaded narrative (%s entries).", len(self._narrative_window))
             else:
-                self._narrative_window = []
-                print("[Attention] No prior narrative found — starting fresh.")
+                logger.info("No prior narrative found — starting fresh.")
+            self._attach_narrative_journal(path, seq=seq)
         except Exception as e:
-            print(f"[Attention.load_narrative] Error: {e}")
-            self._narrative_window = []
+            logger.error("load_narrative failed: %s", e)
+            self._narrative_window.clear()
+
+    def _attach_narrative_journal(self, path, seq):
+        if self._narrative_journal is not None:
+            self._narrative_journal.close()
+        self._narrative_journal = Journal.from_env(path, self._narrative_window.tail, seq=seq)
+        return self._narrative_journal
+
+    def close(self):
+        """Write any narrative updates the journal has not autosaved yet."""
+        if self._narrative_journal is not None:
+            self._narrative_journal.close()
+            self._narrative_journal = None
 
     def get_context(self, window_size: int = 10):
         """
@@ -168,13 +281,13 @@ class Attention:
         """
         if hasattr(self, "working_buffer") and self.working_buffer:
             recent = self.working_buffer[-window_size:]
-            print(f"[Attention] Returning {len(recent)} recent turns from working buffer.")
+            logger.debug("Returning %s recent turns from working buffer.", len(recent))
             return recent
         elif hasattr(self, "context_window") and self.context_window:
             recent = self.context_window[-window_size:]
-            print(f"[Attention] Returning {len(recent)} recent turns from context_window.")
+            logger.debug("Returning %s recent turns from context_window.", len(recent))
             return recent
         else:
-            print("[Attention] No recent context found; returning empty list.")
+            logger.debug("No recent context found; returning empty list.")
             return []
 
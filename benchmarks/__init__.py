@@ -0,0 +1,7 @@
+"""
+Offline benchmarks for the Hal turn pipeline.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.bench_turn --sizes 1000,100000 --turns 50
+"""
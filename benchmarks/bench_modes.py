@@ -0,0 +1,215 @@
+"""
+Turn-mode comparison benchmark: two_pass (reflect, then respond) vs single_pass.
+
+Runs the same queries through Thalamus.process_turn in each TURN_MODE against
+an in-process Qdrant seeded with synthetic memories, and reports latency per
+stage alongside output-quality proxies:
+
+- structured_rate: responses carrying parseable STATE, REFLECTION and RESPONSE
+- valid_state_rate: states whose names all come from the state vocabulary
+- keywords_rate: turns that produced KEYWORDS for the committed memory
+- response_similarity: mean token Jaccard of each mode's RESPONSE against the
+  first mode's for the same query (1.0 = identical wording)
+
+With the mock LLM the quality numbers only check the plumbing; point
+--base-url at a real OpenAI-compatible endpoint (OPENAI_API_KEY from the
+environment) to compare actual model output.
+
+    python -m benchmarks.bench_modes --turns 30 --chat-latency-ms 400 \\
+        --output bench_modes_results.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import datetime
+import platform
+import tempfile
+
+import mock_llm_server
+from benchmarks.common import StageTimer
+from benchmarks.bench_turn import DEFAULT_QUERIES, seed_memories
+from halcyon_prompts import EMOTIVE_STATES, COGNITIVE_STATES
+
+STAGES = ["chat", "embedding", "qdrant_search", "recent_turns", "log_write", "commit"]
+VALID_STATES = set(EMOTIVE_STATES) | set(COGNITIVE_STATES)
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def _configure_env(args, base_url):
+    os.environ.update({
+        "OPENAI_BASE_URL": base_url,
+        "SKIP_ENDPOINT_VERIFICATION": "true",
+        "COMMIT_MIN_INTERVAL": "0",
+        "QDRANT_LOCATION": ":memory:",
+    })
+    if not args.base_url:
+        os.environ.pop("OPENROUTER_API_KEY", None)
+        os.environ["OPENAI_API_KEY"] = "mock"
+        os.environ["OPENAI_EMBED_DIMENSIONS"] = str(args.dim)
+
+
+def response_body(text):
+    """The RESPONSE section of a structured reply (or the whole reply if free text)."""
+    m = re.search(r"RESPONSE\s*:\s*(.+)\Z", text or "", flags=re.S | re.I)
+    return (m.group(1) if m else text or "").strip()
+
+
+def jaccard(a, b):
+    ta, tb = set(_WORD_RE.findall(a.lower())), set(_WORD_RE.findall(b.lower()))
+    if not ta and not tb:
+        return 1.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def quality(turn):
+    raw = turn.get("response") or ""
+    states = (turn.get("state") or {}).get("emotions") or []
+    # _extract_sections tags parsed states with a type; the untyped "Focus" entry is its fallback
+    parsed = bool(states) and all("type" in s for s in states)
+    return {
+        "structured": parsed and bool(turn.get("reflection")) and bool(re.search(r"RESPONSE\s*:", raw, flags=re.I)),
+        "valid_state": parsed and all(s.get("name") in VALID_STATES for s in states),
+        "keywords": bool(turn.get("keywords")),
+    }
+
+
+def run_mode(mode, args, queries):
+    from cortex import Cortex
+    from hippocampus import Hippocampus
+    from thalamus import Thalamus
+
+    os.environ["QDRANT_COLLECTION"] = f"hal_bench_modes_{mode}"
+    cortex = Cortex()
+    hippo = Hippocampus(cortex)
+    dim = len(cortex.embed("dimension probe"))
+    seed_memories(hippo, args.size, dim, seed=args.seed)
+
+    # Each mode logs (and reads recent turns) in its own directory
+    workdir = tempfile.mkdtemp(prefix=f"hal_bench_{mode}_")
+    os.chdir(workdir)
+    thalamus = Thalamus(cortex, hippo, turn_mode=mode)
+
+    timer = StageTimer()
+    timer.wrap(cortex, "chat", "chat")
+    timer.wrap(cortex, "embed", "embedding")
+    timer.wrap(hippo.client, "search", "qdrant_search")
+    timer.wrap(hippo, "get_recent_turns", "recent_turns")
+    timer.wrap(thalamus, "log_turn", "log_write")
+    timer.wrap(hippo, "delayed_commit", "commit")
+
+    for i in range(args.warmup + args.turns):
+        timer.start_turn()
+        thalamus.process_turn(queries[i % len(queries)], turn_id=int(time.time() * 1000) + i, task_id=f"BENCH_{mode}_{i}")
+        totals = timer.end_turn()
+        if i < args.warmup:
+            timer.turns.pop()
+        else:
+            print(f"[bench] mode={mode} turn {i - args.warmup + 1}/{args.turns} total={totals['total']:.1f}ms", file=sys.stderr)
+
+    with open(thalamus.current_log_path, encoding="utf-8") as f:
+        turns = [json.loads(line) for line in f][args.warmup:]
+
+    scores = [quality(t) for t in turns]
+    rate = lambda key: round(sum(s[key] for s in scores) / max(1, len(scores)), 3)
+    result = {
+        "mode": mode,
+        "turns": args.turns,
+        "stages": timer.report(STAGES),
+        "quality": {
+            "structured_rate": rate("structured"),
+            "valid_state_rate": rate("valid_state"),
+            "keywords_rate": rate("keywords"),
+        },
+        "prompt_tokens_per_turn": round(sum((t.get("llm_tokens") or {}).get("prompt", 0) for t in turns) / max(1, len(turns)), 1),
+        "completion_tokens_per_turn": round(sum((t.get("llm_tokens") or {}).get("completion", 0) for t in turns) / max(1, len(turns)), 1),
+    }
+
+    try:
+        hippo.client.delete_collection(hippo.collection_name)
+    except Exception:
+        pass
+    return result, [response_body(t.get("response")) for t in turns]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two_pass and single_pass turn latency and output quality.")
+    parser.add_argument("--modes", default="two_pass,single_pass", help="Comma-separated TURN_MODE values; the first is the baseline")
+    parser.add_argument("--size", type=int, default=10000, help="Synthetic collection size")
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--dim", type=int, default=384, help="Mock embedding dimensions")
+    parser.add_argument("--chat-latency-ms", type=float, default=400.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=30.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--base-url", default=None, help="Real OpenAI-compatible endpoint instead of the mock LLM")
+    parser.add_argument("--queries", default=None, help="Text/JSONL file of queries (default: built-in set)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_modes_results.json")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        llm = mock_llm_server.MockLLM(
+            default_dim=args.dim,
+            chat_latency_ms=args.chat_latency_ms,
+            embed_latency_ms=args.embed_latency_ms,
+            jitter_ms=args.jitter_ms,
+            seed=args.seed,
+        )
+        server, base_url = mock_llm_server.start_in_thread(llm)
+    _configure_env(args, base_url)
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        from cli import load_batch_queries
+        queries = load_batch_queries(args.queries) or DEFAULT_QUERIES
+
+    output = os.path.abspath(args.output)
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    results = {
+        "benchmark": "turn_modes",
+        "timestamp": datetime.datetime.now().isoformat(),
+        "config": {
+            "modes": modes,
+            "size": args.size,
+            "turns": args.turns,
+            "warmup": args.warmup,
+            "llm": args.base_url or "mock",
+            "chat_latency_ms": None if args.base_url else args.chat_latency_ms,
+            "embed_latency_ms": None if args.base_url else args.embed_latency_ms,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": [],
+    }
+    try:
+        baseline = None
+        for mode in modes:
+            result, responses = run_mode(mode, args, queries)
+            if baseline is None:
+                baseline = responses
+            else:
+                sims = [jaccard(a, b) for a, b in zip(baseline, responses)]
+                result["quality"]["response_similarity"] = round(sum(sims) / max(1, len(sims)), 3)
+            results["results"].append(result)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    base_p50 = results["results"][0]["stages"]["total"].get("p50_ms") if results["results"] else None
+    for r in results["results"][1:]:
+        if base_p50:
+            r["total_p50_vs_baseline"] = round(r["stages"]["total"]["p50_ms"] / base_p50, 3)
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"[bench] Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+End-to-end turn latency benchmark.
+
+Runs Thalamus.process_turn against an in-process Qdrant (or a server via
+--qdrant-url) seeded with synthetic memories, with chat and embeddings served
+by the in-process mock LLM (mock_llm_server.py) at injected latencies.
+Reports per-stage p50/p95/p99 and memory usage as JSON for regression tracking.
+
+    python -m benchmarks.bench_turn --sizes 1000,100000,1000000 --turns 50 \\
+        --chat-latency-ms 400 --embed-latency-ms 30 --output bench_turn_results.json
+
+Stages: reflection_chat, embedding, qdrant_search, recent_turns,
+response_chat, log_write, commit (commit includes its own embedding lookup).
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import datetime
+import platform
+import tempfile
+
+import numpy as np
+
+import mock_llm_server
+from benchmarks.common import StageTimer, rss_mb, max_rss_mb
+
+STAGES = ["reflection_chat", "embedding", "qdrant_search", "recent_turns", "response_chat", "log_write", "commit"]
+
+VOCAB = (
+    "portal puzzle coffee morning work meeting music guitar garden rain memory dream travel "
+    "book friend family project deadline weekend movie game code bug release dinner walk "
+    "ocean mountain city train letter song painting question idea plan hope worry joy calm"
+).split()
+
+DEFAULT_QUERIES = [
+    "how are you today friend?",
+    "i think i might play some portal 2 before work",
+    "what did we talk about yesterday?",
+    "i'm worried about the project deadline",
+    "tell me something that made you curious recently",
+    "good morning!",
+    "can you remind me what song i was learning on guitar?",
+    "thanks, that helped a lot",
+]
+
+
+def _configure_env(args, base_url):
+    """Point Cortex/Hippocampus at the mock LLM and the benchmark vector store."""
+    os.environ.pop("OPENROUTER_API_KEY", None)
+    os.environ.update({
+        "OPENAI_API_KEY": "mock",
+        "OPENAI_BASE_URL": base_url,
+        "OPENAI_EMBED_DIMENSIONS": str(args.dim),
+        "SKIP_ENDPOINT_VERIFICATION": "true",
+        "COMMIT_MIN_INTERVAL": "0",
+    })
+    if args.qdrant_url:
+        host, _, port = args.qdrant_url.replace("http://", "").partition(":")
+        os.environ["QDRANT_HOST"] = host
+        os.environ["QDRANT_PORT"] = port or "6333"
+        os.environ.pop("QDRANT_LOCATION", None)
+    else:
+        os.environ["QDRANT_LOCATION"] = ":memory:"
+
+
+def seed_memories(hippo, size, dim, batch_size=2048, seed=0):
+    """Bulk-load `size` synthetic memories (random unit vectors + realistic payloads)."""
+    rng = np.random.default_rng(seed)
+    words = random.Random(seed)
+    now = datetime.datetime.now()
+    loaded = 0
+    while loaded < size:
+        n = min(batch_size, size - loaded)
+        vectors = rng.standard_normal((n, dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        payloads = []
+        for _ in range(n):
+            text = " ".join(words.choices(VOCAB, k=40))
+            kws = words.sample(VOCAB, 3)
+            payloads.append({
+                "fused_text": f"USER QUERY:\n{text[:80]}\n\nREFLECTION:\n{text}\n\nFINAL RESPONSE:\n{text[:120]}",
+                "timestamp": (now - datetime.timedelta(days=words.uniform(0, 14))).isoformat(),
+                "manual_weight": 1.0,
+                "tenant_id": hippo.default_tenant,
+                **{f"keyword_{i + 1}": kw for i, kw in enumerate(kws)},
+            })
+        hippo.client.upload_collection(
+            collection_name=hippo.collection_name,
+            vectors=vectors,
+            payload=payloads,
+            ids=[str(uuid.uuid4()) for _ in range(n)],
+            batch_size=n,
+        )
+        loaded += n
+
+
+def instrument(timer, thalamus):
+    cortex, hippo = thalamus.cortex, thalamus.hippocampus
+    timer.wrap(cortex, "chat", classify=lambda t: "reflection_chat" if not t.get("_reflection_chat_calls") else "response_chat")
+    timer.wrap(cortex, "embed", "embedding")
+    timer.wrap(hippo.client, "search", "qdrant_search")
+    timer.wrap(hippo, "get_recent_turns", "recent_turns")
+    timer.wrap(thalamus, "log_turn", "log_write")
+    timer.wrap(hippo, "delayed_commit", "commit")
+
+
+def run_size(size, args, queries):
+    from cortex import Cortex
+    from hippocampus import Hippocampus
+    from thalamus import Thalamus
+
+    os.environ["QDRANT_COLLECTION"] = f"hal_bench_{size}"
+    cortex = Cortex()
+    hippo = Hippocampus(cortex)
+
+    rss_before = rss_mb()
+    t0 = time.perf_counter()
+    seed_memories(hippo, size, args.dim, seed=args.seed)
+    load_seconds = time.perf_counter() - t0
+    rss_loaded = rss_mb()
+
+    thalamus = Thalamus(cortex, hippo)
+    timer = StageTimer()
+    instrument(timer, thalamus)
+
+    for i in range(args.warmup + args.turns):
+        query = queries[i % len(queries)]
+        timer.start_turn()
+        thalamus.process_turn(query, turn_id=int(time.time() * 1000) + i, task_id=f"BENCH_{size}_{i}")
+        totals = timer.end_turn()
+        if i < args.warmup:
+            timer.turns.pop()
+        else:
+            print(f"[bench] size={size} turn {i - args.warmup + 1}/{args.turns} total={totals['total']:.1f}ms", file=sys.stderr)
+
+    result = {
+        "collection_size": size,
+        "turns": args.turns,
+        "load_seconds": round(load_seconds, 2),
+        "stages": timer.report(STAGES),
+        "memory": {
+            "rss_mb_before_load": rss_before,
+            "rss_mb_after_load": rss_loaded,
+            "rss_mb_after_turns": rss_mb(),
+            "max_rss_mb": max_rss_mb(),
+        },
+    }
+    if hippo.recall_cache is not None:
+        result["recall_cache_hit_ratio"] = round(hippo.recall_cache.hit_ratio, 3)
+
+    try:
+        hippo.client.delete_collection(hippo.collection_name)
+    except Exception:
+        pass
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Thalamus.process_turn stage latencies.")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Comma-separated synthetic collection sizes")
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimensions (mock embeddings + collection)")
+    parser.add_argument("--chat-latency-ms", type=float, default=400.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=30.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--qdrant-url", default=None, help="Use a Qdrant server (host:port) instead of in-process")
+    parser.add_argument("--queries", default=None, help="Text/JSONL file of queries (default: built-in set)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_turn_results.json")
+    args = parser.parse_args()
+
+    llm = mock_llm_server.MockLLM(
+        default_dim=args.dim,
+        chat_latency_ms=args.chat_latency_ms,
+        embed_latency_ms=args.embed_latency_ms,
+        jitter_ms=args.jitter_ms,
+        seed=args.seed,
+    )
+    server, base_url = mock_llm_server.start_in_thread(llm)
+    _configure_env(args, base_url)
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        from cli import load_batch_queries
+        queries = load_batch_queries(args.queries) or DEFAULT_QUERIES
+
+    output = os.path.abspath(args.output)
+    workdir = tempfile.mkdtemp(prefix="hal_bench_")
+    os.chdir(workdir)  # keep benchmark turn logs out of the repo's runtime_logs
+
+    results = {
+        "benchmark": "turn_latency",
+        "timestamp": datetime.datetime.now().isoformat(),
+        "config": {
+            "sizes": [int(s) for s in args.sizes.split(",") if s.strip()],
+            "turns": args.turns,
+            "warmup": args.warmup,
+            "dim": args.dim,
+            "chat_latency_ms": args.chat_latency_ms,
+            "embed_latency_ms": args.embed_latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "vector_store": args.qdrant_url or "in-process (:memory:)",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": [],
+    }
+    try:
+        for size in results["config"]["sizes"]:
+            results["results"].append(run_size(size, args, queries))
+    finally:
+        server.shutdown()
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"[bench] Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Shared helpers for benchmarks: stage timing, percentiles, memory usage."""
+import os
+import time
+import resource
+import threading
+import functools
+from collections import defaultdict
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(values_ms):
+    """count / mean / p50 / p95 / p99 / max for a list of millisecond samples."""
+    vals = sorted(values_ms)
+    if not vals:
+        return {"count": 0}
+    return {
+        "count": len(vals),
+        "mean_ms": round(sum(vals) / len(vals), 3),
+        "p50_ms": round(percentile(vals, 50), 3),
+        "p95_ms": round(percentile(vals, 95), 3),
+        "p99_ms": round(percentile(vals, 99), 3),
+        "max_ms": round(vals[-1], 3),
+    }
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux /proc; falls back to peak RSS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1e6, 1)
+    except Exception:
+        return max_rss_mb()
+
+
+def max_rss_mb():
+    """Peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1e6 if os.uname().sysname == "Darwin" else peak / 1e3, 1)
+
+
+class StageTimer:
+    """
+    Attributes wall time to named stages by wrapping methods in place.
+
+    Each wrapped call adds its duration to the current turn's totals; stages
+    may nest (e.g. "commit" includes the embedding lookup it performs).
+    Timings are kept per thread so concurrent turns don't mix.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self.turns = []
+
+    def wrap(self, obj, attr, stage=None, classify=None):
+        """
+        Replace obj.attr with a timed wrapper.
+
+        classify(turn_totals) may return a stage name per call, e.g. to tell the
+        reflection chat call from the response chat call.
+        """
+        original = getattr(obj, attr)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            totals = getattr(self._local, "totals", None)
+            name = classify(totals) if (classify and totals is not None) else stage
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                if totals is not None:
+                    totals[name] += (time.perf_counter() - start) * 1000.0
+                    totals[f"_{name}_calls"] += 1
+
+        setattr(obj, attr, timed)
+        return original
+
+    def start_turn(self):
+        self._local.totals = defaultdict(float)
+        self._local.start = time.perf_counter()
+
+    def end_turn(self):
+        totals = dict(self._local.totals)
+        totals["total"] = (time.perf_counter() - self._local.start) * 1000.0
+        self._local.totals = None
+        self.turns.append(totals)
+        return totals
+
+    def report(self, stages):
+        out = {}
+        for stage in list(stages) + ["total"]:
+            out[stage] = summarize([t.get(stage, 0.0) for t in self.turns])
+            calls = [t.get(f"_{stage}_calls", 0) for t in self.turns]
+            if any(calls):
+                out[stage]["calls_per_turn"] = round(sum(calls) / len(calls), 2)
+        return out
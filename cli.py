@@ -3,24 +3,171 @@ Simple headless CLI runner for Hal.
 
 Use this when Tkinter isn't available on your system. It uses the same
 Cortex → Thalamus → Hippocampus pipeline but runs in the terminal.
+
+Batch mode replays a file of queries instead of reading stdin:
+
+    python cli.py --batch queries.txt --concurrency 4 --output results.jsonl
+    python cli.py --batch runtime_logs/2025-10-29/turn_log.jsonl
 """
 import os
+import re
+import sys
 import time
 import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import config  # loads .env if present
 from cortex import Cortex
 from hippocampus import Hippocampus
 from thalamus import Thalamus
+from telemetry import start_metrics_server
+
+
+def _extract_response(raw_response):
+    """Extract RESPONSE section if present."""
+    response = raw_response
+    try:
+        m_resp = re.search(r"RESPONSE\s*:\s*(.+?)(?:\n[A-Z ]{3,}?:|\Z)", raw_response, flags=re.S | re.I)
+        if m_resp:
+            response = m_resp.group(1).strip()
+    except Exception:
+        pass
+    return response
+
+
+def _percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def load_batch_queries(path):
+    """
+    Read queries from a text file (one per line) or JSONL.
+
+    JSONL records may be turn_log.jsonl entries ("user_query") or
+    simple {"query": ...} objects.
+    """
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    record = json.loads(line)
+                    query = record.get("user_query") or record.get("query") or record.get("text")
+                    if query:
+                        queries.append(query.strip())
+                    continue
+                except json.JSONDecodeError:
+                    pass
+            queries.append(line)
+    return queries
+
+
+def run_batch(thal, queries, output_path, concurrency=1):
+    """Run queries through Thalamus.process_turn and write one JSONL result per turn."""
+    base_turn_id = int(time.time() * 1000)
+    write_lock = threading.Lock()
+    latencies = []
+    errors = 0
+
+    def run_one(index, user_query):
+        turn_id = base_turn_id + index
+        start = time.perf_counter()
+        record = {"index": index, "turn_id": turn_id, "user_query": user_query}
+        try:
+            state, reflection, raw_response = thal.process_turn(
+                user_query=user_query,
+                turn_id=turn_id,
+                task_id=f"BATCH_{turn_id}",
+            )
+            record.update({
+                "state": state,
+                "reflection": reflection,
+                "response": _extract_response(raw_response),
+            })
+        except Exception as e:
+            record["error"] = str(e)
+        record["latency_ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+        return record
+
+    wall_start = time.perf_counter()
+    with open(output_path, "w", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(run_one, i, q) for i, q in enumerate(queries)]
+        for done, fut in enumerate(as_completed(futures), start=1):
+            record = fut.result()
+            with write_lock:
+                json.dump(record, out, ensure_ascii=False)
+                out.write("\n")
+                out.flush()
+            if "error" in record:
+                errors += 1
+            else:
+                latencies.append(record["latency_ms"])
+            print(f"[Batch] {done}/{len(queries)} turn {record['turn_id']} {record['latency_ms']:.0f}ms"
+                  f"{' ERROR: ' + record['error'] if 'error' in record else ''}", file=sys.stderr)
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    summary = {
+        "turns": len(queries),
+        "errors": errors,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 2),
+        "throughput_turns_per_s": round(len(queries) / wall, 3) if wall > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 1),
+            "p95": round(_percentile(latencies, 95), 1),
+            "p99": round(_percentile(latencies, 99), 1),
+            "max": round(latencies[-1], 1) if latencies else 0.0,
+        },
+    }
+    print(json.dumps(summary, indent=2))
+    return summary
 
 
 def main():
-    print("Hal (CLI) — type 'exit' to quit")
+    parser = argparse.ArgumentParser(description="Hal headless CLI")
+    parser.add_argument("--batch", metavar="PATH", help="Run queries from a text/JSONL file (or a turn_log.jsonl) instead of the REPL")
+    parser.add_argument("--output", metavar="PATH", help="Batch results JSONL (default: batch_results_<timestamp>.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent turns in batch mode (default: 1)")
+    parser.add_argument("--tenant", default=None, help="Tenant id for memories and logs")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("METRICS_PORT", "0")),
+                        help="Serve Prometheus metrics on this port (default: METRICS_PORT env, 0 = off)")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
 
-    # Initialize core components
+    # Initialize core components (model load, endpoint probes and Qdrant setup continue in the background)
+    start = time.perf_counter()
     cortex = Cortex()
     hippo = Hippocampus(cortex)
-    thal = Thalamus(cortex, hippo)
+    thal = Thalamus(cortex, hippo, tenant_id=args.tenant)
+    ready_ms = (time.perf_counter() - start) * 1000.0
+    pending = [name for name, busy in (
+        ("embedding model", not cortex.embeddings_ready),
+        ("Qdrant", not hippo.connected),
+    ) if busy]
+    print(f"Ready in {ready_ms:.0f} ms" + (f" ({', '.join(pending)} still loading)" if pending else ""), file=sys.stderr)
+
+    if args.batch:
+        queries = load_batch_queries(args.batch)
+        output = args.output or f"batch_results_{int(time.time())}.jsonl"
+        print(f"Hal (batch) — {len(queries)} queries from {args.batch} → {output} (concurrency={args.concurrency})")
+        run_batch(thal, queries, output, concurrency=args.concurrency)
+        return
+
+    print("Hal (CLI) — type 'exit' to quit")
 
     while True:
         try:
@@ -43,15 +190,7 @@ def main():
                 task_id=f"CLI_{turn_id}",
             )
 
-            # Extract RESPONSE section if present
-            response = raw_response
-            try:
-                import re
-                m_resp = re.search(r"RESPONSE\s*:\s*(.+?)(?:\n[A-Z ]{3,}?:|\Z)", raw_response, flags=re.S | re.I)
-                if m_resp:
-                    response = m_resp.group(1).strip()
-            except Exception:
-                pass
+            response = _extract_response(raw_response)
 
             print("\n[Reflection]\n" + (reflection or "(none)"))
             print("\n[Response]\n" + (response or "(none)"))
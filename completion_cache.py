@@ -0,0 +1,119 @@
+# ============================================================
+# completion_cache.py — Disk-Backed Exact-Match LLM Completion Cache
+# ============================================================
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Per-turn fields that make otherwise identical prompts miss: the reflect
+# prompt's "Time:"/"Turn:" lines and the single-pass "[Time: ... | Turn: ...]" tag
+VOLATILE_PATTERNS = [
+    re.compile(r"^(?:Time|Turn):.*$", re.M),
+    re.compile(r"\[Time:[^\]]*\]"),
+]
+_WS_RE = re.compile(r"\s+")
+
+
+class CompletionCache:
+    """
+    Exact-match cache of chat completions in a SQLite file.
+
+    Keys hash the model, temperature, response_format and the normalized
+    messages (whitespace collapsed; with ignore_volatile, timestamps and turn
+    ids removed), so replays, benchmarks and retries of the same prompt reuse
+    the stored completion. Entries expire after ttl_seconds; expired rows are
+    purged when the cache opens and every few hundred writes.
+    """
+
+    PURGE_EVERY = 256
+
+    def __init__(self, path, ttl_seconds=86400.0, ignore_volatile=True):
+        self.path = path
+        self.ttl_seconds = float(ttl_seconds)
+        self.ignore_volatile = ignore_volatile
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, created_at REAL NOT NULL, model TEXT, response TEXT NOT NULL)"
+        )
+        self.purge()
+
+    # ------------------------------------------------------------
+    def _normalize(self, content):
+        if isinstance(content, list):  # multipart content (e.g. with cache_control)
+            content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        text = str(content or "")
+        if self.ignore_volatile:
+            for pattern in VOLATILE_PATTERNS:
+                text = pattern.sub("", text)
+        return _WS_RE.sub(" ", text).strip()
+
+    def key(self, model, messages, temperature, response_format=None):
+        normalized = [[m.get("role"), self._normalize(m.get("content"))] for m in messages]
+        blob = json.dumps([model, round(float(temperature), 3), response_format, normalized],
+                          sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT created_at, response FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None or time.time() - row[0] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            return json.loads(row[1])
+        except ValueError:
+            return None
+
+    def put(self, key, response, model=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, created_at, model, response) VALUES (?, ?, ?, ?)",
+                (key, time.time(), model, json.dumps(response, ensure_ascii=False)),
+            )
+            self._writes += 1
+            purge = self._writes % self.PURGE_EVERY == 0
+        if purge:
+            self.purge()
+
+    def purge(self):
+        """Delete expired entries; returns the number removed."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM completions WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        if cur.rowcount:
+            logger.debug("Purged %d expired completions from %s", cur.rowcount, self.path)
+        return cur.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
@@ -4,9 +4,15 @@ Loads environment variables from a .env file at repo root (and current working d
 without overriding existing process env. Also configures Python logging.
 """
 import os
+import queue
+import atexit
+import random
 import logging
+import logging.handlers
 from pathlib import Path
 
+_queue_listener = None
+
 
 def load_env():
     try:
@@ -68,8 +74,23 @@ def configure_logging():
             file_handler.setFormatter(file_format)
             handlers.append(file_handler)
         except Exception as e:
-            print(f"Warning: Could not create log file {log_file}: {e}")
+            print(f"Warning: Could not create log file {log_file}: {e}")  # logging isn't configured yet
     
+    # Async logging: callers only enqueue records; a listener thread does the I/O
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+    if os.getenv("LOG_ASYNC", "true").lower() in ["true", "1", "yes"]:
+        log_queue = queue.SimpleQueue()
+        _queue_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _queue_listener.start()
+        atexit.register(_stop_queue_listener)
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        # Only merge args (and any traceback) into the message; real formatting happens once, in the listener
+        queue_handler.setFormatter(logging.Formatter("%(message)s"))
+        handlers = [queue_handler]
+
     # Configure root logger
     logging.basicConfig(
         level=level,
@@ -77,6 +98,34 @@ def configure_logging():
         force=True  # Override any existing configuration
     )
 
+    # Chatty HTTP client internals stay at WARNING unless explicitly debugging them
+    for noisy in ("urllib3", "httpx", "httpcore"):
+        logging.getLogger(noisy).setLevel(max(level, logging.WARNING))
+
+
+def _stop_queue_listener():
+    """Flush queued records at exit."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+# Fraction of verbose dumps (raw LLM output, recall tables) emitted at DEBUG
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+
+def log_sampled(logger, level=logging.DEBUG):
+    """
+    True if a verbose dump should be built and logged on this call.
+
+    Checks the level first so disabled dumps cost nothing, then samples by
+    LOG_SAMPLE_RATE so enabled dumps stay affordable under load.
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    return LOG_SAMPLE_RATE >= 1.0 or random.random() < LOG_SAMPLE_RATE
+
 
 # Execute on import
 load_env()
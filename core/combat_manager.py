@@ -1,39 +1,43 @@
 # combat_manager.py
 
+import logging
+
+logger = logging.getLogger(__name__)
+
 class CombatManager:
     def __init__(self, rule_state, stack_manager):
-        print("DEBUG: CombatManager __init__ starting")
+        logger.debug("CombatManager __init__ starting")
         self.rule_state = rule_state
         self.stack_manager = stack_manager
         self.combat_log = []
-        print("DEBUG: CombatManager __init__ starting")
+        logger.debug("CombatManager __init__ starting")
 
     def declare_attackers(self, player, targets):
         """
         Declare attackers. 'targets' is a list of (attacker, defending_player) tuples.
         """
         if not self.rule_state.phase == "Combat":
-            print("❌ Not the combat phase.")
+            logger.warning("Not the combat phase.")
             return
 
-        print(f"⚔️ {player.name} declares attackers:")
+        logger.info("⚔️ %s declares attackers:", player.name)
         for attacker, target in targets:
-            print(f"- {attacker} attacking {target.name}")
+            logger.info("- %s attacking %s", attacker, target.name)
             self.combat_log.append((attacker, target))
 
     def declare_blockers(self, defender, blocks):
         """
         Declare blockers. 'blocks' is a list of (blocker, attacker) tuples.
         """
-        print(f"🛡️ {defender.name} declares blockers:")
+        logger.info("🛡️ %s declares blockers:", defender.name)
         for blocker, attacker in blocks:
-            print(f"- {blocker} blocks {attacker}")
+            logger.info("- %s blocks %s", blocker, attacker)
             self.combat_log.append((blocker, attacker))
 
     def resolve_combat(self):
-        print("💥 Resolving combat damage...")
+        logger.info("💥 Resolving combat damage...")
         for entry in self.combat_log:
-            print(f"- {entry[0]} deals damage to {entry[1].name if hasattr(entry[1], 'name') else entry[1]}")
+            logger.info("- %s deals damage to %s", entry[0], entry[1].name if hasattr(entry[1], 'name') else entry[1])
         self.combat_log.clear()
 
 
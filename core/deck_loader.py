@@ -1,16 +1,19 @@
 from card_actions.card_lookup import card_lookup
 import re
+import logging
+
+logger = logging.getLogger(__name__)
 
 def normalize_card_name(name):
     return name.replace(",", "").replace("'", "").title()
 
 class DeckLoader:
     def __init__(self, deck_path):
-        print("DEBUG: DeckLoader __init__ starting")
+        logger.debug("DeckLoader __init__ starting")
         self.deck_path = deck_path
         self.deck_list = []
         self.mainboard = []
-        print("DEBUG: DeckLoader __init__ Ended")
+        logger.debug("DeckLoader __init__ Ended")
 
     def load(self):
         try:
@@ -47,7 +50,7 @@ class DeckLoader:
 
                     # Singleton enforcement (skip duplicates unless it's a basic)
                     if card_name in seen and card_name not in basics:
-                        print(f"🚫 Duplicate card ignored (singleton): '{card_name}'")
+                        logger.info("🚫 Duplicate card ignored (singleton): '%s'", card_name)
                         continue
 
                     seen.add(card_name)
@@ -61,15 +64,15 @@ class DeckLoader:
                 if key in card_lookup:
                     self.mainboard.append(card_lookup[key])
                 else:
-                    print(f"⚠️ Card '{card_name}' not found in card_lookup.")
+                    logger.warning("Card '%s' not found in card_lookup.", card_name)
 
-            print(f"📥 Loaded singleton deck from {self.deck_path} with {len(self.mainboard)} card objects.")
-            print(f"CraigAI library size at start of game: {len(self.mainboard)}")
+            logger.info("📥 Loaded singleton deck from %s with %s card objects.", self.deck_path, len(self.mainboard))
+            logger.info("CraigAI library size at start of game: %s", len(self.mainboard))
 
         except FileNotFoundError:
-            print(f"❌ Deck file not found: {self.deck_path}")
+            logger.error("Deck file not found: %s", self.deck_path)
         except Exception as e:
-            print(f"❌ Error while loading deck '{self.deck_path}': {e}")
+            logger.error("Error while loading deck '%s': %s", self.deck_path, e)
 
 
 
@@ -1,4 +1,7 @@
 import core.mana_utils as mana_utils
+import logging
+
+logger = logging.getLogger(__name__)
 
 # core/game_actions.py
 
@@ -81,7 +84,7 @@ class GameActions:
 
     def can_pay_mana_cost(self, player_state, mana_cost_str):
         parsed_cost = mana_utils.parse_mana_cost(mana_cost_str)
-        print(f"DEBUG: Parsed mana cost: {parsed_cost}")
+        logger.debug("Parsed mana cost: %s", parsed_cost)
         available_mana = player_state.get_available_mana(self.game_state.battlefield)
         return mana_utils.can_pay_mana_cost(available_mana, mana_cost_str)
     
@@ -8,43 +8,46 @@ from core.player_state import PlayerState
 from core.game_actions import GameActions
 from config import OFFLINE_DEMO_MODE
 from ai.craig import Craig
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class GameManager:
     def __init__(self, players, rule_state_class, log_manager_class, game_state_class, trigger_manager, stack_manager_class,):
-        print("DEBUG: GameManager __init__ started")
+        logger.debug("GameManager __init__ started")
 
-        print(f"DEBUG: Players passed to GameManager: {[p.name for p in players]}")
+        logger.debug("Players passed to GameManager: %s", [p.name for p in players])
         self.players = players
-        print(f"DEBUG: manual_control flags: {[p.manual_control for p in self.players]}")
+        logger.debug("manual_control flags: %s", [p.manual_control for p in self.players])
 
         # Create GameState first
         self.game_state = game_state_class(self)
-        print("DEBUG: GameManager self.game_state assigned")
+        logger.debug("GameManager self.game_state assigned")
 
         # Create LogManager
         self.log_manager = log_manager_class("game_log.txt")
-        print("DEBUG:LOG MANAGER ASSIGNED")
+        logger.debug("LOG MANAGER ASSIGNED")
 
         # Create GameActions with placeholder RuleState (None for now)
         self.game_actions = GameActions(self.game_state, None, self.log_manager)
-        print("DEBUG: GameManager game_actions assigned")
+        logger.debug("GameManager game_actions assigned")
 
         # Now create RuleState with correct GameActions and GameState
         self.rule_state = rule_state_class(self.game_state, self.game_actions, self)
-        print("DEBUG: GameManager rule_state assigned")
+        logger.debug("GameManager rule_state assigned")
 
         # Patch GameActions with the correct RuleState
         self.game_actions.rule_state = self.rule_state
-        print("DEBUG: GameManager game_actions.rule_state patched")
+        logger.debug("GameManager game_actions.rule_state patched")
 
         # Create TriggerManager
         self.trigger_manager = trigger_manager(self)
-        print("DEBUG: TRIGGER MANAGER ASSIGNED")
+        logger.debug("TRIGGER MANAGER ASSIGNED")
 
         # Create StackManager
         self.stack_manager = stack_manager_class(self)
-        print("DEBUG: GameManager stack_manager assigned")
+        logger.debug("GameManager stack_manager assigned")
 
         # Optional → link TriggerManager to other systems
         self.rule_state.trigger_manager = self.trigger_manager
@@ -60,8 +63,8 @@ class GameManager:
         self.priority_passed = False
         self.holding_priority = False
 
-        print("card detection engine assigned")
-        print("DEBUG: GameManager __init__ completed")
+        logger.debug("Card detection engine assigned")
+        logger.debug("GameManager __init__ completed")
 
        
 
@@ -79,16 +82,16 @@ class GameManager:
             self.log_manager.log_action(f"✅ {player_name} moves {card.name} to battlefield.")
 
     def start_game(self):
-        print("🎮 Starting the game...")
+        logger.info("🎮 Starting the game...")
         self.rule_state.phase = "begin"
         for player in self.players:
             for _ in range(7):
-                print(f"DEBUG: {player.name} hand at start of game: {[card.name for card in player.hand]}")
+                logger.debug("%s hand at start of game: %s", player.name, [card.name for card in player.hand])
                 if player.library:
                     card = player.library.pop(0)
                     player.hand.append(card)
             
-            print(f"DEBUG: {player.name} ai={player.ai} manual_control={player.manual_control}")
+            logger.debug("%s ai=%s manual_control=%s", player.name, player.ai, player.manual_control)
             if not player.manual_control and player.ai:
                 player.ai.game_state = self
                 player.ai.take_turn()      
@@ -96,7 +99,7 @@ class GameManager:
 
     def execute_turn(self):
         player = self.players[self.current_player_index]
-        print(f"➡️ Turn {self.turn_number}: {player.name}'s turn begins")
+        logger.info("➡️ Turn %s: %s's turn begins", self.turn_number, player.name)
         
         # Print battlefield state at start of turn
         self.print_shared_battlefield()
@@ -107,38 +110,35 @@ class GameManager:
             player.ai.take_turn()
 
         # Print battlefield state before ending turn
-        print(f"🔄 End of {player.name}'s turn — final battlefield state:")
+        logger.info("🔄 End of %s's turn — final battlefield state:", player.name)
         self.print_shared_battlefield()
 
     def run_game(self):
-        print("🎮 Starting game loop...")
+        logger.info("🎮 Starting game loop...")
         self.turn_number = 1
         self.current_player_index = 0
 
         while self.game_running:
-            print(f"[DEBUG] Game loop - current_game_state = {type(self.current_game_state).__name__ if self.current_game_state else 'None'}")
+            logger.debug("Game loop - current_game_state = %s", type(self.current_game_state).__name__ if self.current_game_state else 'None')
             if self.current_game_state:
                 self.current_game_state.update()
             else:
                 self.execute_turn()
 
-        print("🏁 Game over.")
+        logger.info("🏁 Game over.")
    
 
     def check_game_end(self):
         # Placeholder for win/loss logic
         for player in self.players:
             if player.life <= 0:
-                print(f"☠️ {player.name} has lost the game!")
+                logger.info("☠️ %s has lost the game!", player.name)
 
     def print_shared_battlefield(self):
-        print("\n=== Shared Battlefield ===")
-        if not self.game_state.battlefield:
-            print("(Empty)")
-        else:
-            for card in self.game_state.battlefield:
-                print(f"  - {card.name} ({card.card_type}) controlled by {card.controller}")
-        print("========================\n")
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        lines = [f"  - {card.name} ({card.card_type}) controlled by {card.controller}" for card in self.game_state.battlefield]
+        logger.info("=== Shared Battlefield ===\n%s\n========================", "\n".join(lines) or "(Empty)")
 
     def draw_card(self, player_state):
         if player_state.library:
@@ -165,10 +165,10 @@ class GameManager:
         self.current_game_state = PriorityPhaseState(self)
 
     def apply(self, action):
-        print(f"[GameManager] Applying action: {action}")
+        logger.debug("Applying action: %s", action)
 
         if action["type"] == "noop":
-            print("[GameManager] No operation.")
+            logger.debug("No operation.")
         
         elif action["type"] == "draw":
             player = self.players[self.current_player_index]
@@ -178,13 +178,13 @@ class GameManager:
             self.advance_to_next_player()
 
         else:
-            print(f"[GameManager] Unknown action: {action}")
+            logger.warning("Unknown action: %s", action)
 
     def add_player(self, player):
         self.players[player.name] = player
         if len(self.players) == 1:
             self.active_player = player.name  # or player object
-        print(f"👤 Added player: {player.name}")
+        logger.info("👤 Added player: %s", player.name)
 
     def get_game_state(self):
         return self.game_state
@@ -1,10 +1,13 @@
 
 import json
 from card_actions.card_base import Card
+import logging
+
+logger = logging.getLogger(__name__)
 
 class GameState:
     def __init__(self, game_manager,):
-        print("DEBUG: GameState __init__ starting")
+        logger.debug("GameState __init__ starting")
         self.game_manager = game_manager
         self.rule_state = None
         self.battlefield = []
@@ -13,7 +16,7 @@ class GameState:
         self.stack = []
         self.log = []
         self.trigger_manager = None   #will be injected during game setup
-        print("DEBUG: GameState __init__ complete")
+        logger.debug("GameState __init__ complete")
 
     def add_player(self, player_state):
         self.players[player_state.name] = player_state
@@ -23,7 +26,7 @@ class GameState:
 
     def log_action(self, message):
         self.log.append(message)
-        print(f"[LOG] {message}")
+        logger.info("[LOG] %s", message)
 
     def load_from_json(self, json_data, card_library):
         for player_name, pdata in json_data["players"].items():
@@ -2,6 +2,9 @@
 
 import os
 import datetime
+import logging
+
+logger = logging.getLogger(__name__)
 
 class LogManager:
     def __init__(self, filepath="game_log.txt"):
@@ -11,19 +14,18 @@ class LogManager:
         os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
 
         with open(self.filepath, "w") as f:
-            print("log created!")
+            logger.debug("Game log created at %s", self.filepath)
             f.write("=== Game Log Started ===\n")
 
     def _write_log(self, message):
         timestamp = datetime.datetime.now().strftime("[%H:%M:%S]")
         full_message = f"{timestamp} {message}"
-        print(full_message)  # Console output
+        logger.info("%s", full_message)  # Console output
        
         with open(self.filepath, "a", encoding="utf-8") as f:
             f.write(full_message + "\n")
 
     def log_action(self, message):
-        print(message)
         self._write_log(message)
 
     def log_trigger(self, trigger_type, source):
@@ -40,10 +42,10 @@ class LogManager:
 
 if __name__ == "__main__":
     from core.player_state import PlayerState
-    logger = LogManager()
+    log_manager = LogManager()
     test_player = PlayerState("Brad")
-    logger.log_action(test_player, "played Temple Garden")
-    logger.log_trigger("landfall", "Felidar Retreat")
-    logger.log_combat("Goblin Guide", test_player)
-    logger.log_stack_addition("Lightning Bolt", "Lightning Bolt", test_player)
-    logger.log_phase("Main Phase 1")
\ No newline at end of file
+    log_manager.log_action(test_player, "played Temple Garden")
+    log_manager.log_trigger("landfall", "Felidar Retreat")
+    log_manager.log_combat("Goblin Guide", test_player)
+    log_manager.log_stack_addition("Lightning Bolt", "Lightning Bolt", test_player)
+    log_manager.log_phase("Main Phase 1")
\ No newline at end of file
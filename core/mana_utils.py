@@ -1,4 +1,7 @@
 import re
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 def parse_mana_cost(mana_cost_str):
@@ -10,13 +13,13 @@ def parse_mana_cost(mana_cost_str):
 
 def can_pay_mana_cost(available_mana, mana_cost):
     parsed_cost = parse_mana_cost(mana_cost)
-    print(f"DEBUG: Parsed mana cost: {parsed_cost}")
+    logger.debug("Parsed mana cost: %s", parsed_cost)
     total_required = len(parsed_cost)
     return available_mana >= total_required
 
 def pay_mana_cost(player_state, game_state, mana_cost):
     parsed_cost = parse_mana_cost(mana_cost)
-    print(f"DEBUG: Paying mana cost: {parsed_cost}")
+    logger.debug("Paying mana cost: %s", parsed_cost)
 
     battlefield = game_state.battlefield
 
@@ -28,13 +31,13 @@ def pay_mana_cost(player_state, game_state, mana_cost):
 
     for symbol in parsed_cost:
         if not available_lands:
-            print(f"WARNING: Not enough lands to pay for symbol '{symbol}'!")
+            logger.warning("Not enough lands to pay for symbol '%s'!", symbol)
             return False  # Cannot pay full cost
 
         # Pop a land to tap
         land = available_lands.pop(0)
         land.is_tapped = True
-        print(f"{player_state.name} taps {land.name} to pay for '{symbol}'.")
+        logger.info("%s taps %s to pay for '%s'.", player_state.name, land.name, symbol)
 
         # Optionally, you can add to the mana pool here:
         # game_manager.game_actions.add_mana_to_pool(...)
@@ -1,6 +1,9 @@
 # phase_tracker.py
 
 from core.rule_state import RuleState
+import logging
+
+logger = logging.getLogger(__name__)
 
 class PhaseTracker:
     def __init__(self, rule_state):
@@ -9,13 +12,13 @@ class PhaseTracker:
     def start_turn(self, player_name):
         self.rule_state.active_player = player_name
         self.rule_state.current_phase = "beginning"
-        print(f"\n🔁 New turn begins for {player_name}! Starting at {self.rule_state.current_phase} phase.")
+        logger.info("New turn begins for %s! Starting at %s phase.", player_name, self.rule_state.current_phase)
 
     def next_phase(self):
         current = self.rule_state.current_phase
         self.rule_state.advance_phase()
         new = self.rule_state.current_phase
-        print(f"➡️ Phase advanced: {current} ➡️ {new}")
+        logger.info("➡️ Phase advanced: %s ➡️ %s", current, new)
 
     def run_turn(self, player_name):
         self.start_turn(player_name)
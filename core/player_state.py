@@ -1,6 +1,10 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
 class PlayerState:
     def __init__(self, name, manual_control=True,):
-        print("DEBUG: PlaterState __init__ starting")
+        logger.debug("PlaterState __init__ starting")
         self.name = name
         self.life = 40
         self.hand = []
@@ -25,7 +29,7 @@ class PlayerState:
         "G": 0,  # Green
         "C": 0   # Colorless (if needed)
 }
-        print("DEBUG: PlaterState __init__ complete")
+        logger.debug("PlaterState __init__ complete")
 
     def get_available_mana(self, battlefield):
         untapped_lands = [
@@ -44,4 +48,4 @@ class PlayerState:
             if self.library:
                 self.hand.append(self.library.pop(0))
             else:
-                print(f"⚠️ {self.name} tried to draw from an empty library!")
\ No newline at end of file
+                logger.warning("%s tried to draw from an empty library!", self.name)
@@ -1,8 +1,12 @@
 # rule_state.py
 
+import logging
+
+logger = logging.getLogger(__name__)
+
 class RuleState:
     def __init__(self, game_state, game_actions, game_manager):
-        print("DEBUG: RuleState __init__ starting")
+        logger.debug("RuleState __init__ starting")
         self.game_state = game_state
         self.game_actions = game_actions 
         # Turn structure rules
@@ -18,7 +22,7 @@ class RuleState:
             "main2",
             "end",
         ]
-        print("DEBUG: RuleState __init__ complete")
+        logger.debug("RuleState __init__ complete")
 
         # Priority rules
         self.priority_passed = False
@@ -48,15 +52,15 @@ class RuleState:
         try:
             current_index = self.phase_order.index(self.current_phase)
             self.current_phase = self.phase_order[(current_index + 1) % len(self.phase_order)]
-            print(f"✅ Phase advanced to: {self.current_phase}")
+            logger.info("Phase advanced to: %s", self.current_phase)
         except ValueError:
-            print(f"⚠️ Phase error: '{self.current_phase}' not found in phase_order.")
+            logger.warning("Phase error: '%s' not found in phase_order.", self.current_phase)
 
     def apply_effect(self, rule_key, value):
         if rule_key in self.rules:
             self.rules[rule_key] = value
         else:
-            print(f"⚠️ Rule key '{rule_key}' not found. Consider adding it to the engine.")
+            logger.warning("Rule key '%s' not found. Consider adding it to the engine.", rule_key)
 
     def add_continuous_effect(self, description):
         self.continuous_effects.append(description)
@@ -66,16 +70,16 @@ class RuleState:
         self.continuous_effects.clear()
 
     def print_current_state(self):
-        print("\n📜 Current Rule State:")
-        print(f"Phase: {self.current_phase}")
-        for rule, value in self.rules.items():
-            print(f" - {rule}: {value}")
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        lines = [f"📜 Current Rule State:", f"Phase: {self.current_phase}"]
+        lines += [f" - {rule}: {value}" for rule, value in self.rules.items()]
         if self.continuous_effects:
-            print("Active continuous effects:")
-            for effect in self.continuous_effects:
-                print(f" * {effect}")
+            lines.append("Active continuous effects:")
+            lines += [f" * {effect}" for effect in self.continuous_effects]
         else:
-            print("No continuous effects.")
+            lines.append("No continuous effects.")
+        logger.info("%s", "\n".join(lines))
 
 
     
\ No newline at end of file
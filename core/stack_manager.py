@@ -1,13 +1,17 @@
 
 
+import logging
+
+logger = logging.getLogger(__name__)
+
 class StackManager:
     def __init__(self, game_manager,):
         self.stack = []
         self.game_manager = game_manager
-        print("DEBUG: StackManager created → game_manager is:", "Assigned" if game_manager else "None")
+        logger.debug("StackManager created → game_manager is: %s", "Assigned" if game_manager else "None")
 
     def add_to_stack(self, type, source_card, controller, targets=[], metadata={}):
-        print(f"🌀 Stack: Adding {type} → {source_card.name} controlled by {controller}")
+        logger.info("🌀 Stack: Adding %s → %s controlled by %s", type, source_card.name, controller)
         self.stack.append({
             "type": type,
             "source_card": source_card,
@@ -19,19 +23,18 @@ class StackManager:
 
     def print_stack(self):
         if not self.stack:
-            print("🌀 Stack is empty.")
-        else:
-            print("🌀 Current Stack (top first):")
-            for item in reversed(self.stack):
-                print(f"  - {item['type']} → {item['source_card'].name} controlled by {item['controller']}")
+            logger.info("🌀 Stack is empty.")
+        elif logger.isEnabledFor(logging.INFO):
+            lines = [f"  - {item['type']} → {item['source_card'].name} controlled by {item['controller']}" for item in reversed(self.stack)]
+            logger.info("🌀 Current Stack (top first):\n%s", "\n".join(lines))
 
     def pop_stack(self):
         if self.stack:
             item = self.stack.pop()
-            print(f"🌀 Resolving {item['type']} → {item['source_card'].name} controlled by {item['controller']}")
+            logger.info("🌀 Resolving %s → %s controlled by %s", item['type'], item['source_card'].name, item['controller'])
             return item
         else:
-            print("🌀 Stack is empty — nothing to resolve.")
+            logger.info("🌀 Stack is empty — nothing to resolve.")
             return None
 
     # Method to pass priority to players (basic prototype — later this will be more advanced)
@@ -48,7 +51,7 @@ class StackManager:
             response = input(f"{player.name}, respond to the stack (type card name or 'pass'): ").strip()
 
             if response.lower() == "pass":
-                print(f"✅ {player.name} passes priority.")
+                logger.info("%s passes priority.", player.name)
                 passes_in_a_row += 1
                 i = (i + 1) % num_players  # Next player in turn order
 
@@ -59,12 +62,12 @@ class StackManager:
 
                     # Add to stack using the EXISTING add_to_stack() method
                     self.add_to_stack(type="spell", source_card=card_to_cast, controller=player.name)
-                    print(f"🛑 {player.name} responds with {card_to_cast.name} → added to stack.")
+                    logger.info("🛑 %s responds with %s → added to stack.", player.name, card_to_cast.name)
 
                     # After adding to stack → priority restarts
                     return False, i
                 else:
-                    print(f"⚠️ Unknown card: '{response}'. Please try again.")
+                    logger.warning("Unknown card: '%s'. Please try again.", response)
                     # Let them retry — do not advance to next player
 
         # If all players passed → ready to resolve
@@ -1,19 +1,23 @@
 
 # core/trigger_manager.py
 
+import logging
+
+logger = logging.getLogger(__name__)
+
 class TriggerManager:
     def __init__(self, game_manager):
-        print("DEBUG: TriggerManager __init__ started")
+        logger.debug("TriggerManager __init__ started")
         self.game_manager = game_manager
         self.triggers = []
-        print("DEBUG: TriggerManager __init__ completed")
+        logger.debug("TriggerManager __init__ completed")
 
     def register_trigger(self, trigger):
         """Registers a trigger dictionary with keys: 'event', 'condition', 'action'"""
         self.triggers.append(trigger)
 
     def check_and_trigger(self, event_type, **kwargs):
-        print(f"DEBUG: Checking triggers for event: {event_type} with {kwargs}")
+        logger.debug("Checking triggers for event: %s with %s", event_type, kwargs)
 
         # Push trigger as stack item instead of resolving instantly
         self.game_manager.stack_manager.add_to_stack(
@@ -28,7 +32,7 @@ class TriggerManager:
         )
 
     def resolve_trigger(self, stack_item):
-        print(f"✨ Resolving triggered ability from {stack_item['source_card'].name}.")
+        logger.info("✨ Resolving triggered ability from %s.", stack_item['source_card'].name)
 
 # EXAMPLE USAGE:
 # trigger = {
@@ -3,8 +3,14 @@
 # ============================================================
 
 import os, json, time, requests, datetime, re
+import base64
 import logging
+import threading
+import contextvars
+import numpy as np
 import config  # Load environment from .env if present
+from telemetry import tracer, record_startup
+from prompt_assembler import PromptAssembler, TokenCounter
 from halcyon_prompts import (
     SYSTEM_PROMPT,
     STRICT_OUTPUT_EXAMPLE,
@@ -12,11 +18,31 @@ from halcyon_prompts import (
     COGNITIVE_STATES,
     MEMORY_RECALL_INSTRUCTION,
     FINAL_RESPONSE_INSTRUCTION,
+    SINGLE_PASS_INSTRUCTION,
+    JSON_OUTPUT_NOTE,
+    NARRATIVE_SUMMARY_INSTRUCTION,
     QUESTION_INSTRUCTION
 )
+from response_format import json_schema_format, parse_sections, parse_json_output, render_sections
+from completion_cache import CompletionCache
+from llm_router import LLMRouter, RouteError
 
 logger = logging.getLogger(__name__)
 
+
+def as_vector(values):
+    """Embedding as a contiguous, read-only float32 array (shared safely through caches)."""
+    vec = np.ascontiguousarray(values, dtype=np.float32)
+    vec.flags.writeable = False
+    return vec
+
+
+def _decode_embedding(data):
+    """OpenAI embedding item: base64 little-endian float32 bytes or a JSON float list."""
+    if isinstance(data, str):
+        return as_vector(np.frombuffer(base64.b64decode(data), dtype="<f4"))
+    return as_vector(data)
+
 # ------------------------------------------------------------
 # Retry Utility
 # ------------------------------------------------------------
@@ -33,21 +59,21 @@ def _retry_with_backoff(func, max_retries=3, initial_delay=1.0, backoff_factor=2
             if hasattr(result, 'status_code'):
                 if result.status_code in [429, 500, 502, 503, 504]:
                     if attempt < max_retries - 1:
-                        logger.warning(f"Got {result.status_code}, retrying in {delay}s... (attempt {attempt + 1}/{max_retries})")
+                        logger.warning("Got %s, retrying in %ss... (attempt %s/%s)", result.status_code, delay, attempt + 1, max_retries)
                         time.sleep(delay)
                         delay *= backoff_factor
                         continue
                     else:
-                        logger.error(f"Max retries reached after {result.status_code}")
+                        logger.error("Max retries reached after %s", result.status_code)
                         return result
             return result
         except requests.exceptions.RequestException as e:
             if attempt < max_retries - 1:
-                logger.warning(f"Network error: {e}, retrying in {delay}s... (attempt {attempt + 1}/{max_retries})")
+                logger.warning("Network error: %s, retrying in %ss... (attempt %s/%s)", e, delay, attempt + 1, max_retries)
                 time.sleep(delay)
                 delay *= backoff_factor
             else:
-                logger.error(f"Max retries reached after network error")
+                logger.error("Max retries reached after network error")
                 raise
     return None
 
@@ -88,8 +114,9 @@ class Cortex:
             self.provider = "openai"
             if os.getenv("OPENAI_API_KEY"):
                 self.embed_provider = "openai"
-                self.chat_base = chat_base.rstrip("/")
-                self.embed_base = embed_base.rstrip("/")
+                # OPENAI_BASE_URL points both endpoints at any OpenAI-compatible server (e.g. mock_llm_server.py)
+                self.chat_base = os.getenv("OPENAI_BASE_URL", chat_base).rstrip("/")
+                self.embed_base = os.getenv("OPENAI_BASE_URL", embed_base).rstrip("/")
                 self.chat_model = chat_model
                 self.embed_model = embed_model
             else:
@@ -100,48 +127,150 @@ class Cortex:
                 self.chat_model = chat_model
                 self.embed_model = os.getenv("LOCAL_EMBED_MODEL", "all-MiniLM-L6-v2")
 
+        # Token budget for the response prompt (prompt_assembler.py)
+        self.token_counter = TokenCounter(self.chat_model)
+        self.prompt_token_budget = int(os.getenv("PROMPT_TOKEN_BUDGET", "4000"))
+        self.prompt_memory_tokens = int(os.getenv("PROMPT_MEMORY_TOKENS", "80"))
+        self.prompt_recent_turn_tokens = int(os.getenv("PROMPT_RECENT_TURN_TOKENS", "250"))
+
+        # Optional shortened embeddings (OpenAI text-embedding-3 "dimensions" parameter)
+        self.embed_dimensions = int(os.getenv("OPENAI_EMBED_DIMENSIONS", "0")) or None
+        if self.embed_provider == "local":
+            self.embed_dimensions = None
+        # "base64" ships embeddings as packed float32 bytes (decoded straight into an array);
+        # "float" for OpenAI-compatible servers that only return JSON lists
+        self.embed_encoding = os.getenv("OPENAI_EMBED_ENCODING", "base64").lower()
+
         # Runtime references injected later
         self.hippocampus = None
         self.anchor = None
 
         # Static system prompt
         self.system_prompt = SYSTEM_PROMPT
+
+        # Static prefixes, byte-identical on every call so provider prompt caching hits:
+        # persona + state vocabulary first (shared), then the call-specific instructions.
+        # Everything that changes per turn goes in the user message after them.
+        vocab = (
+            f"***VALID EMOTIVE STATES***: {', '.join(EMOTIVE_STATES)}\n"
+            f"***VALID COGNITIVE STATES***: {', '.join(COGNITIVE_STATES)}"
+        )
+        # Structured outputs: a strict JSON-schema response_format instead of free-text sections
+        self.structured_output = os.getenv("STRUCTURED_OUTPUT", "false").lower() in ["true", "1", "yes"]
+        # Curiosity (curiosity.py): text-mode reflect/single_pass calls may also raise one QUESTIONS object
+        self.curiosity = os.getenv("CURIOSITY", "false").lower() in ["true", "1", "yes"]
+        # Both prefix sets are kept so a provider that rejects response_format can drop to text mode
+        self._text_prefixes = self._build_prefixes(vocab, structured=False)
+        self._json_prefixes = self._build_prefixes(vocab, structured=True)
+        self._apply_prefixes()
+        # Rolling narrative summary (narrative.py): fold prompt and its share of the response prompt
+        self.narrative_max_words = int(os.getenv("NARRATIVE_MAX_WORDS", "200"))
+        self.narrative_prefix = NARRATIVE_SUMMARY_INSTRUCTION.strip().replace("{max_words}", str(self.narrative_max_words))
+        self.prompt_narrative_tokens = int(os.getenv("PROMPT_NARRATIVE_TOKENS", "400"))
+        # Explicit cache breakpoints for providers that need them (e.g. Anthropic models via OpenRouter)
+        self.prompt_cache_control = os.getenv("PROMPT_CACHE_CONTROL", "false").lower() in ["true", "1", "yes"]
+
+        # Optional disk-backed completion cache (exact match, TTL) for the calls in LLM_CACHE_CALLS
+        self.completion_cache = None
+        self.completion_cache_calls = set()
+        if os.getenv("LLM_CACHE", "false").lower() in ["true", "1", "yes"]:
+            try:
+                self.completion_cache = CompletionCache(
+                    os.getenv("LLM_CACHE_PATH", "./runtime_logs/llm_cache.sqlite"),
+                    ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "86400")),
+                    ignore_volatile=os.getenv("LLM_CACHE_IGNORE_VOLATILE", "true").lower() in ["true", "1", "yes"],
+                )
+                self.completion_cache_calls = {c.strip() for c in os.getenv("LLM_CACHE_CALLS", "reflect").split(",") if c.strip()}
+                logger.info("Completion cache active for %s :: %s", sorted(self.completion_cache_calls), self.completion_cache.path)
+            except Exception as e:
+                logger.warning("Completion cache unavailable: %s", e)
+                self.completion_cache = None
+
+        # Shared HTTP connection pool (keep-alive across turns and threads)
+        self._http = requests.Session()
+        pool_size = int(os.getenv("HTTP_POOL_SIZE", "16"))
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._http.mount("https://", adapter)
+        self._http.mount("http://", adapter)
+
+        # Optional multi-endpoint routing (failover, circuit breakers, hedging) for chat
+        self.router = None
+        try:
+            self.router = LLMRouter.from_env(session=self._http)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error("Invalid LLM_ENDPOINTS (%s); using the single configured provider", e)
+        if self.router is not None:
+            logger.info("Chat routed across %d endpoints: %s (hedging %s)",
+                        len(self.router.endpoints), ", ".join(e.name for e in self.router.endpoints),
+                        "on" if self.router.hedge else "off")
         
-        # Embedding cache (cleared per turn to avoid stale data)
+        # Embedding cache, one per turn: clear_embedding_cache() gives the calling context a fresh
+        # dict, so concurrent turns on a shared Cortex (server sessions) never see or wipe each
+        # other's entries. Calls outside any turn fall back to the instance-wide dict.
         self._embedding_cache = {}
+        self._turn_embeddings = contextvars.ContextVar(f"turn_embeddings_{id(self)}", default=None)
 
-        # Initialize local embeddings if needed
+        # Local embedding model loads in the background; the first embed() waits for it
         self._local_embedder = None
+        self._embedder_ready = threading.Event()
         if self.embed_provider == "local":
-            self._init_local_embeddings()
+            threading.Thread(target=self._init_local_embeddings, name="embed-model-load", daemon=True).start()
+        else:
+            self._embedder_ready.set()
 
-        logger.info(f"Initializing runtime interfaces with provider: {self.provider}")
-        logger.info(f"Chat model: {self.chat_model} | Embed model: {self.embed_model} (via {self.embed_provider})")
+        logger.info("Initializing runtime interfaces with provider: %s", self.provider)
+        logger.info("Chat model: %s | Embed model: %s (via %s)", self.chat_model, self.embed_model, self.embed_provider)
         
-        # Optional endpoint verification (can be skipped via env var)
+        # Optional endpoint verification (can be skipped via env var); probes run in the
+        # background and only log, so they never hold up startup
         skip_verification = os.getenv("SKIP_ENDPOINT_VERIFICATION", "false").lower() in ["true", "1", "yes"]
         if not skip_verification:
-            self._verify_endpoints()
+            threading.Thread(target=self._verify_endpoints, name="endpoint-probe", daemon=True).start()
         else:
             logger.info("Skipping endpoint verification (SKIP_ENDPOINT_VERIFICATION=true)")
 
     # ------------------------------------------------------------
-    # Local Embeddings (Sentence Transformers fallback)
+    # Local Embeddings (sentence-transformers or ONNX Runtime, micro-batched)
     # ------------------------------------------------------------
     def _init_local_embeddings(self):
-        """Initialize local sentence-transformers model for embeddings."""
+        """Initialize the local embedding engine (LOCAL_EMBED_ENGINE) and its worker pool."""
+        start = time.perf_counter()
+        engine = os.getenv("LOCAL_EMBED_ENGINE", "sentence-transformers")
         try:
-            from sentence_transformers import SentenceTransformer
-            logger.info(f"Loading local embedding model: {self.embed_model}")
-            self._local_embedder = SentenceTransformer(self.embed_model)
-            logger.info(f"Local embeddings ready (dimension: {self._local_embedder.get_sentence_embedding_dimension()})")
-        except ImportError:
-            logger.warning("sentence-transformers not installed. Install with: pip install sentence-transformers")
+            from local_embedder import LocalEmbedder
+            logger.info("Loading local embedding model: %s (engine: %s)", self.embed_model, engine)
+            self._local_embedder = LocalEmbedder(self.embed_model, engine=engine)
+            logger.info("Local embeddings ready (dimension: %s, %d %s worker(s))",
+                        self._local_embedder.dimension, self._local_embedder.workers, self._local_embedder.pool_kind)
+        except ImportError as e:
+            if engine == "onnx":
+                logger.warning("ONNX embedding engine unavailable (%s). Install with: pip install onnxruntime tokenizers huggingface_hub", e)
+            else:
+                logger.warning("sentence-transformers not installed. Install with: pip install sentence-transformers")
             logger.warning("Falling back to dummy embeddings (not recommended for production)")
             self._local_embedder = None
         except Exception as e:
-            logger.error(f"Failed to load local embedding model: {e}")
+            logger.error("Failed to load local embedding model: %s", e)
             self._local_embedder = None
+        finally:
+            self._embedder_ready.set()
+            record_startup("embedding_model", time.perf_counter() - start)
+
+    @property
+    def embeddings_ready(self):
+        """False while a local embedding model is still loading."""
+        return self._embedder_ready.is_set()
+
+    def embedding_dimension(self):
+        """Vector size this Cortex produces (waits for a local model that is still loading)."""
+        if self.embed_provider == "local":
+            self._embedder_ready.wait()
+            if self._local_embedder:
+                return self._local_embedder.dimension
+            return 384  # all-MiniLM-L6-v2 default
+        if self.embed_dimensions:
+            return self.embed_dimensions  # OpenAI text-embedding-3 shortened output
+        return 3072  # OpenAI text-embedding-3-large
 
     # ------------------------------------------------------------
     # Endpoint Verification
@@ -184,9 +313,16 @@ class Cortex:
 
     def _verify_endpoints(self):
         """Simple ping check for chat and embedding endpoints (provider-aware)."""
+        start = time.perf_counter()
+        try:
+            self._probe_endpoints()
+        finally:
+            record_startup("endpoint_probes", time.perf_counter() - start)
+
+    def _probe_endpoints(self):
         chat_url = f"{self.chat_base}/chat/completions"
 
-        logger.debug(f"Probing chat endpoint ({self.provider}): {chat_url}")
+        logger.debug("Probing chat endpoint (%s): %s", self.provider, chat_url)
         try:
             payload = {
                 "model": self.chat_model,
@@ -194,51 +330,172 @@ class Cortex:
                 "temperature": 0.0
             }
             headers = self._auth_headers()
-            r = requests.post(chat_url, headers=headers, json=payload, timeout=5)
+            r = self._http.post(chat_url, headers=headers, json=payload, timeout=5)
             if r.status_code == 200:
-                logger.info(f"Chat endpoint confirmed at {chat_url}")
+                logger.info("Chat endpoint confirmed at %s", chat_url)
                 self.chat_endpoint = chat_url
             else:
-                logger.warning(f"Chat check failed → {r.status_code}")
+                logger.warning("Chat check failed → %s", r.status_code)
         except Exception as e:
-            logger.error(f"Chat probe failed → {e}")
+            logger.error("Chat probe failed → %s", e)
 
         # Skip embedding endpoint check if using local embeddings
         if self.embed_provider == "local":
-            logger.info(f"Using local embeddings: {self.embed_model}")
+            logger.info("Using local embeddings: %s", self.embed_model)
             return
 
         embed_url = f"{self.embed_base}/embeddings"
-        logger.debug(f"Probing embedding endpoint ({self.embed_provider}): {embed_url}")
+        logger.debug("Probing embedding endpoint (%s): %s", self.embed_provider, embed_url)
         try:
             payload = {"model": self.embed_model, "input": "ping"}
+            if self.embed_dimensions:
+                payload["dimensions"] = self.embed_dimensions
             headers = self._auth_headers(for_embeddings=True)
-            r = requests.post(embed_url, headers=headers, json=payload, timeout=5)
+            r = self._http.post(embed_url, headers=headers, json=payload, timeout=5)
             if r.status_code == 200:
-                logger.info(f"Embeddings active at {embed_url}")
+                logger.info("Embeddings active at %s", embed_url)
             else:
-                logger.warning(f"Embedding check failed → {r.status_code}")
+                logger.warning("Embedding check failed → %s", r.status_code)
         except Exception as e:
-            logger.error(f"Embedding probe failed → {e}")
+            logger.error("Embedding probe failed → %s", e)
 
     # ------------------------------------------------------------
     # Chat Generation
     # ------------------------------------------------------------
-    def chat(self, messages, temperature=0.7):
-        """Send conversation messages to the OpenAI chat model with retry logic."""
+    def chat(self, messages, temperature=0.7, response_format=None, model=None):
+        """Send conversation messages to the OpenAI chat model with retry logic (model overrides chat_model)."""
+        return self._chat(messages, temperature, response_format, model)[0]
+
+    def _chat(self, messages, temperature=0.7, response_format=None, model=None):
+        """chat(), also returning the model that answered (the routed endpoint's, with LLM_ENDPOINTS)."""
         url = getattr(self, "chat_endpoint", f"{self.chat_base}/chat/completions")
-        headers = self._auth_headers()
-        payload = {"model": self.chat_model, "messages": messages, "temperature": temperature}
+        override = model
+        model = model or self.chat_model
+        payload = {"model": model, "messages": messages, "temperature": temperature}
+        if response_format:
+            payload["response_format"] = response_format
+
+        with tracer.span("llm.chat", model=model):
+            try:
+                resp, model = self._post_chat(url, payload, override)
+                if response_format and self._rejects_response_format(resp):
+                    # Provider/model without structured outputs: stop asking and resend as text,
+                    # with the text-mode prefixes (section headers) the parser needs
+                    logger.warning("Chat API rejected response_format (%s); disabling STRUCTURED_OUTPUT", resp.text[:200])
+                    self.structured_output = False
+                    self._apply_prefixes()
+                    payload.pop("response_format")
+                    payload["messages"] = self._text_mode_messages(messages)
+                    tracer.set(structured_fallback=True)
+                    resp, model = self._post_chat(url, payload, override)
+                if resp.status_code != 200:
+                    logger.warning("Chat API error: %s → %s", resp.status_code, resp.text)
+                    tracer.set(status=resp.status_code)
+                    return {"error": resp.text}, model
+                data = resp.json()
+                self._record_usage(data.get("usage"))
+                return data, model
+            except Exception as e:
+                logger.error("Chat request failed → %s", e)
+                tracer.set(error=str(e)[:200])
+                return {"error": str(e)}, model
 
+    def _post_chat(self, url, payload, override=None):
+        """
+        POST a chat payload: through the router when configured, else the single
+        provider with retries. Returns (response, model that answered); routed
+        endpoints use their own model unless the caller passed an override.
+        """
+        if self.router is None:
+            # Only the single provider needs the global key; routed endpoints send their own
+            headers = self._auth_headers()
+            resp = _retry_with_backoff(lambda: self._http.post(url, headers=headers, json=payload, timeout=30))
+            return resp, payload["model"]
         try:
-            resp = _retry_with_backoff(lambda: requests.post(url, headers=headers, json=payload, timeout=30))
-            if resp.status_code != 200:
-                logger.warning(f"Chat API error: {resp.status_code} → {resp.text}")
-                return {"error": resp.text}
-            return resp.json()
-        except Exception as e:
-            logger.error(f"Chat request failed → {e}")
-            return {"error": str(e)}
+            resp, endpoint, info = self.router.post(payload, model=override)
+        except RouteError as e:
+            if e.response is None:
+                raise
+            resp, endpoint, info = e.response, None, {}
+        finally:
+            self.router.publish_metrics()
+        if endpoint is not None:
+            tracer.set(endpoint=endpoint.name, model=info["model"])
+        if info.get("failovers"):
+            tracer.add("router_failovers", info["failovers"])
+        if info.get("hedged"):
+            tracer.add("router_hedges")
+            if info.get("hedge_won"):
+                tracer.add("router_hedge_wins")
+        return resp, info.get("model") or payload["model"]
+
+    @staticmethod
+    def _record_usage(usage):
+        """Attach provider token counts to the active span (and the turn)."""
+        if not usage:
+            return
+        tracer.add("llm_calls")
+        for key in ("prompt_tokens", "completion_tokens"):
+            if usage.get(key) is not None:
+                tracer.add(key, int(usage[key]))
+        # OpenAI/OpenRouter: prompt_tokens_details.cached_tokens; Anthropic-style: cache_read_input_tokens
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or usage.get("cache_read_input_tokens")
+        if cached:
+            tracer.add("cached_tokens", int(cached))
+
+    def _build_prefixes(self, vocab, structured):
+        json_note = [JSON_OUTPUT_NOTE.strip()] if structured else []
+        # QUESTIONS is a text section; the strict JSON schemas have no field for it
+        question_note = [QUESTION_INSTRUCTION.strip()] if self.curiosity and not structured else []
+        return {
+            "reflect": "\n\n".join([SYSTEM_PROMPT.strip(), vocab, MEMORY_RECALL_INSTRUCTION.strip()] + question_note + json_note),
+            "respond": "\n\n".join([SYSTEM_PROMPT.strip(), vocab, FINAL_RESPONSE_INSTRUCTION.strip(), STRICT_OUTPUT_EXAMPLE.strip()] + json_note),
+            "single_pass": "\n\n".join([SYSTEM_PROMPT.strip(), vocab, SINGLE_PASS_INSTRUCTION.strip()] + question_note + json_note),
+        }
+
+    def _apply_prefixes(self):
+        """Point the reflect/respond/single_pass prefixes at the set for the current output mode."""
+        prefixes = self._json_prefixes if self.structured_output else self._text_prefixes
+        self.reflect_prefix = prefixes["reflect"]
+        self.respond_prefix = prefixes["respond"]
+        self.single_pass_prefix = prefixes["single_pass"]
+        self.respond_prefix_tokens = self.token_counter.count(self.respond_prefix)
+        self.single_pass_prefix_tokens = self.token_counter.count(self.single_pass_prefix)
+
+    def _text_mode_messages(self, messages):
+        """Messages with any JSON-mode system prefix swapped for its text-mode counterpart."""
+        swap = {self._json_prefixes[k]: self._text_prefixes[k] for k in self._json_prefixes}
+        out = []
+        for m in messages:
+            content = m.get("content")
+            if m.get("role") == "system":
+                if isinstance(content, str):
+                    content = swap.get(content, content)
+                elif isinstance(content, list):
+                    content = [
+                        {**part, "text": swap.get(part["text"], part["text"])} if isinstance(part, dict) and "text" in part else part
+                        for part in content
+                    ]
+            out.append({**m, "content": content})
+        return out
+
+    @staticmethod
+    def _rejects_response_format(resp):
+        """A 400 that is about structured outputs (not context length, a bad message, ...)."""
+        if resp.status_code != 400:
+            return False
+        body = (resp.text or "").lower()
+        return "response_format" in body or "json_schema" in body
+
+    def _with_prefix(self, prefix, user_content):
+        """Stable system prefix followed by the per-turn user message."""
+        system_content = prefix
+        if self.prompt_cache_control:
+            system_content = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+        return [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": user_content},
+        ]
 
     # ------------------------------------------------------------
     # Embeddings (OpenAI Only)
@@ -246,6 +503,9 @@ class Cortex:
     def embed(self, text: str, cache_key: str = None):
         """
         Generate embeddings using OpenAI API or local sentence-transformers with retry logic.
+
+        Returns a contiguous read-only float32 NumPy array; it is only turned into
+        a list where qdrant-client serializes it for the wire.
         
         Args:
             text: Text to embed
@@ -253,253 +513,251 @@ class Cortex:
                       Enables reuse of embeddings within the same turn
         """
         # Check cache first
-        if cache_key and cache_key in self._embedding_cache:
-            logger.debug(f"Using cached embedding for: {cache_key[:50]}...")
-            return self._embedding_cache[cache_key]
-        
+        cache = self._turn_cache()
+        if cache_key and cache_key in cache:
+            logger.debug("Using cached embedding for: %s...", cache_key[:50])
+            tracer.add("embed_cache_hits")
+            return cache[cache_key]
+
+        with tracer.span("embed", provider=self.embed_provider):
+            tracer.add("embeddings")
+            return self._embed_uncached(text, cache_key)
+
+    def _embed_uncached(self, text, cache_key=None):
         if self.embed_provider == "local":
-            # Use local embeddings
+            # Use local embeddings (blocks only if the model is still loading)
+            self._embedder_ready.wait()
             if self._local_embedder:
                 try:
-                    embedding = self._local_embedder.encode(text, convert_to_numpy=True).tolist()
+                    # Concurrent callers are merged into one batched encode
+                    embedding = as_vector(self._local_embedder.embed(text))
                     # Cache the result
                     if cache_key:
-                        self._embedding_cache[cache_key] = embedding
+                        self._turn_cache()[cache_key] = embedding
                     return embedding
                 except Exception as e:
-                    logger.warning(f"Local embedding failed: {e}")
+                    logger.warning("Local embedding failed: %s", e)
                     # Fallback to dummy zero vector (should match expected dimension)
-                    return [0.0] * 384  # all-MiniLM-L6-v2 default dim
+                    return as_vector(np.zeros(384))  # all-MiniLM-L6-v2 default dim
             else:
                 # No local embedder available; return dummy
                 logger.warning("No embedding model available, returning dummy vector")
-                return [0.0] * 384
+                return as_vector(np.zeros(384))
         else:
             # Use OpenAI API with retry logic
             headers = self._auth_headers(for_embeddings=True)
             payload = {"model": self.embed_model, "input": text}
+            if self.embed_dimensions:
+                payload["dimensions"] = self.embed_dimensions
+            if self.embed_encoding == "base64":
+                payload["encoding_format"] = "base64"
 
             try:
-                resp = _retry_with_backoff(lambda: requests.post(f"{self.embed_base}/embeddings", headers=headers, json=payload, timeout=30))
+                resp = _retry_with_backoff(lambda: self._http.post(f"{self.embed_base}/embeddings", headers=headers, json=payload, timeout=30))
                 if resp.status_code != 200:
                     raise RuntimeError(f"Embedding error: {resp.text}")
-                embedding = resp.json()["data"][0]["embedding"]
+                embedding = _decode_embedding(resp.json()["data"][0]["embedding"])
                 # Cache the result
                 if cache_key:
-                    self._embedding_cache[cache_key] = embedding
+                    self._turn_cache()[cache_key] = embedding
                 return embedding
             except Exception as e:
-                logger.error(f"Embedding request failed → {e}")
+                logger.error("Embedding request failed → %s", e)
                 raise
     
+    def _turn_cache(self):
+        cache = self._turn_embeddings.get()
+        return self._embedding_cache if cache is None else cache
+
     def clear_embedding_cache(self):
-        """Clear the embedding cache (should be called at the start of each turn)."""
-        self._embedding_cache.clear()
+        """
+        Start a fresh embedding cache for the current turn (should be called at
+        the start of each turn). Only the calling context's cache is replaced;
+        work handed off with contextvars.copy_context() keeps the turn's entries.
+        """
+        self._turn_embeddings.set({})
         logger.debug("Embedding cache cleared")
 
     # ------------------------------------------------------------
     def _extract_sections(self, raw: str):
-        """Parse the LLM output into state, reflection, and keyword sections."""
-        
-        text = raw or ""
-        # FIX: Removing markdown fences first ensures clean regex matching
-        norm = re.sub(r'```.*?```', '', text, flags=re.S).strip()
-
-        # --- REFLECTION ---
-        refl = ""
-        m_refl = re.search(r'REFLECTION\s*:\s*(.+?)(?:\n[A-Z ]{3,}?:|\Z)', norm, flags=re.S | re.I)
-        if m_refl:
-            refl = m_refl.group(1).strip()
-
-        # --- KEYWORDS ---
-        kws = []
-        m_kw = re.search(r'KEYWORDS\s*:\s*(.+?)(?:\n[A-Z ]{3,}?:|\Z)', norm, flags=re.S | re.I)
-        if m_kw:
-            blob = m_kw.group(1).strip()
-            blob = re.sub(r'^\[|\]$', '', blob).strip()
-            parts = re.split(r'[,\n]', blob)
-            kws = [p.strip() for p in parts if p.strip()]
-
-        # --- STATE ---
-        # The returned state will now contain a mixed list of emotive and cognitive states
-        state = {"emotions": []}
-        m_state = re.search(r'STATE\s*:\s*(\{[\s\S]*?\})', norm, flags=re.I)
-        parsed = None
-        if m_state:
-            obj_str = m_state.group(1).strip()
-            # Attempt to parse raw JSON from the model
-            try:
-                parsed = json.loads(obj_str)
-            except Exception:
-                # Basic fix for common errors (like trailing comma)
-                try:
-                    obj_str_fixed = re.sub(r',\s*}', '}', obj_str)
-                    obj_str_fixed = re.sub(r',\s*\]', ']', obj_str_fixed)
-                    parsed = json.loads(obj_str_fixed)
-                except Exception:
-                    parsed = None
-
-        # --- QUESTIONS ---
-        questions = {}
-        m_q = re.search(r'QUESTIONS\s*:\s*(\{[\s\S]*?\})', norm, flags=re.S | re.I)
-        if m_q:
-            q_str = m_q.group(1).strip()
-            try:
-                # Attempt to load the JSON object for the question/reason
-                questions = json.loads(q_str)
-            except Exception as e:
-                print(f"[Cortex.parse] ⚠️ Failed to parse QUESTIONS JSON: {e}")
-                questions = {}
-
-        # FIX: Robust extraction logic for the new 12-key structure (6 emotive, 6 cognitive)
-        def _to_states(d):
-            all_states = []
-            if not isinstance(d, dict):
-                return all_states
-            
-            # Loop 1: Extract 3 Emotive States
-            for i in range(1, 4):
-                n = d.get(f"emo_{i}_name")
-                v = d.get(f"emo_{i}_intensity")
-                if n and v is not None:
-                    try:
-                        all_states.append({"name": str(n), "intensity": float(v), "type": "emotive"})
-                    except Exception:
-                        pass
-            
-            # Loop 2: Extract 3 Cognitive States
-            for i in range(1, 4):
-                n = d.get(f"cog_{i}_name")
-                v = d.get(f"cog_{i}_intensity")
-                if n and v is not None:
-                    try:
-                        all_states.append({"name": str(n), "intensity": float(v), "type": "cognitive"})
-                    except Exception:
-                        pass
-            
-            return all_states
-        
-        if parsed:
-            state["emotions"] = _to_states(parsed) # Note: 'emotions' field now holds ALL states
+        """Parse the LLM output into state, reflection, keyword and question sections."""
+        extracted, ok = parse_sections(raw)
+        if not ok:
+            tracer.add("parse_fallbacks")
+            logger.warning("No valid STATE in model output; using fallback state")
+        return extracted
+
+    def _answering_models(self):
+        """Models a default chat call may be answered by: the chat model, or each routed endpoint's."""
+        if self.router is None:
+            return [self.chat_model]
+        return list(dict.fromkeys(e.resolve() for e in self.router.endpoints))
+
+    def _complete(self, prefix, msg, call, temperature=0.7):
+        """
+        One completion for a reflect/respond/single_pass call.
 
-        # Fallback to prevent UI crash if parsing fails entirely
-        if not state["emotions"]:
-            state["emotions"] = [{"name": "Focus", "intensity": 0.6}]
-            
-        return state, refl, kws, questions
+        Returns (raw_text, extracted): with structured outputs the JSON reply is
+        parsed directly and raw_text is re-rendered in the section layout; otherwise
+        extracted is None and callers parse the text. Calls listed in LLM_CACHE_CALLS
+        are served from the completion cache when the same prompt was seen before.
+        """
+        response_format = json_schema_format(call) if self.structured_output else None
+        messages = self._with_prefix(prefix, msg)
+        raw = None
+        cached = self.completion_cache is not None and call in self.completion_cache_calls
+        if cached:
+            # Keyed on the model that answered, so any model this call could be routed to may serve it
+            for model in self._answering_models():
+                raw = self.completion_cache.get(self.completion_cache.key(model, messages, temperature, response_format))
+                if raw is not None:
+                    break
+            tracer.add("llm_cache_hits" if raw is not None else "llm_cache_misses")
+        if raw is None:
+            raw, model = self._chat(messages, temperature=temperature, response_format=response_format)
+            # Only successful completions are stored; errors retry on the next call
+            if cached and isinstance(raw, dict) and raw.get("choices"):
+                cache_key = self.completion_cache.key(model, messages, temperature, response_format)
+                self.completion_cache.put(cache_key, raw, model=model)
+        raw_text = self._response_text(raw)
+        if response_format is not None:
+            parsed = parse_json_output(raw_text)
+            if parsed is not None:
+                extracted, ok = parsed
+                if not ok:
+                    tracer.add("parse_fallbacks")
+                return render_sections(raw_text), extracted
+        return raw_text, None
 
     # ------------------------------------------------------------
     def feel_and_reflect(self, user_query, turn_id, timestamp):
         """Perform emotional reasoning prior to memory or generation."""
-        msg = (
-            f"{MEMORY_RECALL_INSTRUCTION}\n\n"
-            f"***VALID EMOTIVE STATES***: {', '.join(EMOTIVE_STATES)}\n"
-            f"***VALID COGNITIVE STATES***: {', '.join(COGNITIVE_STATES)}\n\n"
-            f"Time: {timestamp}\nTurn: {turn_id}\nUser: {user_query}"
-        )
-
-        raw = self.chat([{"role": "user", "content": msg}], temperature=0.6)
+        msg = f"Time: {timestamp}\nTurn: {turn_id}\nUser: {user_query}"
 
-        # --- 🔧 FIX: extract text if API returned structured JSON ---
-        if isinstance(raw, dict):
-            try:
-                raw_text = raw["choices"][0]["message"]["content"]
-            except Exception:
-                raw_text = str(raw)
-        else:
-            raw_text = str(raw)
+        raw_text, extracted = self._complete(self.reflect_prefix, msg, "reflect", temperature=0.6)
 
-        print(f"[Cortex.feel_and_reflect] Raw output:\n{raw_text}\n--- End of raw output ---")
+        if config.log_sampled(logger):
+            logger.debug("feel_and_reflect raw output:\n%s\n--- End of raw output ---", raw_text)
 
         try:
-            extracted = self._extract_sections(raw_text)
-
-            # ✅ Handle both 3-value and 4-value return signatures
-            if len(extracted) == 3:
-                state, reflection, keywords = extracted
-                questions = {}
-            elif len(extracted) >= 4:
-                state, reflection, keywords, questions = extracted[:4]
-            else:
-                raise ValueError("Unexpected number of values from _extract_sections()")
-
+            state, reflection, keywords, questions = extracted or self._extract_sections(raw_text)
         except Exception as e:
-            print(f"[💥 FEEL PARSE ERROR] {e}")
-            print(f"[💥 RAW OUTPUT] {raw_text}")
+            logger.error("feel_and_reflect parse error: %s", e)
+            logger.debug("Unparseable reflection output:\n%s", raw_text)
             return None, None
 
         # 🧠 Return standard triple to preserve existing Thalamus interface
         return state, reflection, keywords, questions
 
     # ------------------------------------------------------------
-    def respond(self, user_query, state, reflection, recent_turns, memories):
-        """Compose a context-rich prompt integrating emotion, memory, and continuity."""
-        # NEW: Limit to 3 most recent turns for tighter continuity
-        recent = (recent_turns or [])[-3:]
-        short_context = "\n\n".join([
-            f"User: {t['user_query']}\nHalcyon: {t['response']}"
-            for t in recent
-        ]) or "(no recent turns)"
-
-        memory_context = "\n".join([
-            f"- {m.get('text', str(m))[:300]}" for m in (memories or [])[:20]
-        ]) or "(no relevant memories retrieved)"
-
-        msg = f"""
-[CONVERSATIONAL CONTINUITY]
-{short_context} THESE PAST EXCHANGES SHOULD INFORM YOUR UNDERSTANDING OF THE CURRENT CONTEXT AND TONE.
-
-[MEMORY CONTEXT]
-{memory_context}
-
-[CURRENT STATE (FROM REFLECTION)]
-{json.dumps(state, indent=2)}
-
-[REFLECTION]
-{reflection}
-
-{FINAL_RESPONSE_INSTRUCTION}
-
-***VALID EMOTIVE STATES***: {', '.join(EMOTIVE_STATES)}
-***VALID COGNITIVE STATES***: {', '.join(COGNITIVE_STATES)}
-
-{STRICT_OUTPUT_EXAMPLE}
-
-User query: {user_query}***THIS IS NOT YOUR FIRST OR LAST INTERACTION WITH THE USER. USE ALL OF THE CONTEXT PROVIDED TO RESPOND COHERENTLY AND MAINTAIN CONTINUITY.
-***
-"""
-        messages = [{"role": "user", "content": msg}]
-        raw = self.chat(messages)
+    def _build_context(self, user_query, state, reflection, recent_turns, memories, max_memories, prefix_tokens,
+                       state_label="CURRENT STATE (FROM REFLECTION)", narrative=None):
+        """Budgeted per-turn user message: story so far, recent turns, memories, state, reflection, query."""
+        # NEW: Limit to 3 most recent turns for tighter continuity. They arrive newest-first
+        # (Hippocampus.get_recent_turns); the prompt reads oldest-first, so keep_tail drops the oldest
+        recent = list(reversed((recent_turns or [])[:3]))
+        memories = (memories or [])[:max_memories]
+
+        # Instructions live in the cached system prefix; the budget covers both messages
+        asm = PromptAssembler(self.token_counter, budget=self.prompt_token_budget - prefix_tokens)
+        if narrative:
+            # Older turns folded into a fixed-size summary (narrative.py); the recent turns below follow it
+            asm.add("narrative", "[STORY SO FAR]\n{body}", text=narrative, priority=2,
+                    max_tokens=self.prompt_narrative_tokens)
+        asm.add(
+            "recent_turns",
+            "[CONVERSATIONAL CONTINUITY]\n{body} THESE PAST EXCHANGES SHOULD INFORM YOUR UNDERSTANDING OF THE CURRENT CONTEXT AND TONE.",
+            items=[f"User: {t.get('user_query', '')}\nHalcyon: {t.get('response', '')}" for t in recent],
+            item_sep="\n\n", keep_tail=True, priority=2,
+            item_max_tokens=self.prompt_recent_turn_tokens, empty="(no recent turns)",
+        )
+        asm.add(
+            "memories",
+            "[MEMORY CONTEXT]\n{body}",
+            items=[f"- {m.get('text', str(m))}" for m in memories],  # recall order = relevance order
+            priority=3, item_max_tokens=self.prompt_memory_tokens,
+            empty="(no relevant memories retrieved)",
+        )
+        asm.add("state", f"[{state_label}]\n{{body}}", text=json.dumps(state), required=True)
+        if reflection is not None:
+            asm.add("reflection", "[REFLECTION]\n{body}", text=reflection or "", priority=1)
+        asm.add(
+            "query",
+            "User query: {body}***THIS IS NOT YOUR FIRST OR LAST INTERACTION WITH THE USER. USE ALL OF THE CONTEXT PROVIDED TO RESPOND COHERENTLY AND MAINTAIN CONTINUITY.\n***",
+            text=user_query, required=True,
+        )
+        msg, prompt_report = asm.build()
+        tracer.set(prompt_tokens_budgeted={"system_prefix": prefix_tokens, **{k: v["tokens"] for k, v in prompt_report.items()}})
+        return msg
 
-        # --- unwrap OpenAI or LM Studio dicts into pure text ---
+    @staticmethod
+    def _response_text(raw):
+        """Unwrap OpenAI or LM Studio dicts into pure text."""
         if isinstance(raw, dict):
             try:
-                raw_text = raw["choices"][0]["message"]["content"]
+                return raw["choices"][0]["message"]["content"]
             except Exception:
-                raw_text = str(raw)
-        else:
-            raw_text = str(raw)
+                return str(raw)
+        return str(raw)
 
-        # --- 🧠 Auto-detect and extract structured output ---
-        if "STATE:" in raw_text and "REFLECTION:" in raw_text:
+    def _parse_response(self, raw_text, state, reflection, extracted=None):
+        """Structured STATE/REFLECTION/... output when present, else free text with the given state."""
+        if extracted is None and "STATE:" in raw_text and "REFLECTION:" in raw_text:
             try:
                 extracted = self._extract_sections(raw_text)
-                if len(extracted) == 3:
-                    state_json, reflection_primary, keywords = extracted
-                    questions = {}
-                else:
-                    state_json, reflection_primary, keywords, questions = extracted[:4]
-                return {
-                    "state": state_json,
-                    "reflection": reflection_primary,
-                    "keywords": keywords,
-                    "questions": questions,
-                    "raw": raw_text.strip()
-                }
             except Exception as e:
-                print(f"[Cortex.respond] ⚠️ Section extraction failed: {e}")
-                return {"state": state, "reflection": reflection, "keywords": [], "questions": {}, "raw": raw_text.strip()}
+                logger.warning("Response section extraction failed: %s", e)
+        if extracted is not None:
+            state_json, reflection_primary, keywords, questions = extracted
+            return {
+                "state": state_json,
+                "reflection": reflection_primary,
+                "keywords": keywords,
+                "questions": questions,
+                "raw": raw_text.strip()
+            }
 
         # --- fallback for free text ---
         return {"state": state, "reflection": reflection, "keywords": [], "questions": {}, "raw": raw_text.strip()}
 
+    # ------------------------------------------------------------
+    def respond(self, user_query, state, reflection, recent_turns, memories, max_memories=20, narrative=None):
+        """Compose a context-rich prompt integrating emotion, memory, and continuity."""
+        msg = self._build_context(user_query, state, reflection, recent_turns, memories, max_memories,
+                                  self.respond_prefix_tokens, narrative=narrative)
+        raw_text, extracted = self._complete(self.respond_prefix, msg, "respond")
+        return self._parse_response(raw_text, state, reflection, extracted)
+
+    def reflect_and_respond(self, user_query, turn_id, timestamp, recent_turns, memories, max_memories=20, prior_state=None,
+                            narrative=None):
+        """
+        Single-pass turn: one completion produces STATE, REFLECTION, KEYWORDS and RESPONSE.
+
+        Memories are recalled from the raw query beforehand, so the reflection only
+        shapes the reply (and the committed memory), not what gets recalled.
+        prior_state (usually the last turn's state) stands in for the reflection's state.
+        """
+        query = f"[Time: {timestamp} | Turn: {turn_id}]\n{user_query}"
+        msg = self._build_context(query, prior_state or {}, None, recent_turns, memories, max_memories,
+                                  self.single_pass_prefix_tokens, state_label="PREVIOUS STATE", narrative=narrative)
+        raw_text, extracted = self._complete(self.single_pass_prefix, msg, "single_pass", temperature=0.7)
+        if config.log_sampled(logger):
+            logger.debug("reflect_and_respond raw output:\n%s\n--- End of raw output ---", raw_text)
+        return self._parse_response(raw_text, prior_state or {"emotions": [{"name": "Focus", "intensity": 0.6}]}, "", extracted)
+
+    # ------------------------------------------------------------
+    def fold_narrative(self, summary, turns, model=None):
+        """
+        Fold turns into the running narrative summary (narrative.py, off the turn path).
+
+        Returns the updated summary text, or None if the call failed.
+        """
+        exchanges = "\n\n".join(
+            f"User: {t.get('user_query', '')}\nHalcyon: {t.get('response', '')}" for t in turns
+        )
+        msg = f"[CURRENT SUMMARY]\n{summary or '(none yet)'}\n\n[NEW EXCHANGES]\n{exchanges}"
+        result = self.chat(self._with_prefix(self.narrative_prefix, msg), temperature=0.3, model=model)
+        if "error" in result:
+            return None
+        text = self._response_text(result).strip()
+        return text or None
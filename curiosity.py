@@ -0,0 +1,298 @@
+# ============================================================
+# curiosity.py — Bounded Curiosity Queue with Background Answering
+# ============================================================
+"""
+Questions Halcyon raises while reflecting (the parsed QUESTIONS section)
+are offered here at the end of a turn. The turn only appends them to an
+intake deque; everything else runs on a background worker:
+
+- admission: each question is embedded and compared with the queued and
+  recently answered ones; a near-duplicate (cosine >= dedupe_threshold, or
+  the same normalized text without a Cortex) bumps the existing entry's
+  priority instead of adding a new one;
+- ranking: priority is the turn's strongest state intensity, plus a bonus
+  when the model gave a reason, plus a bonus each time it is asked again;
+- eviction: the queue holds at most `capacity` entries; a new question that
+  outranks the lowest one replaces it, otherwise it is dropped;
+- answering: once no turn has run for `idle_seconds`, the highest-priority
+  queued question is searched against Hippocampus. If the best memory is at
+  least answer_threshold similar it moves to the answered list with those
+  memories; otherwise it stays queued as "open" for the user to pick up.
+
+Entries are plain dicts (question, reason, turn_id, timestamp, reflection,
+keywords, intensity, priority, asked, status, memories), highest priority
+first, so the UI can show them as before.
+"""
+
+import os
+import re
+import time
+import logging
+import datetime
+import threading
+from collections import deque
+
+import numpy as np
+
+from telemetry import metrics
+from turn_buffer import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("curiosity_questions_total", "Curiosity questions offered, by outcome (queued/duplicate/evicted/dropped).")
+metrics.describe("curiosity_resolutions_total", "Curiosity questions checked against memory, by outcome (answered/open).")
+
+# One queue per tenant, shared by every Thalamus (and the UI) on that tenant
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_questions(questions):
+    """Parsed QUESTIONS ({"question", "reason"}, a list of those, or {}) as a list of dicts."""
+    if isinstance(questions, dict):
+        questions = [questions] if questions.get("question") else []
+    elif not isinstance(questions, list):
+        return []
+    out = []
+    for q in questions:
+        if isinstance(q, str):
+            q = {"question": q}
+        if isinstance(q, dict) and str(q.get("question") or "").strip():
+            out.append({"question": str(q["question"]).strip(), "reason": str(q.get("reason") or "").strip()})
+    return out
+
+
+def state_intensity(state, default=0.5):
+    """Strongest emotive/cognitive intensity in a parsed state, or `default`."""
+    found = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if "intensity" in str(key) and isinstance(value, (int, float)):
+                    found.append(float(value))
+                else:
+                    walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(state)
+    return max(found) if found else default
+
+
+class CuriosityQueue:
+    REASON_BONUS = 0.25  # the model said why it wants to know
+    REPEAT_BONUS = 0.1   # asked again (near-duplicate) since it was queued
+
+    def __init__(self, cortex=None, hippocampus=None, tenant_id=None, capacity=20, dedupe_threshold=0.9,
+                 answer_threshold=0.75, idle_seconds=2.0, answered_limit=20):
+        self.cortex = cortex
+        self.hippocampus = hippocampus
+        self.tenant_id = tenant_id
+        self.capacity = max(1, int(capacity))
+        self.dedupe_threshold = float(dedupe_threshold)
+        self.answer_threshold = float(answer_threshold)
+        self.idle_seconds = float(idle_seconds)
+
+        self._items = []                           # queued entries, highest priority first
+        self._vectors = {}                         # id(entry) -> question embedding (None without a Cortex)
+        self._answered = RingBuffer(answered_limit)  # (entry, vector), newest last
+        self._intake = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._last_activity = time.monotonic()
+        self._thread = None
+        self._closed = False
+
+    @classmethod
+    def for_tenant(cls, cortex, hippocampus, tenant_id, **kwargs):
+        """Shared queue for a tenant (created on first use)."""
+        with _REGISTRY_LOCK:
+            queue = _REGISTRY.get(tenant_id)
+            if queue is None:
+                queue = _REGISTRY[tenant_id] = cls(cortex, hippocampus, tenant_id=tenant_id, **kwargs)
+            return queue
+
+    @classmethod
+    def from_env(cls, cortex, hippocampus, tenant_id):
+        return cls.for_tenant(
+            cortex, hippocampus, tenant_id,
+            capacity=int(os.getenv("CURIOSITY_QUEUE_SIZE", "20")),
+            dedupe_threshold=float(os.getenv("CURIOSITY_DEDUPE_THRESHOLD", "0.9")),
+            answer_threshold=float(os.getenv("CURIOSITY_ANSWER_THRESHOLD", "0.75")),
+            idle_seconds=float(os.getenv("CURIOSITY_IDLE_SECONDS", "2")),
+        )
+
+    # ------------------------------------------------------------
+    # Turn path (O(1): no embedding, no search)
+    # ------------------------------------------------------------
+    def offer(self, questions, turn_id=None, reflection="", keywords=None, state=None):
+        """Queue a turn's parsed questions for background admission; returns how many were offered."""
+        parsed = normalize_questions(questions)
+        self.touch()
+        if not parsed:
+            return 0
+        intensity = state_intensity(state)
+        timestamp = datetime.datetime.now().isoformat()
+        for q in parsed:
+            self._intake.append({
+                "question": q["question"],
+                "reason": q["reason"],
+                "turn_id": turn_id,
+                "timestamp": timestamp,
+                "reflection": (reflection or "")[:400],
+                "keywords": list(keywords or []),
+                "intensity": round(intensity, 3),
+                "priority": round(intensity + (self.REASON_BONUS if q["reason"] else 0.0), 3),
+                "asked": 1,
+                "status": "queued",
+                "memories": [],
+            })
+        self._ensure_worker()
+        self._wake.set()
+        return len(parsed)
+
+    def touch(self):
+        """Mark turn activity; answering waits until the session has been idle for idle_seconds."""
+        self._last_activity = time.monotonic()
+
+    # ------------------------------------------------------------
+    # Views (UI)
+    # ------------------------------------------------------------
+    def items(self):
+        with self._lock:
+            return list(self._items)
+
+    def answered(self, n=None):
+        return [entry for entry, _ in self._answered.tail(n)]
+
+    def remove(self, index):
+        with self._lock:
+            if 0 <= index < len(self._items):
+                self._vectors.pop(id(self._items.pop(index)), None)
+                return True
+        return False
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._vectors.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+    def close(self, wait=True):
+        """Stop the worker; questions still in intake are dropped."""
+        self._closed = True
+        self._wake.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    # ------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="curiosity-worker", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(timeout=max(0.05, self.idle_seconds))
+            self._wake.clear()
+            try:
+                while self._intake and not self._closed:
+                    self._admit(self._intake.popleft())
+                while not self._closed and self._idle():
+                    entry = self._next_queued()
+                    if entry is None:
+                        break
+                    self._resolve(entry)
+            except Exception as e:
+                logger.warning("Curiosity worker error: %s", e)
+
+    def _idle(self):
+        return time.monotonic() - self._last_activity >= self.idle_seconds
+
+    def _embed(self, text):
+        if self.cortex is None:
+            return None
+        try:
+            vec = np.asarray(self.cortex.embed(text), dtype=np.float32)
+        except Exception as e:
+            logger.warning("Curiosity embedding failed: %s", e)
+            return None
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm > 0.0 else None
+
+    def _is_duplicate(self, text, vec, other_text, other_vec):
+        if vec is not None and other_vec is not None and len(vec) == len(other_vec):
+            return float(vec @ other_vec) >= self.dedupe_threshold
+        return _SPACE_RE.sub(" ", text.lower()) == _SPACE_RE.sub(" ", other_text.lower())
+
+    def _admit(self, entry):
+        vec = self._embed(entry["question"])
+        text = entry["question"]
+        with self._lock:
+            if any(self._is_duplicate(text, vec, done["question"], v) for done, v in self._answered.tail()):
+                metrics.inc("curiosity_questions_total", outcome="duplicate")
+                return
+            for existing in self._items:
+                if self._is_duplicate(text, vec, existing["question"], self._vectors.get(id(existing))):
+                    existing["asked"] += 1
+                    existing["intensity"] = max(existing["intensity"], entry["intensity"])
+                    existing["priority"] = round(max(existing["priority"], entry["priority"]) + self.REPEAT_BONUS, 3)
+                    self._items.sort(key=lambda e: e["priority"], reverse=True)
+                    metrics.inc("curiosity_questions_total", outcome="duplicate")
+                    return
+            if len(self._items) >= self.capacity:
+                lowest = self._items[-1]
+                if lowest["priority"] >= entry["priority"]:
+                    metrics.inc("curiosity_questions_total", outcome="dropped")
+                    logger.debug("Curiosity queue full; dropped %r", text[:50])
+                    return
+                self._items.pop()
+                self._vectors.pop(id(lowest), None)
+                metrics.inc("curiosity_questions_total", outcome="evicted")
+            self._items.append(entry)
+            self._vectors[id(entry)] = vec
+            self._items.sort(key=lambda e: e["priority"], reverse=True)
+        metrics.inc("curiosity_questions_total", outcome="queued")
+        logger.debug("Queued curiosity (priority %.2f): %s...", entry["priority"], text[:50])
+
+    def _next_queued(self):
+        if self.hippocampus is None:
+            return None
+        with self._lock:
+            return next((e for e in self._items if e["status"] == "queued"), None)
+
+    def _resolve(self, entry):
+        try:
+            hits = self.hippocampus.recall_with_context(
+                entry["question"], n_results=3, search_mode="content", rerank=False, tenant_id=self.tenant_id
+            )
+        except Exception as e:
+            logger.warning("Curiosity recall failed: %s", e)
+            hits = []
+        memories = [
+            {"text": h.get("text"), "similarity": round(1.0 - h.get("distance", 1.0), 3), "timestamp": h.get("timestamp")}
+            for h in hits or []
+        ]
+        best = max((m["similarity"] for m in memories), default=0.0)
+        answered = best >= self.answer_threshold
+
+        with self._lock:
+            index = next((i for i, e in enumerate(self._items) if e is entry), None)
+            if index is None:
+                return  # removed (activated or cleared) meanwhile
+            entry["memories"] = memories
+            entry["status"] = "answered" if answered else "open"
+            if answered:
+                del self._items[index]
+                self._answered.append((entry, self._vectors.pop(id(entry), None)))
+        metrics.inc("curiosity_resolutions_total", outcome="answered" if answered else "open")
+        logger.debug("Curiosity %s (best memory %.2f): %s...", entry["status"], best, entry["question"][:50])
@@ -7,6 +7,8 @@ import queue
 import re
 import uuid
 import datetime
+import logging
+from collections.abc import Mapping
 
 # Import your core modules
 import config  # Load environment from .env early
@@ -15,17 +17,23 @@ from hippocampus import Hippocampus
 from temporal_anchor import TemporalAnchor
 from thalamus import Thalamus
 
+logger = logging.getLogger(__name__)
+
 class HalcyonTkinterUI(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Halcyon Memory Workbench")
         self.geometry("1400x900")
         
-        # Initialize core components
+        # Initialize core components (model load, endpoint probes and Qdrant setup continue in the background)
+        start = time.perf_counter()
         self.cortex = Cortex()
         self.hippo = Hippocampus(self.cortex)
         self.anchor = TemporalAnchor(hippocampus=self.hippo)
         self.thalamus = Thalamus(self.cortex, self.hippo)
+        if self.thalamus.curiosity is not None:
+            # Show (and let the user activate) the questions Thalamus queues
+            self.anchor.curiosity_queue = self.thalamus.curiosity
         
         # Ensure TemporalAnchor uses functional recall
         self.anchor.recall = self.hippo.recall_with_context
@@ -40,7 +48,7 @@ class HalcyonTkinterUI(tk.Tk):
         
         # Start queue checker
         self.after(100, self._check_queue)
-        print("[UI] Tkinter event loop started.")
+        logger.info("Tkinter event loop started (UI ready in %.0f ms).", (time.perf_counter() - start) * 1000.0)
 
     # ========== UI Building ==========
     def _build_ui(self):
@@ -296,7 +304,7 @@ class HalcyonTkinterUI(tk.Tk):
             else:
                 error_msg = f"THALAMUS ERROR: {result['error']}"
                 self._update_text_box(self.response_box, error_msg, clear=True)
-                print(error_msg)
+                logger.error("%s", error_msg)
         except queue.Empty:
             pass
         
@@ -353,7 +361,7 @@ class HalcyonTkinterUI(tk.Tk):
         """Show memory details in detail pane"""
         output = "\n--- MEMORY DETAILS ---\n"
         
-        if isinstance(memory, dict):
+        if isinstance(memory, Mapping):  # dicts and read-only TurnRecords
             # Extract common fields
             query = memory.get('user_query', memory.get('query', 'N/A'))
             reflection = memory.get('reflection', 'N/A')
@@ -410,7 +418,7 @@ class HalcyonTkinterUI(tk.Tk):
              
         except Exception as e:
             self._update_text_box(self.detail_box, f"\n[Pin] ❌ Error: {e}", clear=True)
-            print(f"Pinning Error: {e}")
+            logger.error("Pinning error: %s", e)
 
 
     def _inject_memory_workspace(self):
@@ -443,7 +451,7 @@ class HalcyonTkinterUI(tk.Tk):
 
             except Exception as e:
                 self._update_detail_box(f"\n[Inject] ❌ Error during memory injection: {e}", clear=True)
-                print(f"Injection Error: {e}")
+                logger.error("Injection error: %s", e)
 
 
     def _activate_curiosity_workspace(self):
@@ -7,49 +7,182 @@ import time
 import uuid
 import os
 import json
+import re
 import hashlib
+import math
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+from reranker import Reranker
+from recall_cache import RecallCache
+import lexicon
+from telemetry import tracer, metrics, record_startup
+import config
 
 # 💡 QDRANT IMPORTS
 from qdrant_client import QdrantClient, models 
 # Removed: import chromadb
 
+SPARSE_VECTOR_NAME = "lexical"
+RRF_K = 60  # reciprocal rank fusion constant
+TENANT_FIELD = "tenant_id"
+DEFAULT_TENANT = os.getenv("HAL_TENANT_ID", "default")
+
+logger = logging.getLogger(__name__)
+
+
+def tenant_log_root(tenant_id=None, base="runtime_logs"):
+    """
+    Turn-log root for a tenant; the default tenant keeps the legacy flat layout.
+    The directory is a readable slug plus a hash of the raw id, so ids that
+    slug alike ("a/b", "a b", "a_b") never share logs or narrative state.
+    """
+    tenant_id = tenant_id or DEFAULT_TENANT
+    if tenant_id == DEFAULT_TENANT:
+        return base
+    raw = str(tenant_id)
+    slug = re.sub(r"[^A-Za-z0-9_.-]", "_", raw).strip(".")[:64] or "_"
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(base, "tenants", f"{slug}-{digest}")
+
+
+def _wire_vector(vec):
+    """
+    Float list for a search query vector. qdrant-client converts PointStruct
+    vectors itself, but its gRPC path passes (name, vector) tuple members through
+    unconverted, and local mode normalizes bare NumPy query vectors in place,
+    which fails on the read-only arrays Cortex.embed returns.
+    """
+    return vec.tolist() if isinstance(vec, np.ndarray) else vec
+
+
 class Hippocampus:
     def __init__(self, cortex):
         self.cortex = cortex
         self.last_commit_time = 0
+        # Commits closer together than this are briefly delayed (0 disables)
+        self.commit_min_interval = float(os.getenv("COMMIT_MIN_INTERVAL", "3"))
+        self.default_tenant = DEFAULT_TENANT
+
+        # Per-tenant in-memory index of recent turns (seeded from logs on first read)
+        self.recent_turn_index_size = int(os.getenv("RECENT_TURN_INDEX_SIZE", "20"))
+        self._recent_turns = {}
+        self._recent_lock = threading.Lock()
+
+        # Optional cross-encoder rerank stage (loaded lazily on first use)
+        self.use_reranker = os.getenv("USE_RERANKER", "false").lower() in ["true", "1", "yes"]
+        self.rerank_overfetch = max(1, int(os.getenv("RERANK_OVERFETCH", "3")))
+        self.rerank_top_k = int(os.getenv("RERANK_TOP_K", "0"))  # 0 = keep n_results
+        self._reranker = None
+
+        # Adaptive recall policy (see recall_adaptive)
+        self.recall_min_results = int(os.getenv("RECALL_MIN_RESULTS", "2"))
+        self.recall_max_results = int(os.getenv("RECALL_MAX_RESULTS", "25"))
+        self.recall_initial_fetch = int(os.getenv("RECALL_INITIAL_FETCH", "8"))
+        self.recall_relative_threshold = float(os.getenv("RECALL_RELATIVE_THRESHOLD", "0.6"))
+        self.recall_knee_ratio = float(os.getenv("RECALL_KNEE_RATIO", "0.8"))
+        self.recall_token_budget = int(os.getenv("RECALL_TOKEN_BUDGET", "1500"))
+        self.last_recall_stats = {}
+
+        # Recall result cache (invalidated by every write to the collection)
+        self.recall_cache_precision = int(os.getenv("RECALL_CACHE_PRECISION", "3"))
+        self.recall_cache = None
+        if os.getenv("RECALL_CACHE", "true").lower() in ["true", "1", "yes"]:
+            self.recall_cache = RecallCache(
+                max_entries=int(os.getenv("RECALL_CACHE_SIZE", "256")),
+                ttl_seconds=float(os.getenv("RECALL_CACHE_TTL", "300")),
+            )
+
+        # Single unified collection with named vectors
+        self.collection_name = os.getenv("QDRANT_COLLECTION", "hal_memory")
+        self.use_sparse_vectors = os.getenv("USE_SPARSE_VECTORS", "false").lower() in ["true", "1", "yes"]
+
+        # Qdrant connection and collection checks run on first use (see `client`);
+        # QDRANT_PREWARM starts them in the background so the first turn doesn't wait
+        self._client = None
+        self._client_lock = threading.Lock()
+        if os.getenv("QDRANT_PREWARM", "true").lower() in ["true", "1", "yes"]:
+            threading.Thread(target=self._prewarm, name="qdrant-prewarm", daemon=True).start()
 
+    # --------------------------------------------------------
+    # INTERNAL: lazy Qdrant connection + collection setup
+    # --------------------------------------------------------
+    @property
+    def client(self):
+        client = self._client
+        if client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._connect()
+                client = self._client
+        return client
+
+    @property
+    def connected(self):
+        """True once the Qdrant connection and collection checks have completed."""
+        return self._client is not None
+
+    def _prewarm(self):
+        try:
+            self.client
+        except Exception as e:
+            # Left unset; the next access retries and raises to the caller
+            logger.warning("Background Qdrant setup failed: %s", e)
+
+    def _connect(self):
+        """Connect to Qdrant and make sure the collection (and its indexes) exist."""
+        start = time.perf_counter()
         # --- QDRANT CLIENT SETUP (configurable via env) ---
         qdrant_host = os.getenv("QDRANT_HOST", "localhost")
         qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
-        
-        print(f"[Hippo.init] Connecting to Qdrant at {qdrant_host}:{qdrant_port}")
-        self.client = QdrantClient(host=qdrant_host, port=qdrant_port)
-
-        # Single unified collection with named vectors
-        self.collection_name = os.getenv("QDRANT_COLLECTION", "hal_memory")
-        
-        # Determine vector size from the embedding provider
-        if self.cortex.embed_provider == "local" and self.cortex._local_embedder:
-            VECTOR_SIZE = self.cortex._local_embedder.get_sentence_embedding_dimension()
-        elif self.cortex.embed_provider == "local":
-            VECTOR_SIZE = 384  # all-MiniLM-L6-v2 default
+        # QDRANT_LOCATION=":memory:" (or a directory) runs Qdrant in-process instead
+        qdrant_location = os.getenv("QDRANT_LOCATION")
+
+        if qdrant_location == ":memory:":
+            logger.info("Using in-process Qdrant (in-memory)")
+            client = QdrantClient(location=":memory:")
+        elif qdrant_location:
+            logger.info("Using in-process Qdrant at %s", qdrant_location)
+            client = QdrantClient(path=qdrant_location)
         else:
-            VECTOR_SIZE = 3072  # OpenAI text-embedding-3-large
-        
-        print(f"[Hippo.init] Using vector size: {VECTOR_SIZE}")
-        
+            logger.info("Connecting to Qdrant at %s:%s", qdrant_host, qdrant_port)
+            client = QdrantClient(host=qdrant_host, port=qdrant_port)
+
         # Check if dual vectors are enabled
         use_dual_vectors = os.getenv("USE_DUAL_VECTORS", "false").lower() in ["true", "1", "yes"]
+
+        # Sparse lexical vector (BM25-style, IDF applied by Qdrant) over keywords + fused_text
+        sparse_config = (
+            {SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+            if self.use_sparse_vectors else None
+        )
         
         # Create collection with named vectors for multiple search strategies
         try:
-            self.client.get_collection(self.collection_name)
-            print(f"[Hippo.init] Collection '{self.collection_name}' already exists")
+            info = client.get_collection(self.collection_name)
+            logger.info("Collection '%s' already exists", self.collection_name)
+            if self.use_sparse_vectors and SPARSE_VECTOR_NAME not in (info.config.params.sparse_vectors or {}):
+                # Sparse vectors can be added to an existing collection; older points simply lack them
+                try:
+                    client.update_collection(
+                        collection_name=self.collection_name,
+                        sparse_vectors_config=sparse_config
+                    )
+                    logger.info("Added sparse vector '%s' to existing collection", SPARSE_VECTOR_NAME)
+                except Exception as e:
+                    logger.warning("Could not add sparse vectors (%s); lexical search disabled", e)
+                    self.use_sparse_vectors = False
         except:
-            # Collection doesn't exist, create with appropriate vector config
+            # Collection doesn't exist, create with appropriate vector config;
+            # only now is the vector size needed (a local model may still be loading)
+            VECTOR_SIZE = self.cortex.embedding_dimension()
+            logger.info("Using vector size: %s", VECTOR_SIZE)
             if use_dual_vectors:
                 # Dual vector mode: named vectors for content and emotional search
-                self.client.create_collection(
+                client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config={
                         "content": models.VectorParams(
@@ -60,32 +193,71 @@ class Hippocampus:
                             size=VECTOR_SIZE,
                             distance=models.Distance.COSINE
                         )
-                    }
+                    },
+                    sparse_vectors_config=sparse_config
                 )
-                print(f"[Hippo.init] Created collection '{self.collection_name}' with dual named vectors (content + emotional)")
+                logger.info("Created collection '%s' with dual named vectors (content + emotional)", self.collection_name)
             else:
                 # Single vector mode: simple default vector
-                self.client.create_collection(
+                client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=models.VectorParams(
                         size=VECTOR_SIZE,
                         distance=models.Distance.COSINE
-                    )
+                    ),
+                    sparse_vectors_config=sparse_config
                 )
-                print(f"[Hippo.init] Created collection '{self.collection_name}' with single vector (faster mode)")
+                logger.info("Created collection '%s' with single vector (faster mode)", self.collection_name)
+
+        self._ensure_tenant_index(client)
 
         mode = "dual-vector" if use_dual_vectors else "single-vector"
-        print(f"[Hippo.init] ✅ Connected to Qdrant in {mode} mode.")
+        if self.use_sparse_vectors:
+            mode += " + sparse lexical"
+        logger.info("Connected to Qdrant in %s mode.", mode)
+        record_startup("qdrant", time.perf_counter() - start)
+        return client
+
+    # --------------------------------------------------------
+    # INTERNAL: tenant isolation (payload index + mandatory filter)
+    # --------------------------------------------------------
+    def _ensure_tenant_index(self, client):
+        """Index tenant_id so per-tenant filtered search stays fast as the collection grows."""
+        try:
+            # is_tenant co-locates each tenant's points on disk (Qdrant >= 1.11)
+            schema = models.KeywordIndexParams(type="keyword", is_tenant=True)
+        except Exception:
+            schema = models.PayloadSchemaType.KEYWORD
+        try:
+            client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=TENANT_FIELD,
+                field_schema=schema
+            )
+        except Exception as e:
+            logger.warning("Could not create tenant payload index: %s", e)
+
+    def _tenant_filter(self, tenant_id):
+        """Filter every search must carry; legacy points without tenant_id belong to the default tenant."""
+        match = models.FieldCondition(key=TENANT_FIELD, match=models.MatchValue(value=tenant_id))
+        if tenant_id != self.default_tenant:
+            return models.Filter(must=[match])
+        return models.Filter(should=[
+            match,
+            models.IsEmptyCondition(is_empty=models.PayloadField(key=TENANT_FIELD))
+        ])
 
     # --------------------------------------------------------
     # INTERNAL: build a deterministic id for a fused memory
     # --------------------------------------------------------
-    def _stable_id_for_fused_text(self, fused_text: str) -> str:
+    def _stable_id_for_fused_text(self, fused_text: str, tenant_id=None) -> str:
         """
         Return a deterministic UUID for a given fused_text.
         This ensures identical input always maps to the same Qdrant point ID.
+        Non-default tenants are salted so identical text never collides across tenants.
         """
-        import uuid, hashlib
+        if tenant_id and tenant_id != self.default_tenant:
+            fused_text = f"{tenant_id}\x00{fused_text}"
         digest = hashlib.sha1(fused_text.encode("utf-8")).digest()
         # Take the first 16 bytes (128 bits) and cast to a valid UUID format
         return str(uuid.UUID(bytes=digest[:16]))
@@ -102,48 +274,140 @@ class Hippocampus:
                 unique[key] = m
         return list(unique.values())
 
+    # --------------------------------------------------------
+    # INTERNAL: drop cached recall results after a write
+    # --------------------------------------------------------
+    def _invalidate_recall_cache(self):
+        if self.recall_cache is not None:
+            self.recall_cache.invalidate()
+
+    # --------------------------------------------------------
+    # INTERNAL: lazily construct the reranker
+    # --------------------------------------------------------
+    def _get_reranker(self):
+        if self._reranker is None:
+            self._reranker = Reranker()
+        return self._reranker
+
     # ============================================================
     # recall_with_context (Qdrant Search with Named Vectors)
     # ============================================================
-    def recall_with_context(self, query, n_results=None, search_mode="hybrid"):
+    def recall_with_context(self, query, n_results=None, search_mode=None, rerank=None, tenant_id=None):
         """
         Search memories using named vectors.
         
         Args:
             query: Search query text
             n_results: Maximum results to return (default: 25)
-            search_mode: "content" (factual), "emotional" (feelings), or "hybrid" (both)
+            search_mode: "content" (factual), "emotional" (feelings), "hybrid" (both),
+                         "lexical" (sparse keyword match) or "fusion" (dense + sparse,
+                         reciprocal rank fusion). Default: RECALL_SEARCH_MODE env or "hybrid"
+            rerank: Run the cross-encoder rerank stage over over-fetched
+                    candidates (default: USE_RERANKER env)
+            tenant_id: Tenant whose memories are searched (default: HAL_TENANT_ID env)
         
         Returns:
             List of weighted memory dictionaries
         """
         n_results = n_results or getattr(self, "MAX_MEMORIES", 25)
+        search_mode = search_mode or os.getenv("RECALL_SEARCH_MODE", "hybrid")
+        tenant_id = tenant_id or self.default_tenant
+        rerank = self.use_reranker if rerank is None else rerank
+        # Over-fetch candidates so the reranker has something to choose from
+        fetch_limit = n_results * self.rerank_overfetch if rerank else n_results
         now = datetime.datetime.now()
         
         # Check if dual vectors are enabled
         use_dual_vectors = os.getenv("USE_DUAL_VECTORS", "false").lower() in ["true", "1", "yes"]
-        
+        use_dense = search_mode != "lexical"
+        use_sparse = search_mode in ["lexical", "fusion"]
+        if use_sparse and not self.use_sparse_vectors:
+            logger.warning("Sparse vectors disabled (USE_SPARSE_VECTORS=false); using dense search only")
+            use_sparse = False
+            use_dense = True
+
         # Generate embeddings for the query with caching
-        content_vec = self.cortex.embed(query, cache_key=f"content:{query}")
+        content_vec = self.cortex.embed(query, cache_key=f"content:{query}") if use_dense else None
         
         # For emotional vector, prepend emotional context to the query (only if dual vectors enabled)
-        if use_dual_vectors:
+        if use_dual_vectors and use_dense:
             emotional_query = f"[Emotional context] How does this make me feel? {query}"
             emotional_vec = self.cortex.embed(emotional_query, cache_key=f"emotional:{query}")
         else:
             emotional_vec = None
 
-        merged_rows = []
+        # --- RESULT CACHE (raw hits; weights recomputed below) ---
+        cache_key = None
+        if self.recall_cache is not None:
+            cache_key = self._recall_cache_key(query, content_vec, emotional_vec, search_mode, fetch_limit, tenant_id)
+        cache_version = self.recall_cache.version if cache_key else None
+        ranked_hits = self.recall_cache.get(cache_key) if cache_key else None
+        cache_hit = ranked_hits is not None
+        if cache_key:
+            tracer.add("recall_cache_hits" if cache_hit else "recall_cache_misses")
+            metrics.set_gauge("recall_cache_hit_ratio", self.recall_cache.hit_ratio)
+        if not cache_hit:
+            with tracer.span("qdrant.search", mode=search_mode, limit=fetch_limit):
+                ranked_hits, search_ok = self._search_hits(
+                    query, content_vec, emotional_vec, search_mode, fetch_limit,
+                    use_dual_vectors, use_dense, use_sparse, self._tenant_filter(tenant_id)
+                )
+                tracer.add("qdrant_hits", sum(len(hits) for _, hits in ranked_hits))
+            if cache_key and search_ok:
+                self.recall_cache.put(cache_key, ranked_hits, version=cache_version)
+
+        ranked_lists = [self._weigh_hits(hits, source, now) for source, hits in ranked_hits]
+
+        if use_sparse:
+            # Sparse scores are unbounded, so rank positions (not raw scores) drive the weight
+            merged_rows = self._fuse_ranked_lists(ranked_lists)
+        else:
+            merged_rows = [row for rows in ranked_lists for row in rows]
+
+        # Deduplicate and rank
+        merged_rows = self._dedupe_memories(merged_rows)
+        merged_rows.sort(key=lambda m: m["weight"], reverse=True)
+
+        reranked = False
+        if rerank and len(merged_rows) > 1:
+            with tracer.span("rerank", candidates=min(len(merged_rows), fetch_limit)):
+                merged_rows, reranked = self._get_reranker().rerank(query, merged_rows[:fetch_limit], top_k=n_results)
+            if reranked and self.rerank_top_k:
+                # Cross-encoder order is trustworthy enough to send fewer memories downstream
+                n_results = min(n_results, self.rerank_top_k)
+        merged_rows = merged_rows[:n_results]
+
+        if logger.isEnabledFor(logging.DEBUG):
+            mode_label = f"{search_mode} ({'dual' if use_dual_vectors else 'single'} vector{' + sparse' if use_sparse else ''}{', reranked' if reranked else ''}{', cached' if cache_hit else ''})"
+            logger.debug("Retrieved %d memories via %s search", len(merged_rows), mode_label)
+
+        if merged_rows and config.log_sampled(logger):
+            rule = "─" * 45
+            lines = [rule, f"{'Vector':<12} | {'ID':<8} | {'Weight':<7} | {'Decay':<5} | {'Age(d)':<6} | Text Snippet", rule]
+            for m in merged_rows:
+                snippet = (m['text'] or '')[:60].replace("\n", " ")
+                lines.append(f"{m['source']:<12} | {str(m['id'])[:8]} | {m['weight']:<7.3f} | {m['decay']:<5.2f} | {m['age_days']:<6.2f} | {snippet}")
+            lines.append(rule)
+            logger.debug("Recall results:\n%s", "\n".join(lines))
+
+        return merged_rows
+
+    def _search_hits(self, query, content_vec, emotional_vec, search_mode, fetch_limit,
+                     use_dual_vectors, use_dense, use_sparse, query_filter):
+        """Run the Qdrant searches for a recall; returns ([(source, hits), ...], all_ok)."""
+        ranked_hits = []
+        search_ok = True
 
         # Search using content vector (factual/semantic similarity)
-        if search_mode in ["content", "hybrid"]:
+        if use_dense and search_mode in ["content", "hybrid", "fusion"]:
             try:
                 # Use named vector if dual vectors enabled, otherwise use single vector
                 if use_dual_vectors:
                     content_results = self.client.search(
                         collection_name=self.collection_name,
-                        query_vector=("content", content_vec),
-                        limit=n_results,
+                        query_vector=("content", _wire_vector(content_vec)),
+                        limit=fetch_limit,
+                        query_filter=query_filter,
                         with_payload=True,
                         with_vectors=False
                     )
@@ -151,60 +415,95 @@ class Hippocampus:
                     # Single vector mode - search default vector
                     content_results = self.client.search(
                         collection_name=self.collection_name,
-                        query_vector=content_vec,
-                        limit=n_results,
+                        query_vector=_wire_vector(content_vec),
+                        limit=fetch_limit,
+                        query_filter=query_filter,
                         with_payload=True,
                         with_vectors=False
                     )
-                self._harvest_results(content_results, "content", merged_rows, now)
+                ranked_hits.append(("content", self._harvest_results(content_results)))
             except Exception as e:
-                print(f"[Hippo.recall] ⚠️ Content search failed: {e}")
+                search_ok = False
+                logger.warning("Content search failed: %s", e)
 
         # Search using emotional vector (feeling/tone similarity) - only if dual vectors enabled
-        if use_dual_vectors and search_mode in ["emotional", "hybrid"] and emotional_vec:
+        if use_dual_vectors and search_mode in ["emotional", "hybrid", "fusion"] and emotional_vec is not None:
             try:
                 emotional_results = self.client.search(
                     collection_name=self.collection_name,
-                    query_vector=("emotional", emotional_vec),
-                    limit=n_results,
+                    query_vector=("emotional", _wire_vector(emotional_vec)),
+                    limit=fetch_limit,
+                    query_filter=query_filter,
                     with_payload=True,
                     with_vectors=False
                 )
-                self._harvest_results(emotional_results, "emotional", merged_rows, now)
+                ranked_hits.append(("emotional", self._harvest_results(emotional_results)))
             except Exception as e:
-                print(f"[Hippo.recall] ⚠️ Emotional search failed: {e}")
-
-        # Deduplicate and rank
-        merged_rows = self._dedupe_memories(merged_rows)
-        merged_rows.sort(key=lambda m: m["weight"], reverse=True)
-        merged_rows = merged_rows[:n_results]
-
-        mode_label = f"{search_mode} ({'dual' if use_dual_vectors else 'single'} vector)"
-        print(f"\n[Hippo.recall] ✅ Retrieved {len(merged_rows)} memories via {mode_label} search.")
-
-        if not merged_rows:
-            print("[Hippo.recall] (no matches found)\n")
-            return merged_rows
-
-        print("─────────────────────────────────────────────")
-        print(f"{'Vector':<12} | {'ID':<8} | {'Weight':<7} | {'Decay':<5} | {'Age(d)':<6} | Text Snippet")
-        print("─────────────────────────────────────────────")
-        for m in merged_rows:
-            snippet = (m['text'] or '')[:60].replace("\n", " ")
-            print(f"{m['source']:<12} | {str(m['id'])[:8]} | {m['weight']:<7.3f} | {m['decay']:<5.2f} | {m['age_days']:<6.2f} | {snippet}")
-        print("─────────────────────────────────────────────\n")
+                search_ok = False
+                logger.warning("Emotional search failed: %s", e)
 
-        return merged_rows
-
-    def _harvest_results(self, results, source_label, merged_rows, now):
-        """Helper to process search results and add to merged_rows."""
+        # Search using sparse lexical vector (exact names, rare terms, keywords)
+        if use_sparse:
+            indices, values = lexicon.encode_query(query)
+            if indices:
+                try:
+                    lexical_results = self.client.search(
+                        collection_name=self.collection_name,
+                        query_vector=models.NamedSparseVector(
+                            name=SPARSE_VECTOR_NAME,
+                            vector=models.SparseVector(indices=indices, values=values)
+                        ),
+                        limit=fetch_limit,
+                        query_filter=query_filter,
+                        with_payload=True,
+                        with_vectors=False
+                    )
+                    ranked_hits.append(("lexical", self._harvest_results(lexical_results)))
+                except Exception as e:
+                    search_ok = False
+                    logger.warning("Lexical search failed: %s", e)
+
+        return ranked_hits, search_ok
+
+    def _recall_cache_key(self, query, content_vec, emotional_vec, search_mode, fetch_limit, tenant_id):
+        """Hash of the (rounded) query embeddings plus everything else that shapes the search."""
+        h = hashlib.sha1()
+        for vec in (content_vec, emotional_vec):
+            if vec is not None:
+                # Rounding lets near-identical queries ("hi" / "hi!") share an entry;
+                # hashing the rounded float32 buffer avoids formatting every component
+                # (+ 0.0 folds -0.0 into 0.0 so both round to the same bytes)
+                rounded = np.round(np.asarray(vec, dtype=np.float32), self.recall_cache_precision) + np.float32(0.0)
+                h.update(rounded.tobytes())
+                h.update(b"|")
+        if content_vec is None:
+            # Lexical-only search has no embedding; key on the normalised terms instead
+            h.update(" ".join(sorted(set(lexicon.tokenize(query)))).encode("utf-8"))
+        h.update(f"|{search_mode}|{fetch_limit}|{self.collection_name}|{tenant_id}".encode("utf-8"))
+        return h.hexdigest()
+
+    def _harvest_results(self, results):
+        """Reduce Qdrant points to the raw fields recall needs (cacheable, time-independent)."""
+        hits = []
         for point in results:
+            meta = point.payload or {}
+            hits.append({
+                "id": point.id,
+                "score": point.score,
+                "text": meta.get("fused_text", "Text Unavailable"),
+                "timestamp": meta.get("timestamp"),
+                "manual_weight": meta.get("manual_weight", 1.0),
+            })
+        return hits
+
+    def _weigh_hits(self, hits, source_label, now):
+        """Apply similarity, manual weight and time decay to raw hits."""
+        rows = []
+        for hit in hits:
             # COSINE similarity: higher score = more similar (0 to 1)
             # Convert to distance-like metric for consistent weighting
-            distance = 1.0 - point.score if point.score <= 1.0 else 0.0
-            meta = point.payload or {}
-            mem_id = point.id
-            ts_str = meta.get("timestamp")
+            distance = 1.0 - hit["score"] if hit["score"] <= 1.0 else 0.0
+            ts_str = hit["timestamp"]
 
             try:
                 ts = datetime.datetime.fromisoformat(ts_str)
@@ -214,24 +513,127 @@ class Hippocampus:
                 age_days = 0.0
                 decay = 1.0
 
-            manual_weight = meta.get("manual_weight", 1.0)
+            manual_weight = hit["manual_weight"]
             # Higher similarity (lower distance) = higher weight
             base_weight = (manual_weight * (1.5 - distance)) * decay
             reinforced_decay = min(1.0, decay * 1.05)
 
-            meta["rehearsal_count"] = meta.get("rehearsal_count", 0) + 1
-
-            merged_rows.append({
-                "id": mem_id,
-                "text": meta.get("fused_text", "Text Unavailable"),
+            rows.append({
+                "id": hit["id"],
+                "text": hit["text"],
                 "weight": base_weight,
+                "manual_weight": manual_weight,
                 "timestamp": ts_str,
                 "distance": distance,
                 "decay": reinforced_decay,
                 "age_days": age_days,
                 "source": source_label,
             })
+        return rows
+
+    def _fuse_ranked_lists(self, ranked_lists):
+        """Reciprocal rank fusion across dense and sparse result lists."""
+        fused = {}
+        for rows in ranked_lists:
+            for rank, row in enumerate(rows):
+                key = str(row["id"])
+                score = 1.0 / (RRF_K + rank + 1)
+                if key in fused:
+                    fused[key]["fusion_score"] += score
+                    if fused[key]["source"] != row["source"]:
+                        fused[key]["source"] = "fusion"
+                else:
+                    fused[key] = dict(row, fusion_score=score)
+
+        for row in fused.values():
+            # Scale so a rank-1 hit in one list is ~1.0, then apply manual weight and decay
+            row["weight"] = row["fusion_score"] * (RRF_K + 1) * row["manual_weight"] * row["decay"]
+        return list(fused.values())
+
+    # ============================================================
+    # recall_adaptive (score-driven n_results)
+    # ============================================================
+    @staticmethod
+    def _estimate_tokens(text, max_chars=300):
+        """Rough token cost of a memory as Cortex.respond prompts it (~4 chars/token)."""
+        return len((text or "")[:max_chars]) // 4 + 1
+
+    def recall_adaptive(self, query, max_results=None, min_results=None, token_budget=None,
+                        search_mode=None, rerank=None, stats=None, tenant_id=None):
+        """
+        Recall only as many memories as the score distribution supports.
 
+        Fetches a small first page and widens to max_results only when every
+        candidate is still relevant. Results are cut at the first of:
+        - score below RECALL_RELATIVE_THRESHOLD x the top score
+        - a knee, where the score drops below RECALL_KNEE_RATIO x the previous one
+        The score is the weight, or the rerank score when the rows were reranked.
+        - the token budget being exhausted
+        min_results memories are always kept when available.
+
+        Returns:
+            List of weighted memory dictionaries. Selection stats (fetched,
+            kept, stop_reason, tokens) are written into `stats` when given and
+            mirrored on self.last_recall_stats.
+        """
+        max_results = max_results or self.recall_max_results
+        min_results = min(min_results if min_results is not None else self.recall_min_results, max_results)
+        token_budget = token_budget or self.recall_token_budget
+
+        fetch = min(max(self.recall_initial_fetch, min_results), max_results)
+        rows = self.recall_with_context(query, n_results=fetch, search_mode=search_mode, rerank=rerank, tenant_id=tenant_id)
+        kept, reason, tokens = self._select_adaptive(rows, min_results, token_budget)
+
+        if reason == "exhausted" and len(rows) >= fetch and fetch < max_results:
+            # Every candidate on the first page was relevant; widen the search once
+            rows = self.recall_with_context(query, n_results=max_results, search_mode=search_mode, rerank=rerank, tenant_id=tenant_id)
+            kept, reason, tokens = self._select_adaptive(rows, min_results, token_budget)
+
+        result_stats = {
+            "fetched": len(rows),
+            "kept": len(kept),
+            "stop_reason": reason,
+            "tokens": tokens,
+        }
+        if stats is not None:
+            stats.update(result_stats)
+        self.last_recall_stats = result_stats
+        logger.debug("Kept %s/%s memories (stop: %s, ~%s tokens)", len(kept), len(rows), reason, tokens)
+        return kept
+
+    @staticmethod
+    def _adaptive_score(m):
+        """
+        The score that set the row's position: the cross-encoder score when the
+        rows were reranked (a logit, squashed to 0..1 so ratios are meaningful),
+        else the vector-search weight.
+        """
+        if m.get("rerank_score") is not None:
+            return 1.0 / (1.0 + math.exp(-m["rerank_score"]))
+        return m.get("weight", 0.0) or 0.0
+
+    def _select_adaptive(self, rows, min_results, token_budget):
+        """Apply threshold / knee / token budget cut-offs to rows in ranked order."""
+        if not rows:
+            return [], "empty", 0
+
+        scores = [self._adaptive_score(m) for m in rows]
+        top = scores[0]
+        kept, tokens = [], 0
+        for i, m in enumerate(rows):
+            cost = self._estimate_tokens(m.get("text"))
+            score = scores[i]
+            if i >= min_results:
+                if tokens + cost > token_budget:
+                    return kept, "token_budget", tokens
+                if top > 0 and score < top * self.recall_relative_threshold:
+                    return kept, "threshold", tokens
+                prev = scores[i - 1]
+                if prev > 0 and score < prev * self.recall_knee_ratio:
+                    return kept, "knee", tokens
+            kept.append(m)
+            tokens += cost
+        return kept, "exhausted", tokens
 
     # ============================================================
     # encode (short-term capture)
@@ -244,18 +646,20 @@ class Hippocampus:
     # ============================================================
     # delayed_commit (long-term episodic with Named Vectors)
     # ============================================================
-    def delayed_commit(self, user_query, reflection, response, state_json, metadata):
+    def delayed_commit(self, user_query, reflection, response, state_json, metadata, tenant_id=None):
         """
         Commit durable memory with dual named vectors (if enabled):
         - 'content': factual/semantic embedding of the full conversation
         - 'emotional': embedding focused on emotional tone and feelings
         
         Uses cached embeddings from recall phase if available.
+        The memory is tagged with tenant_id (default: HAL_TENANT_ID env).
         """
+        tenant_id = tenant_id or self.default_tenant
         try:
             # Prevent rapid-fire commits
-            if time.time() - getattr(self, "last_commit_time", 0) < 3:
-                time.sleep(1.5)
+            if time.time() - getattr(self, "last_commit_time", 0) < self.commit_min_interval:
+                time.sleep(self.commit_min_interval / 2)
 
             reflection_text = (reflection or "").strip()
             response_text = (response or "").strip()
@@ -267,7 +671,7 @@ class Hippocampus:
                 f"FINAL RESPONSE:\n{response_text}"
             )
 
-            mem_id = self._stable_id_for_fused_text(fused_text)
+            mem_id = self._stable_id_for_fused_text(fused_text, tenant_id)
 
             # --- EXISTENCE CHECK ---
             try:
@@ -278,7 +682,7 @@ class Hippocampus:
                     with_vectors=False
                 )
                 if existing and len(existing) > 0:
-                    print(f"[Hippo.commit] 🔁 Duplicate memory {mem_id[:8]}... detected — skipping add.")
+                    logger.debug("Duplicate memory %s... detected — skipping add.", mem_id[:8])
                     self.last_commit_time = time.time()
                     return
             except Exception:
@@ -301,10 +705,10 @@ class Hippocampus:
                 )
                 emotional_embedding = self.cortex.embed(emotional_text, cache_key=f"emotional:{user_query}")
                 
-                if not content_embedding or not emotional_embedding:
+                if content_embedding is None or emotional_embedding is None or not (len(content_embedding) and len(emotional_embedding)):
                     raise RuntimeError("Cortex.embed() returned no data for one or both vectors.")
             else:
-                if not content_embedding:
+                if content_embedding is None or not len(content_embedding):
                     raise RuntimeError("Cortex.embed() returned no data.")
 
             # --- METADATA (PAYLOAD) ---
@@ -317,7 +721,8 @@ class Hippocampus:
                 "summary": f"Fusion of query + reflection @ {metadata.get('turn_id') if metadata else 'N/A'}",
                 "manual_weight": 1.0,
                 "rehearsal_count": 0,
-                "fused_text": fused_text
+                "fused_text": fused_text,
+                TENANT_FIELD: tenant_id
             }
 
             all_states = state_json.get("emotions", [])
@@ -337,41 +742,54 @@ class Hippocampus:
             for i, kw in enumerate((metadata or {}).get("keywords", [])[:10]):
                 meta[f"keyword_{i+1}"] = kw
 
+            # --- SPARSE LEXICAL VECTOR (keywords + fused_text) ---
+            sparse_vector = None
+            if self.use_sparse_vectors:
+                indices, values = lexicon.encode_document(fused_text, (metadata or {}).get("keywords", [])[:10])
+                if indices:
+                    sparse_vector = models.SparseVector(indices=indices, values=values)
+
             # --- UPSERT WITH NAMED VECTORS (or single vector) ---
             if use_dual_vectors:
+                vectors = {
+                    "content": content_embedding,
+                    "emotional": emotional_embedding
+                }
+                if sparse_vector:
+                    vectors[SPARSE_VECTOR_NAME] = sparse_vector
                 self.client.upsert(
                     collection_name=self.collection_name,
                     points=[
                         models.PointStruct(
                             id=mem_id,
-                            vector={
-                                "content": content_embedding,
-                                "emotional": emotional_embedding
-                            },
+                            vector=vectors,
                             payload=meta
                         )
                     ]
                 )
                 vector_mode = "dual vectors"
             else:
-                # Single vector mode - store as default vector
+                # Single vector mode - store as default vector ("" is the unnamed dense vector)
                 self.client.upsert(
                     collection_name=self.collection_name,
                     points=[
                         models.PointStruct(
                             id=mem_id,
-                            vector=content_embedding,
+                            vector={"": content_embedding, SPARSE_VECTOR_NAME: sparse_vector} if sparse_vector else content_embedding,
                             payload=meta
                         )
                     ]
                 )
                 vector_mode = "single vector"
+            if sparse_vector:
+                vector_mode += " + sparse"
 
             self.last_commit_time = time.time()
-            print(f"[Hippo.commit] ✅ Saved memory with {vector_mode} :: {meta.get('summary')} ({mem_id[:8]}...)")
+            self._invalidate_recall_cache()
+            logger.debug("Saved memory with %s :: %s (%s...)", vector_mode, meta.get('summary'), mem_id[:8])
 
         except Exception as e:
-            print(f"[Hippo.commit] ❌ Error during commit: {e}")
+            logger.error("Error during commit: %s", e)
             import traceback; traceback.print_exc()
 
     # ============================================================
@@ -388,16 +806,45 @@ class Hippocampus:
                 payload={"manual_weight": new_weight},
                 points=[mem_id],
             )
+            self._invalidate_recall_cache()
             
-            print(f"[Hippo.adjust] Set {mem_id[:8]}... manual_weight={new_weight}")
+            logger.info("Set %s... manual_weight=%s", mem_id[:8], new_weight)
         except Exception as e:
-            print(f"[Hippo.adjust] Error adjusting weight: {e}")
+            logger.error("Error adjusting weight: %s", e)
 # ============================================================
 # get recent turns
 # ============================================================
-    def get_recent_turns(self, n=3):
-        """Fetch the most recent N conversational turns from log files, pulling from previous day if today's count is insufficient."""
-        from glob import glob
+    def record_turn(self, turn_data, tenant_id=None):
+        """Append a just-logged turn to the tenant's recent-turn index (if it has been seeded)."""
+        tenant_id = tenant_id or self.default_tenant
+        with self._recent_lock:
+            index = self._recent_turns.get(tenant_id)
+            if index is not None:
+                index.append(turn_data)
+
+    def get_recent_turns(self, n=3, tenant_id=None):
+        """
+        Fetch the most recent N conversational turns for a tenant.
+
+        Served from the in-memory recent-turn index; the first read for a tenant
+        seeds it from log files, pulling from the previous day if today's count is insufficient.
+        """
+        tenant_id = tenant_id or self.default_tenant
+        by_time = lambda x: x.get("timestamp", "")
+
+        with self._recent_lock:
+            index = self._recent_turns.get(tenant_id)
+            if index is not None and n <= index.maxlen:
+                return sorted(index, key=by_time, reverse=True)[:n]
+
+            size = max(n, self.recent_turn_index_size)
+            turns = self._load_recent_turns_from_logs(size, tenant_id)
+            if index is None:
+                self._recent_turns[tenant_id] = deque(sorted(turns, key=by_time), maxlen=size)
+            return turns[:n]
+
+    def _load_recent_turns_from_logs(self, n, tenant_id):
+        """Read the most recent N turns (newest first) from today's and yesterday's turn logs."""
         from datetime import datetime, timedelta
 
         def load_turns_from_dir(log_dir):
@@ -412,15 +859,16 @@ class Hippocampus:
                             except Exception:
                                 continue
                 except Exception as e:
-                    print(f"[Hippocampus] ⚠️ Error reading {log_path}: {e}")
+                    logger.warning("Error reading %s: %s", log_path, e)
             return turns
 
         try:
             today = datetime.today().date()
             yesterday = today - timedelta(days=1)
 
-            today_dir = os.path.join("runtime_logs", today.isoformat())
-            yest_dir = os.path.join("runtime_logs", yesterday.isoformat())
+            log_root = tenant_log_root(tenant_id)
+            today_dir = os.path.join(log_root, today.isoformat())
+            yest_dir = os.path.join(log_root, yesterday.isoformat())
 
             all_turns = load_turns_from_dir(today_dir)
 
@@ -433,5 +881,5 @@ class Hippocampus:
             return sorted(all_turns, key=lambda x: x.get("timestamp", ""), reverse=True)[:n]
 
         except Exception as e:
-            print(f"[Hippocampus] ⚠️ Failed to fetch recent turns: {e}")
+            logger.warning("Failed to fetch recent turns: %s", e)
             return []
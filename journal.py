@@ -0,0 +1,216 @@
+# ============================================================
+# journal.py — Append-Only Journals for the Short-Term Windows
+# ============================================================
+"""
+Incremental persistence for bounded windows (Attention's narrative window,
+TemporalAnchor's anchor window).
+
+On disk a window is two files:
+
+- the checkpoint (`narrative_window.json`): {"seq": N, "entries": [...]},
+  written to a temp file and os.replace'd into place, so it is always
+  either the old or the new snapshot;
+- the journal (`narrative_window.jsonl`): one {"seq": n, "entry": {...}}
+  line per append since that checkpoint.
+
+Appends are buffered and written by a background autosave every
+`autosave_seconds` (0 writes each append through), so persisting costs
+O(new entries), not O(window). Once `compact_every` entries have been
+journaled the current window is checkpointed and the journal truncated.
+Loading reads the checkpoint and replays journal lines with a higher seq;
+a torn last line from a crash mid-write is ignored and cut from the file,
+so the next append starts on a clean line. A legacy checkpoint
+holding a plain JSON list loads as seq 0.
+"""
+
+import os
+import json
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def journal_paths(path):
+    """(checkpoint, journal) file paths for a window saved at `path`."""
+    return path, os.path.splitext(path)[0] + ".jsonl"
+
+
+def read_window(path):
+    """(entries, seq) recovered from a checkpoint plus its journal; ([], 0) if neither exists."""
+    checkpoint_path, journal_path = journal_paths(path)
+    entries, seq = [], 0
+    try:
+        with open(checkpoint_path, encoding="utf-8") as f:
+            state = json.load(f)
+        if isinstance(state, list):
+            entries = state
+        else:
+            entries, seq = list(state.get("entries") or []), int(state.get("seq") or 0)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable checkpoint %s: %s", checkpoint_path, e)
+
+    try:
+        with open(journal_path, encoding="utf-8") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        lines = []
+    for i, line in enumerate(lines):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            if i == len(lines) - 1:
+                logger.warning("Dropping torn last record in %s", journal_path)
+                break
+            logger.warning("Skipping corrupt record %d in %s", i + 1, journal_path)
+            continue
+        if record.get("seq", 0) > seq:
+            entries.append(record.get("entry"))
+            seq = record["seq"]
+    if lines and not lines[-1].endswith("\n"):
+        _repair_tail(journal_path)
+    return entries, seq
+
+
+def _repair_tail(journal_path):
+    """
+    End the journal on a record boundary before anything is appended to it:
+    a complete last record missing only its newline gets one, a torn one is
+    cut off (appending onto the fragment would corrupt the next record too).
+    """
+    try:
+        with open(journal_path, "r+b") as f:
+            data = f.read()
+            cut = data.rfind(b"\n") + 1
+            try:
+                json.loads(data[cut:].decode("utf-8"))
+                f.write(b"\n")
+            except ValueError:
+                f.truncate(cut)
+    except OSError as e:
+        logger.warning("Could not repair the tail of %s: %s", journal_path, e)
+
+
+class Journal:
+    def __init__(self, path, snapshot, seq=0, compact_every=256, autosave_seconds=5.0, fsync=False):
+        """
+        `snapshot` returns the full current window (called under the journal
+        lock when compacting); `seq` is the last sequence number already on
+        disk, as returned by read_window.
+        """
+        self.path = path
+        self.checkpoint_path, self.journal_path = journal_paths(path)
+        self.snapshot = snapshot
+        self.compact_every = max(1, int(compact_every))
+        self.autosave_seconds = float(autosave_seconds)
+        self.fsync = fsync
+
+        self._seq = int(seq)
+        self._pending = []
+        self._journaled = self._count_journal_lines()
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        if self.autosave_seconds > 0:
+            self._thread = threading.Thread(target=self._autosave, name="journal-autosave", daemon=True)
+            self._thread.start()
+        # Buffered entries are written on a clean exit too, not only on the next autosave
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls, path, snapshot, seq=0):
+        return cls(
+            path, snapshot, seq=seq,
+            compact_every=int(os.getenv("JOURNAL_COMPACT_EVERY", "256")),
+            autosave_seconds=float(os.getenv("JOURNAL_AUTOSAVE_SECONDS", "5")),
+            fsync=os.getenv("JOURNAL_FSYNC", "false").lower() in ["true", "1", "yes"],
+        )
+
+    # ------------------------------------------------------------
+    def append(self, entry, apply=None):
+        """
+        Record an entry. `apply` (e.g. the window's append) runs under the
+        journal lock, so a concurrent checkpoint sees the entry either in the
+        snapshot or in the journal, never both.
+        """
+        with self._lock:
+            if apply is not None:
+                apply(entry)
+            self._seq += 1
+            self._pending.append({"seq": self._seq, "entry": entry})
+            if self.autosave_seconds <= 0:
+                self.flush()
+
+    def flush(self):
+        """Write buffered entries to the journal; compacts once enough have accumulated."""
+        with self._lock:
+            if not self._pending:
+                return
+            if self._journaled + len(self._pending) >= self.compact_every:
+                self.checkpoint()
+                return
+            data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self._pending)
+            try:
+                self._ensure_dir()
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    f.write(data)
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+            except OSError as e:
+                logger.warning("Journal write to %s failed: %s", self.journal_path, e)
+                return  # kept pending for the next flush
+            self._journaled += len(self._pending)
+            self._pending = []
+
+    def checkpoint(self):
+        """Atomically snapshot the whole window, then truncate the journal."""
+        with self._lock:
+            state = {"seq": self._seq, "entries": list(self.snapshot())}
+            tmp = f"{self.checkpoint_path}.tmp"
+            try:
+                self._ensure_dir()
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(state, f, ensure_ascii=False)
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+                os.replace(tmp, self.checkpoint_path)
+                # A crash before this truncation is harmless: replay skips seq <= checkpoint seq
+                open(self.journal_path, "w", encoding="utf-8").close()
+            except OSError as e:
+                logger.warning("Checkpoint to %s failed: %s", self.checkpoint_path, e)
+                return
+            self._pending = []
+            self._journaled = 0
+            logger.debug("Checkpointed %s (%s entries, seq %s)", self.checkpoint_path, len(state["entries"]), self._seq)
+
+    def close(self):
+        """Stop the autosave worker and write anything still buffered."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    # ------------------------------------------------------------
+    def _autosave(self):
+        while not self._stop.wait(self.autosave_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("Journal autosave failed: %s", e)
+
+    def _ensure_dir(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def _count_journal_lines(self):
+        try:
+            with open(self.journal_path, "rb") as f:
+                return sum(1 for _ in f)
+        except OSError:
+            return 0
@@ -0,0 +1,70 @@
+# ============================================================
+# lexicon.py — Sparse (BM25-style) Term Vectors for Hybrid Recall
+# ============================================================
+
+import re
+import zlib
+from collections import Counter
+
+# Qdrant applies IDF server-side (Modifier.IDF); we only supply saturated term
+# frequencies at index time and unit weights at query time.
+BM25_K1 = 1.2
+BM25_B = 0.75
+BM25_AVG_DOC_LEN = 120.0  # rough token length of a fused memory
+KEYWORD_BOOST = 2.0
+
+_TOKEN_RE = re.compile(r"[\w']+", re.UNICODE)
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have he her him his how i i'm
+if in into is it it's its just me my no not of on or our she so than that the their them then there these
+they this to too us was we were what when where which who why will with would you your yours
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords and single characters removed."""
+    tokens = []
+    for tok in _TOKEN_RE.findall((text or "").lower()):
+        tok = tok.strip("'")
+        if len(tok) > 1 and tok not in STOPWORDS:
+            tokens.append(tok)
+    return tokens
+
+
+def term_id(token):
+    """Stable 31-bit term index (crc32 is consistent across processes, unlike hash())."""
+    return zlib.crc32(token.encode("utf-8")) & 0x7FFFFFFF
+
+
+def _to_sparse(weights):
+    indices = sorted(weights)
+    return indices, [float(weights[i]) for i in indices]
+
+
+def encode_document(text, keywords=None):
+    """
+    Build a sparse document vector from memory text plus its keywords.
+
+    Returns:
+        (indices, values) with BM25 tf saturation and length normalisation;
+        keyword terms are boosted so exact names and tags rank first.
+    """
+    counts = Counter(tokenize(text))
+    for kw in keywords or []:
+        for tok in tokenize(kw):
+            counts[tok] += KEYWORD_BOOST
+
+    doc_len = sum(counts.values()) or 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / BM25_AVG_DOC_LEN)
+
+    weights = {}
+    for tok, tf in counts.items():
+        idx = term_id(tok)
+        weights[idx] = weights.get(idx, 0.0) + tf * (BM25_K1 + 1) / (tf + norm)
+    return _to_sparse(weights)
+
+
+def encode_query(text):
+    """Build a sparse query vector (unit weight per distinct term)."""
+    return _to_sparse({term_id(tok): 1.0 for tok in set(tokenize(text))})
@@ -0,0 +1,321 @@
+# ============================================================
+# llm_router.py — Multi-Endpoint Chat Routing (Failover, Breakers, Hedging)
+# ============================================================
+"""
+Routes chat completions across an ordered list of OpenAI-compatible endpoints.
+
+- Selection: endpoints with latency samples are tried fastest-first (EWMA of
+  successful calls); endpoints not yet sampled follow in configured order.
+- Failover: timeouts, connection errors, 429 and 5xx move on to the next
+  endpoint immediately instead of sleeping and retrying the same one. Other
+  4xx responses are returned as-is (the request itself is at fault).
+- Circuit breakers: after ROUTER_BREAKER_FAILURES consecutive failures an
+  endpoint is skipped for ROUTER_BREAKER_COOLDOWN seconds, then half-open:
+  one trial request decides whether it closes again.
+- Hedging (ROUTER_HEDGE=true): if the first endpoint hasn't answered after
+  its p95 latency (at least ROUTER_HEDGE_MIN_MS), the same request goes to
+  the next endpoint and the first successful response wins.
+- Models: each endpoint answers with its own "model" unless the caller
+  overrides it (e.g. NARRATIVE_MODEL); an override is sent as-is, or mapped
+  through the endpoint's optional "models" table when providers name the
+  same model differently.
+
+Configure with LLM_ENDPOINTS, a JSON list in priority order:
+
+    [{"name": "openai", "base": "https://api.openai.com/v1", "model": "gpt-4o-mini",
+      "api_key_env": "OPENAI_API_KEY"},
+     {"name": "openrouter", "base": "https://openrouter.ai/api/v1",
+      "model": "openai/gpt-4o-mini", "api_key_env": "OPENROUTER_API_KEY",
+      "models": {"gpt-4.1-nano": "openai/gpt-4.1-nano"}}]
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+from telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+metrics.describe("llm_endpoint_circuit_open", "1 while the endpoint's circuit breaker is open.")
+metrics.describe("llm_endpoint_latency_ewma_ms", "EWMA latency of successful chat calls per endpoint.")
+
+
+class CircuitBreaker:
+    """closed → open after N consecutive failures → half_open after the cooldown → closed on success."""
+
+    def __init__(self, failure_threshold=3, cooldown_seconds=30.0):
+        self.failure_threshold = int(failure_threshold)
+        self.cooldown_seconds = float(cooldown_seconds)
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        """True if a request may go out now (one trial at a time while half-open)."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Returns True if this failure opened (or re-opened) the breaker."""
+        with self._lock:
+            self.failures += 1
+            was_trial, self._trial_in_flight = self._trial_in_flight, False
+            if was_trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class Endpoint:
+    __slots__ = ("name", "base", "model", "models", "api_key_env", "extra_headers", "breaker",
+                 "ewma_ms", "_latencies", "_lock")
+
+    def __init__(self, name, base, model, api_key_env=None, extra_headers=None,
+                 failure_threshold=3, cooldown_seconds=30.0, window=50, models=None):
+        self.name = name
+        self.base = base.rstrip("/")
+        self.model = model
+        self.models = dict(models or {})  # caller's model override -> this endpoint's name for it
+        self.api_key_env = api_key_env
+        self.extra_headers = dict(extra_headers or {})
+        self.breaker = CircuitBreaker(failure_threshold, cooldown_seconds)
+        self.ewma_ms = None
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"{self.base}/chat/completions"
+
+    def resolve(self, model=None):
+        """The model this endpoint is asked for: its own, or the caller's override."""
+        if model is None:
+            return self.model
+        return self.models.get(model, model)
+
+    def headers(self):
+        headers = {"Content-Type": "application/json", **self.extra_headers}
+        key = os.getenv(self.api_key_env) if self.api_key_env else None
+        if key:
+            headers["Authorization"] = f"Bearer {key}"
+        if "openrouter.ai" in self.base:
+            # Optional but recommended by OpenRouter
+            if os.getenv("OPENROUTER_SITE_URL"):
+                headers["HTTP-Referer"] = os.getenv("OPENROUTER_SITE_URL")
+            headers["X-Title"] = os.getenv("OPENROUTER_APP_NAME", "Halcyon")
+        return headers
+
+    def observe(self, ms, alpha=0.3):
+        with self._lock:
+            self._latencies.append(ms)
+            self.ewma_ms = ms if self.ewma_ms is None else alpha * ms + (1 - alpha) * self.ewma_ms
+
+    def p95_ms(self):
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def status(self):
+        return {
+            "name": self.name,
+            "model": self.model,
+            "state": self.breaker.state,
+            "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            "p95_ms": self.p95_ms(),
+        }
+
+
+class RouteError(Exception):
+    """Every endpoint failed or was unavailable; .response is the last retryable response, if any."""
+
+    def __init__(self, message, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+class LLMRouter:
+    def __init__(self, endpoints, session=None, timeout=30.0, hedge=False, hedge_min_ms=500.0, max_workers=8):
+        if not endpoints:
+            raise ValueError("LLMRouter needs at least one endpoint")
+        self.endpoints = list(endpoints)
+        self.session = session or requests.Session()
+        self.timeout = float(timeout)
+        self.hedge = hedge
+        self.hedge_min_ms = float(hedge_min_ms)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge") if hedge else None
+
+    @classmethod
+    def from_env(cls, session=None):
+        """Build from LLM_ENDPOINTS and ROUTER_* env vars; None if LLM_ENDPOINTS is unset."""
+        raw = os.getenv("LLM_ENDPOINTS", "").strip()
+        if not raw:
+            return None
+        specs = json.loads(raw)
+        failure_threshold = int(os.getenv("ROUTER_BREAKER_FAILURES", "3"))
+        cooldown = float(os.getenv("ROUTER_BREAKER_COOLDOWN", "30"))
+        endpoints = [
+            Endpoint(
+                name=spec.get("name") or f"endpoint{i}",
+                base=spec["base"],
+                model=spec["model"],
+                api_key_env=spec.get("api_key_env"),
+                extra_headers=spec.get("headers"),
+                models=spec.get("models"),
+                failure_threshold=failure_threshold,
+                cooldown_seconds=cooldown,
+            )
+            for i, spec in enumerate(specs)
+        ]
+        return cls(
+            endpoints,
+            session=session,
+            timeout=float(os.getenv("ROUTER_TIMEOUT", "30")),
+            hedge=os.getenv("ROUTER_HEDGE", "false").lower() in ["true", "1", "yes"],
+            hedge_min_ms=float(os.getenv("ROUTER_HEDGE_MIN_MS", "500")),
+        )
+
+    # ------------------------------------------------------------
+    def candidates(self):
+        """Available endpoints: sampled ones fastest-first, then unsampled in configured order."""
+        ranked = sorted(
+            enumerate(self.endpoints),
+            key=lambda ie: (ie[1].ewma_ms is None, ie[1].ewma_ms or 0.0, ie[0]),
+        )
+        return [e for _, e in ranked if e.breaker.state != "open"]
+
+    @staticmethod
+    def _next(queue):
+        """Pop the next endpoint whose breaker admits a request (claims the half-open trial)."""
+        while queue:
+            endpoint = queue.pop(0)
+            if endpoint.breaker.allow():
+                return endpoint
+        return None
+
+    def _attempt(self, endpoint, payload, model=None):
+        """One request to one endpoint; returns (response, None) or (None, error)."""
+        body = dict(payload, model=endpoint.resolve(model))
+        start = time.perf_counter()
+        try:
+            resp = self.session.post(endpoint.url, headers=endpoint.headers(), json=body, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            self._fail(endpoint, e)
+            return None, e
+        if resp.status_code in RETRYABLE_STATUS:
+            self._fail(endpoint, f"HTTP {resp.status_code}")
+            return None, resp
+        # Any other answer (including a 4xx about the request) means the endpoint is up
+        endpoint.observe((time.perf_counter() - start) * 1000.0)
+        endpoint.breaker.record_success()
+        return resp, None
+
+    def _fail(self, endpoint, error):
+        if endpoint.breaker.record_failure():
+            logger.warning("Circuit opened for %s (%s); skipping it for %gs", endpoint.name, error, endpoint.breaker.cooldown_seconds)
+        else:
+            logger.warning("LLM endpoint %s failed: %s", endpoint.name, error)
+
+    def post(self, payload, model=None):
+        """
+        Send a chat payload; returns (response, endpoint, info).
+
+        The payload's "model" is replaced by each endpoint's own model, or by
+        `model` (mapped per endpoint) when the caller overrides it. info holds
+        the model that answered and counts failovers and hedges for tracing.
+        Raises RouteError when no endpoint produced a usable response (the last
+        retryable response, if any, is kept on .response).
+        """
+        info = {"model": None, "failovers": 0, "hedged": False, "hedge_won": False}
+        queue = self.candidates()
+        primary = self._next(queue)
+        if primary is None:
+            raise RouteError("all LLM endpoints are unavailable (circuits open)")
+
+        last = None
+        while primary is not None:
+            if self.hedge and queue:
+                resp, endpoint, last_err = self._hedged(primary, queue, payload, model, info)
+            else:
+                resp, last_err = self._attempt(primary, payload, model)
+                endpoint = primary
+            if resp is not None:
+                info["model"] = endpoint.resolve(model)
+                return resp, endpoint, info
+            last = last_err if last_err is not None else last
+            primary = self._next(queue)
+            if primary is not None:
+                info["failovers"] += 1
+
+        raise RouteError(
+            f"all LLM endpoints failed (last error: {getattr(last, 'status_code', last)})",
+            response=last if isinstance(last, requests.Response) else None,
+        )
+
+    def _hedged(self, primary, queue, payload, model, info):
+        """Race primary against the next endpoint once primary passes its p95."""
+        delay_ms = max(self.hedge_min_ms, primary.p95_ms() or 0.0)
+        futures = {self._executor.submit(self._attempt, primary, payload, model): primary}
+        done, _ = wait(futures, timeout=delay_ms / 1000.0)
+        backup = self._next(queue) if not done else None
+        if backup is not None:
+            info["hedged"] = True
+            logger.debug("Hedging %s after %.0fms with %s", primary.name, delay_ms, backup.name)
+            futures[self._executor.submit(self._attempt, backup, payload, model)] = backup
+
+        last_err = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                resp, err = fut.result()
+                if resp is not None:
+                    # The slower request finishes in the background and only updates its stats
+                    info["hedge_won"] = futures[fut] is not primary
+                    return resp, futures[fut], None
+                last_err = err
+        return None, primary, last_err
+
+    def status(self):
+        return [e.status() for e in self.endpoints]
+
+    def publish_metrics(self):
+        for e in self.endpoints:
+            metrics.set_gauge("llm_endpoint_circuit_open", 1.0 if e.breaker.state == "open" else 0.0, endpoint=e.name)
+            if e.ewma_ms is not None:
+                metrics.set_gauge("llm_endpoint_latency_ewma_ms", round(e.ewma_ms, 1), endpoint=e.name)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
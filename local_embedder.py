@@ -0,0 +1,244 @@
+# ============================================================
+# local_embedder.py — Local Embedding Engines + Micro-Batching Pool
+# ============================================================
+"""
+Offline embeddings for Cortex when no OpenAI key is configured.
+
+Engines (LOCAL_EMBED_ENGINE):
+- sentence-transformers (default): SentenceTransformer.encode on CPU/GPU (PyTorch).
+- onnx: ONNX Runtime + `tokenizers`, no PyTorch. Loads an int8-quantized
+  export of the model (LOCAL_EMBED_ONNX_FILE, default onnx/model_quint8_avx2.onnx
+  from the model's Hugging Face repo, or from LOCAL_EMBED_ONNX_PATH offline),
+  then mean-pools and L2-normalizes like the sentence-transformers pipeline.
+
+Requests go through a MicroBatcher: concurrent embed() calls arriving within
+LOCAL_EMBED_BATCH_WINDOW_MS are merged into one encode call of up to
+LOCAL_EMBED_BATCH_SIZE texts, run on a pool of LOCAL_EMBED_WORKERS threads
+(or processes with LOCAL_EMBED_POOL=process, each loading its own model).
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# Engines — encode(texts) -> float32 array [n, dim]
+# ============================================================
+class SentenceTransformerEngine:
+    def __init__(self, model_name, threads=None):
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            try:
+                import torch
+                torch.set_num_threads(int(threads))
+            except ImportError:
+                pass
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts):
+        return np.asarray(self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True), dtype=np.float32)
+
+
+class OnnxEngine:
+    """ONNX Runtime encoder with mean pooling + L2 normalization (sentence-transformers compatible)."""
+
+    def __init__(self, model_name, onnx_file=None, model_dir=None, threads=None, max_length=256):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        onnx_file = onnx_file or os.getenv("LOCAL_EMBED_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+        model_dir = model_dir or os.getenv("LOCAL_EMBED_ONNX_PATH")
+        if model_dir:
+            model_path = os.path.join(model_dir, onnx_file)
+            tokenizer_path = os.path.join(model_dir, "tokenizer.json")
+        else:
+            from huggingface_hub import hf_hub_download
+            repo = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+            model_path = hf_hub_download(repo, onnx_file)
+            tokenizer_path = hf_hub_download(repo, "tokenizer.json")
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(model_path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dimension = self.encode(["dimension probe"]).shape[1]
+
+    def encode(self, texts):
+        encodings = self.tokenizer.encode_batch(list(texts))
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feeds)[0]  # [n, seq, dim]
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32, copy=False)
+
+
+ENGINES = {"sentence-transformers": SentenceTransformerEngine, "onnx": OnnxEngine}
+
+
+def load_engine(kind, model_name, threads=None):
+    if kind not in ENGINES:
+        raise ValueError(f"Unknown LOCAL_EMBED_ENGINE {kind!r} (expected one of {', '.join(ENGINES)})")
+    return ENGINES[kind](model_name, threads=threads)
+
+
+# Process-pool workers each hold their own engine
+_worker_engine = None
+
+
+def _init_worker(kind, model_name, threads):
+    global _worker_engine
+    _worker_engine = load_engine(kind, model_name, threads)
+
+
+def _worker_encode(texts):
+    return _worker_engine.encode(texts)
+
+
+def _worker_dimension():
+    return _worker_engine.dimension
+
+
+# ============================================================
+# Micro-batching
+# ============================================================
+class MicroBatcher:
+    """
+    Merges concurrent single-text requests into batched encode calls.
+
+    A dispatcher thread takes the first waiting request, collects more for up
+    to window_ms (or until max_batch), and hands the batch to the executor.
+    """
+
+    def __init__(self, encode, executor, max_batch=32, window_ms=3.0):
+        self._encode = encode
+        self._executor = executor
+        self.max_batch = max(1, int(max_batch))
+        self.window = max(0.0, float(window_ms)) / 1000.0
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._dispatch, name="embed-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        fut = Future()
+        self._queue.put((text, fut))
+        return fut
+
+    def _dispatch(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # finish this batch, then stop
+                    break
+                batch.append(item)
+            self.batches += 1
+            self.items += len(batch)
+            self._run(batch)
+
+    def _run(self, batch):
+        texts = [t for t, _ in batch]
+        try:
+            job = self._executor.submit(self._encode, texts)
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+
+        def deliver(job):
+            try:
+                vectors = job.result()
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                return
+            for (_, fut), vec in zip(batch, vectors):
+                fut.set_result(vec)
+
+        job.add_done_callback(deliver)
+
+    @property
+    def mean_batch_size(self):
+        return self.items / self.batches if self.batches else 0.0
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+class LocalEmbedder:
+    """Engine + worker pool + micro-batcher behind a single embed(text) call."""
+
+    def __init__(self, model_name, engine=None, workers=None, pool=None, batch_size=None, window_ms=None, threads=None):
+        self.model_name = model_name
+        self.engine_kind = engine or os.getenv("LOCAL_EMBED_ENGINE", "sentence-transformers")
+        self.workers = int(workers or os.getenv("LOCAL_EMBED_WORKERS", "1"))
+        self.pool_kind = pool or os.getenv("LOCAL_EMBED_POOL", "thread")
+        threads = threads or (int(os.getenv("LOCAL_EMBED_THREADS", "0")) or None)
+
+        if self.pool_kind == "process":
+            # Separate interpreters: no GIL contention, but one model copy per worker
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(self.engine_kind, model_name, threads),
+            )
+            encode = _worker_encode
+            # Asked of a worker, so the parent never loads a model (or imports PyTorch) itself
+            self.dimension = self._executor.submit(_worker_dimension).result()
+        else:
+            # ONNX Runtime and PyTorch release the GIL while encoding, so threads share one model
+            self.engine = load_engine(self.engine_kind, model_name, threads)
+            self.dimension = self.engine.dimension
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embed-worker")
+            encode = self.engine.encode
+
+        self.batcher = MicroBatcher(
+            encode, self._executor,
+            max_batch=int(batch_size or os.getenv("LOCAL_EMBED_BATCH_SIZE", "32")),
+            window_ms=float(window_ms if window_ms is not None else os.getenv("LOCAL_EMBED_BATCH_WINDOW_MS", "3")),
+        )
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def embed(self, text, timeout=None):
+        """Embedding for one text as a float32 array (batched with concurrent callers)."""
+        return self.batcher.submit(text).result(timeout=timeout)
+
+    def close(self):
+        self.batcher.close()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,355 @@
+"""
+Local OpenAI-compatible stub server for offline runs and benchmarks.
+
+Serves /chat/completions and /embeddings (with or without a /v1 prefix) so
+the full Thalamus pipeline runs on a laptop without network access:
+
+- Chat: replays the recorded turn from runtime_logs when the user query has
+  been seen before; otherwise generates deterministic canned
+  STATE / REFLECTION / KEYWORDS / RESPONSE output seeded from the query
+  (a JSON object when the request carries a json_schema response_format).
+  Reflections (and single-pass turns) asked for QUESTIONS (CURIOSITY=true)
+  get a canned question.
+- Embeddings: deterministic feature-hashed vectors (shared words → similar
+  vectors), sized by the request's `dimensions` or the model name.
+- Latency: fixed per-endpoint delay plus seeded jitter.
+- Usage: approximate token counts; a repeated system prefix is reported as
+  prompt_tokens_details.cached_tokens, like provider prompt caching.
+
+    python mock_llm_server.py --port 8001 --chat-latency-ms 400 --embed-latency-ms 30
+    OPENAI_API_KEY=mock OPENAI_BASE_URL=http://127.0.0.1:8001/v1 python cli.py
+"""
+import os
+import re
+import json
+import glob
+import time
+import math
+import base64
+import struct
+import random
+import hashlib
+import argparse
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from halcyon_prompts import EMOTIVE_STATES, COGNITIVE_STATES
+
+MODEL_DIMENSIONS = {
+    "text-embedding-3-large": 3072,
+    "text-embedding-3-small": 1536,
+    "text-embedding-ada-002": 1536,
+    "all-MiniLM-L6-v2": 384,
+}
+
+_WORD_RE = re.compile(r"[\w']+")
+
+logger = logging.getLogger(__name__)
+
+
+def _seed(*parts):
+    return int.from_bytes(hashlib.sha256("\x00".join(parts).encode("utf-8")).digest()[:8], "big")
+
+
+def _normalize_query(text):
+    return " ".join((text or "").lower().split())
+
+
+def hash_embedding(text, dim):
+    """Deterministic unit vector: each word adds a few signed hashed features."""
+    vec = [0.0] * dim
+    for word in _WORD_RE.findall((text or "").lower()):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=24).digest()
+        for i in range(0, 24, 6):
+            idx = int.from_bytes(digest[i:i + 4], "big") % dim
+            vec[idx] += 1.0 if digest[i + 4] & 1 else -1.0
+    norm = math.sqrt(sum(x * x for x in vec))
+    if norm == 0.0:
+        vec[_seed(text or "") % dim] = 1.0
+        return vec
+    return [x / norm for x in vec]
+
+
+def extract_user_query(prompt):
+    """Recover the user's query from a Cortex reflect/respond prompt."""
+    m = re.search(r"User query:\s*(.*?)\*\*\*", prompt, flags=re.S)
+    if m:
+        # Single-pass prompts lead the query with "[Time: ... | Turn: ...]"
+        return re.sub(r"^\[Time:[^\]]*\]\s*", "", m.group(1).strip())
+    matches = re.findall(r"^User:\s*(.+)$", prompt, flags=re.M)
+    return matches[-1].strip() if matches else prompt.strip()[-200:]
+
+
+class MockLLM:
+    """Response generation, independent of the HTTP layer."""
+
+    def __init__(self, replay_dir=None, default_dim=3072, chat_latency_ms=0.0,
+                 embed_latency_ms=0.0, jitter_ms=0.0, seed=0):
+        self.default_dim = int(default_dim)
+        self.chat_latency_ms = float(chat_latency_ms)
+        self.embed_latency_ms = float(embed_latency_ms)
+        self.jitter_ms = float(jitter_ms)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._seen_prefixes = set()
+        self.replay = {}
+        if replay_dir:
+            self.load_replay(replay_dir)
+
+    # ------------------------------------------------------------
+    # Replay index (runtime_logs/**/turn_log.jsonl)
+    # ------------------------------------------------------------
+    def load_replay(self, replay_dir):
+        for path in sorted(glob.glob(os.path.join(replay_dir, "**", "turn_log.jsonl"), recursive=True)):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        turn = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if turn.get("user_query"):
+                        self.replay[_normalize_query(turn["user_query"])] = turn
+        logger.info("Replay index: %d recorded turns from %s", len(self.replay), replay_dir)
+
+    # ------------------------------------------------------------
+    # Latency injection
+    # ------------------------------------------------------------
+    def _sleep(self, base_ms):
+        if base_ms <= 0 and self.jitter_ms <= 0:
+            return
+        with self._rng_lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        time.sleep(max(0.0, base_ms + jitter) / 1000.0)
+
+    # ------------------------------------------------------------
+    # Chat
+    # ------------------------------------------------------------
+    @staticmethod
+    def _state_block(seed):
+        rng = random.Random(seed)
+        state = {}
+        for prefix, vocab in (("emo", EMOTIVE_STATES), ("cog", COGNITIVE_STATES)):
+            for i, name in enumerate(rng.sample(vocab, 3), start=1):
+                state[f"{prefix}_{i}_name"] = name
+                state[f"{prefix}_{i}_intensity"] = round(rng.uniform(0.2, 0.9), 1)
+        return state
+
+    @staticmethod
+    def _state_from_log(turn):
+        state = {}
+        counts = {"emotive": 0, "cognitive": 0}
+        for s in (turn.get("state") or {}).get("emotions", []):
+            kind = s.get("type")
+            if kind not in counts or counts[kind] >= 3:
+                continue
+            counts[kind] += 1
+            prefix = "emo" if kind == "emotive" else "cog"
+            state[f"{prefix}_{counts[kind]}_name"] = s.get("name")
+            state[f"{prefix}_{counts[kind]}_intensity"] = s.get("intensity")
+        return state
+
+    @staticmethod
+    def _content_text(content):
+        if isinstance(content, list):  # multipart content (e.g. with cache_control)
+            return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        return str(content or "")
+
+    def _cached_prefix_tokens(self, messages):
+        """Simulate provider prompt caching: a repeated system prefix counts as cached."""
+        system = "".join(self._content_text(m.get("content")) for m in messages if m.get("role") == "system")
+        if not system:
+            return 0
+        key = hashlib.sha256(system.encode("utf-8")).digest()
+        with self._rng_lock:
+            seen = key in self._seen_prefixes
+            self._seen_prefixes.add(key)
+        return len(system) // 4 if seen else 0
+
+    def _structured(self, schema, query, recorded):
+        """JSON-schema completion: the same canned fields, restricted to the schema's keys."""
+        state = (self._state_from_log(recorded) if recorded else {}) or self._state_block(_seed(query))
+        response = (recorded or {}).get("response") or ""
+        m = re.search(r"RESPONSE\s*:\s*(.+)\Z", response, flags=re.S)
+        fields = {
+            "state": state,
+            "reflection": (recorded or {}).get("reflection") or (
+                f"I notice {state['emo_1_name'].lower()} and a {state['cog_1_name'].lower()} focus "
+                f"as I consider: \"{query[:120]}\"."
+            ),
+            "keywords": (recorded or {}).get("keywords") or [state["emo_1_name"], state["cog_1_name"]] + _WORD_RE.findall(query.lower())[:3],
+            "response": m.group(1).strip() if m else f"Thank you for sharing that. You said: {query[:200]}",
+        }
+        return {k: fields[k] for k in schema.get("required", []) if k in fields}
+
+    def complete(self, messages, response_format=None):
+        messages = messages or []
+        prompt = "\n".join(self._content_text(m.get("content")) for m in messages)
+        query = extract_user_query(prompt)
+        is_reflect = "YOU ARE NOT YET RESPONDING" in prompt
+        # Single-pass prompts ask for KEYWORDS and RESPONSE in one completion
+        system = "".join(self._content_text(m.get("content")) for m in messages if m.get("role") == "system")
+        wants_keywords = is_reflect or "KEYWORDS:" in system
+        recorded = self.replay.get(_normalize_query(query))
+        schema = ((response_format or {}).get("json_schema") or {}).get("schema")
+
+        if "***RUNNING SUMMARY***" in system:
+            content = self._narrative_summary(prompt)
+        elif schema:
+            content = json.dumps(self._structured(schema, query, recorded))
+        elif recorded and not is_reflect and "STATE:" in (recorded.get("response") or ""):
+            content = recorded["response"]
+        else:
+            seed = _seed(query)
+            state = self._state_from_log(recorded) if recorded else {}
+            state = state or self._state_block(seed)
+            reflection = (recorded or {}).get("reflection") or (
+                f"I notice {state['emo_1_name'].lower()} and a {state['cog_1_name'].lower()} focus "
+                f"as I consider: \"{query[:120]}\"."
+            )
+            keywords = (recorded or {}).get("keywords") or [state["emo_1_name"], state["cog_1_name"]] + _WORD_RE.findall(query.lower())[:3]
+            sections = [f"STATE:\n{json.dumps(state)}", f"REFLECTION:\n{reflection}"]
+            if wants_keywords:
+                sections.append(f"KEYWORDS:\n{', '.join(keywords)}")
+            if "***QUESTIONS***" in system:
+                topic = " ".join(_WORD_RE.findall(query.lower())[:4]) or "this"
+                sections.append("QUESTIONS:\n" + json.dumps({
+                    "question": f"What matters most to you about {topic}?",
+                    "reason": "The reflection left the user's priorities unclear.",
+                }))
+            if not is_reflect:
+                sections.append(f"RESPONSE:\nThank you for sharing that. You said: {query[:200]}")
+            content = "\n\n".join(sections)
+
+        self._sleep(self.chat_latency_ms)
+        prompt_tokens = len(prompt) // 4 + 1
+        completion_tokens = len(content) // 4 + 1
+        return {
+            "id": f"chatcmpl-mock-{_seed(prompt) & 0xFFFFFFFF:08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": self._cached_prefix_tokens(messages)},
+            },
+        }
+
+    @staticmethod
+    def _narrative_summary(prompt):
+        """Fold request: keep the previous summary's topics and add the new user messages."""
+        lead = "The user talked about: "
+        previous = re.search(r"\[CURRENT SUMMARY\]\n(.*?)\n\n\[NEW EXCHANGES\]", prompt, flags=re.S)
+        previous = previous.group(1) if previous else ""
+        topics = previous[len(lead):].split("; ") if previous.startswith(lead) else []
+        topics += [q.strip()[:80] for q in re.findall(r"^User: (.*)$", prompt, flags=re.M)]
+        return lead + "; ".join(topics[-12:])
+
+    # ------------------------------------------------------------
+    # Embeddings
+    # ------------------------------------------------------------
+    def embed(self, payload):
+        inputs = payload.get("input")
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        dim = int(payload.get("dimensions") or MODEL_DIMENSIONS.get(payload.get("model"), self.default_dim))
+        if payload.get("encoding_format") == "base64":
+            # Packed little-endian float32, as the OpenAI API returns it
+            encode = lambda vec: base64.b64encode(struct.pack(f"<{len(vec)}f", *vec)).decode("ascii")
+        else:
+            encode = lambda vec: vec
+        self._sleep(self.embed_latency_ms)
+        return {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": i, "embedding": encode(hash_embedding(str(text), dim))}
+                for i, text in enumerate(inputs)
+            ],
+            "model": payload.get("model"),
+            "usage": {"prompt_tokens": sum(len(str(t)) // 4 + 1 for t in inputs)},
+        }
+
+
+def _make_handler(llm):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass  # keep benchmark output clean
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._send(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+            else:
+                self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._send(400, {"error": {"message": "invalid JSON"}})
+                return
+            path = self.path.split("?")[0].rstrip("/")
+            if path.endswith("/chat/completions"):
+                self._send(200, llm.complete(payload.get("messages"), payload.get("response_format")))
+            elif path.endswith("/embeddings"):
+                self._send(200, llm.embed(payload))
+            else:
+                self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    return Handler
+
+
+def start_in_thread(llm=None, host="127.0.0.1", port=0):
+    """Start the stub on a daemon thread; returns (server, base_url). Port 0 picks a free port."""
+    llm = llm or MockLLM()
+    server = ThreadingHTTPServer((host, port), _make_handler(llm))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock server for offline Hal runs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--replay-dir", default="runtime_logs", help="Turn logs to replay ('' to disable)")
+    parser.add_argument("--dim", type=int, default=3072, help="Default embedding size when the model is unknown")
+    parser.add_argument("--chat-latency-ms", type=float, default=0.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(name)s] %(levelname)s: %(message)s")
+
+    llm = MockLLM(
+        replay_dir=args.replay_dir or None,
+        default_dim=args.dim,
+        chat_latency_ms=args.chat_latency_ms,
+        embed_latency_ms=args.embed_latency_ms,
+        jitter_ms=args.jitter_ms,
+        seed=args.seed,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(llm))
+    print(f"[MockLLM] Serving on http://{args.host}:{args.port}/v1 (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# ============================================================
+# narrative.py — Rolling Narrative Summary for Long Sessions
+# ============================================================
+"""
+Keeps a compact running summary of the conversation so the response prompt
+stays constant-size however long a session runs.
+
+Turns are observed after they are logged. The newest `keep_recent` turns are
+left alone (the prompt already carries them verbatim as recent turns); once
+`fold_every` older turns have accumulated, a background worker asks the LLM
+(Cortex.fold_narrative, optionally on a cheaper NARRATIVE_MODEL) to fold
+them into the summary. The turn path never waits for a fold: it reads
+whatever summary is current.
+
+State (summary + turns not yet folded) is written atomically to a per-tenant
+JSON file after every change, so a restart resumes exactly where it left off.
+"""
+
+import os
+import json
+import logging
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from telemetry import metrics
+from response_format import split_sections
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("narrative_folds_total", "Narrative summary folds by outcome (ok/failed).")
+
+# One summarizer per state file, shared by every Thalamus on the same tenant
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+class NarrativeSummarizer:
+    MAX_TEXT_CHARS = 1200  # per query/response kept for folding
+
+    def __init__(self, cortex, path, keep_recent=3, fold_every=4, max_pending=None, model=None):
+        self.cortex = cortex
+        self.path = path
+        self.keep_recent = int(keep_recent)
+        self.fold_every = max(1, int(fold_every))
+        # If folds keep failing (LLM down), the oldest unfolded turns are dropped past this
+        self.max_pending = int(max_pending or self.keep_recent + 4 * self.fold_every)
+        self.model = model
+
+        self.summary = ""
+        self.folded_turns = 0
+        self.through_turn_id = None
+        self.updated_at = None
+        self._pending = []
+        self._folding = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="narrative-fold")
+        self.load()
+
+    @classmethod
+    def for_path(cls, cortex, path, **kwargs):
+        """Shared instance for a state file (created on first use)."""
+        key = os.path.abspath(path)
+        with _REGISTRY_LOCK:
+            summarizer = _REGISTRY.get(key)
+            if summarizer is None:
+                summarizer = _REGISTRY[key] = cls(cortex, path, **kwargs)
+            return summarizer
+
+    @classmethod
+    def from_env(cls, cortex, path):
+        return cls.for_path(
+            cortex, path,
+            keep_recent=int(os.getenv("NARRATIVE_KEEP_RECENT", "3")),
+            fold_every=int(os.getenv("NARRATIVE_FOLD_EVERY", "4")),
+            model=os.getenv("NARRATIVE_MODEL") or None,
+        )
+
+    # ------------------------------------------------------------
+    def current(self):
+        """The running summary ("" until the first fold)."""
+        with self._lock:
+            return self.summary
+
+    def observe(self, turn_data):
+        """Queue a completed turn; schedules a background fold once enough older turns are waiting."""
+        record = {
+            "turn_id": turn_data.get("turn_id"),
+            "timestamp": turn_data.get("timestamp"),
+            "user_query": (turn_data.get("user_query") or "")[:self.MAX_TEXT_CHARS],
+            "response": _response_body(turn_data.get("response") or "")[:self.MAX_TEXT_CHARS],
+        }
+        with self._lock:
+            self._pending.append(record)
+            dropped = len(self._pending) - self.max_pending
+            if dropped > 0:
+                del self._pending[:dropped]
+                logger.warning("Narrative fold backlog full; dropped %d unsummarized turn(s)", dropped)
+            self._save_locked()
+            schedule = self._claim_fold_locked()
+        if schedule:
+            self._executor.submit(self._fold)
+
+    def _claim_fold_locked(self):
+        if self._folding or len(self._pending) - self.keep_recent < self.fold_every:
+            return False
+        self._folding = True
+        return True
+
+    def _fold(self):
+        with self._lock:
+            batch = self._pending[:len(self._pending) - self.keep_recent]
+            summary = self.summary
+        new_summary = None
+        try:
+            new_summary = self.cortex.fold_narrative(summary, batch, model=self.model)
+        except Exception as e:
+            logger.warning("Narrative fold failed: %s", e)
+        metrics.inc("narrative_folds_total", outcome="ok" if new_summary else "failed")
+
+        with self._lock:
+            if new_summary:
+                self.summary = new_summary
+                # Turns observed meanwhile sit after the batch (and backlog trimming may
+                # have dropped some of it), so remove exactly the folded records
+                folded_ids = {id(t) for t in batch}
+                self._pending = [t for t in self._pending if id(t) not in folded_ids]
+                self.folded_turns += len(batch)
+                self.through_turn_id = batch[-1].get("turn_id")
+                self.updated_at = datetime.datetime.now().isoformat()
+                self._save_locked()
+                logger.info("Narrative summary updated (%d turns folded so far)", self.folded_turns)
+            self._folding = False
+            # A failed fold is retried on the next observed turn, not in a loop here
+            again = bool(new_summary) and self._claim_fold_locked()
+        if again:
+            self._executor.submit(self._fold)
+
+    # ------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------
+    def _save_locked(self):
+        state = {
+            "summary": self.summary,
+            "folded_turns": self.folded_turns,
+            "through_turn_id": self.through_turn_id,
+            "updated_at": self.updated_at,
+            "pending": self._pending,
+        }
+        tmp = f"{self.path}.tmp"
+        try:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp, self.path)  # readers never see a half-written file
+        except OSError as e:
+            logger.warning("Could not save narrative summary to %s: %s", self.path, e)
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable narrative summary %s: %s", self.path, e)
+            return
+        with self._lock:
+            self.summary = state.get("summary") or ""
+            self.folded_turns = int(state.get("folded_turns") or 0)
+            self.through_turn_id = state.get("through_turn_id")
+            self.updated_at = state.get("updated_at")
+            self._pending = list(state.get("pending") or [])[-self.max_pending:]
+        logger.info("Loaded narrative summary (%d turns folded, %d pending)", self.folded_turns, len(self._pending))
+
+    def close(self, wait=True):
+        """Let an in-flight fold finish (its result is saved) and stop the worker."""
+        self._executor.shutdown(wait=wait)
+
+
+def _response_body(text):
+    """RESPONSE section of a structured reply, or the whole text."""
+    return split_sections(text).get("RESPONSE") or text.strip()
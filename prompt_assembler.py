@@ -0,0 +1,177 @@
+# ============================================================
+# prompt_assembler.py — Token-Budgeted Prompt Assembly
+# ============================================================
+"""
+Builds prompts from named sections under a token budget.
+
+Sections render in the order they are added but are budgeted by priority:
+required sections (instructions, the user query) are always kept, then
+optional sections are filled in priority order. List sections (recent
+turns, memories) drop whole items from the tail once the budget runs out;
+text sections are truncated at the tail. Per-section token costs are logged
+at DEBUG and returned so callers can attach them to the turn trace.
+"""
+
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+ELLIPSIS = " …"
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken when installed, else ~4 characters per token."""
+
+    def __init__(self, model=None):
+        self._encoding = None
+        try:
+            import tiktoken
+            try:
+                self._encoding = tiktoken.encoding_for_model((model or "").split("/")[-1])
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            logger.debug("tiktoken not installed; estimating tokens at ~4 chars/token")
+        except Exception as e:
+            logger.warning("tiktoken unavailable (%s); estimating tokens at ~4 chars/token", e)
+
+    @property
+    def exact(self):
+        return self._encoding is not None
+
+    def count(self, text):
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return max(1, (len(text) + 3) // 4)
+
+    def truncate(self, text, max_tokens):
+        """Cut text to at most max_tokens (keeping the head), marking the cut."""
+        if max_tokens <= 0 or not text:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        budget = max(1, max_tokens - 1)  # room for the ellipsis
+        if self._encoding is not None:
+            return self._encoding.decode(self._encoding.encode(text, disallowed_special=())[:budget]).rstrip() + ELLIPSIS
+        return text[:budget * 4].rstrip() + ELLIPSIS
+
+
+class Section:
+    __slots__ = ("name", "template", "text", "items", "priority", "required", "max_tokens",
+                 "item_max_tokens", "item_sep", "keep_tail", "empty")
+
+    def __init__(self, name, template="{body}", text=None, items=None, priority=10, required=False,
+                 max_tokens=None, item_max_tokens=None, item_sep="\n", keep_tail=False, empty=""):
+        self.name = name
+        self.template = template
+        self.text = text
+        self.items = items
+        self.priority = priority
+        self.required = required
+        self.max_tokens = max_tokens
+        self.item_max_tokens = item_max_tokens
+        self.item_sep = item_sep
+        self.keep_tail = keep_tail  # keep the newest (last) items when dropping
+        self.empty = empty
+
+
+class PromptAssembler:
+    """
+    Usage:
+        asm = PromptAssembler(counter, budget=4000)
+        asm.add("memories", "[MEMORY CONTEXT]\\n{body}", items=lines, priority=3, item_max_tokens=80)
+        asm.add("query", "User query: {body}", text=query, required=True)
+        prompt, report = asm.build()
+    """
+
+    def __init__(self, counter=None, budget=None, joiner="\n\n"):
+        self.counter = counter or TokenCounter()
+        self.budget = int(budget or os.getenv("PROMPT_TOKEN_BUDGET", "4000"))
+        self.joiner = joiner
+        self.sections = []
+
+    def add(self, name, template="{body}", **kwargs):
+        self.sections.append(Section(name, template, **kwargs))
+        return self
+
+    # ------------------------------------------------------------
+    def _frame_cost(self, section):
+        return self.counter.count(section.template.replace("{body}", ""))
+
+    def _fit_text(self, section, limit):
+        text = section.text or ""
+        if section.max_tokens is not None:
+            limit = min(limit, section.max_tokens)
+        fitted = self.counter.truncate(text, limit)
+        return fitted, fitted != text
+
+    def _fit_items(self, section, limit):
+        if section.max_tokens is not None:
+            limit = min(limit, section.max_tokens)
+        kept, used, truncated = [], 0, False
+        sep_cost = self.counter.count(section.item_sep)
+        items = list(section.items or [])
+        for item in (reversed(items) if section.keep_tail else items):
+            if section.item_max_tokens:
+                short = self.counter.truncate(item, section.item_max_tokens)
+                truncated |= short != item
+                item = short
+            cost = self.counter.count(item) + sep_cost
+            if used + cost > limit:
+                truncated = True
+                break
+            kept.append(item)
+            used += cost
+        if section.keep_tail:
+            kept.reverse()
+        return section.item_sep.join(kept), truncated, len(kept)
+
+    def build(self):
+        """Return (prompt_text, report) where report maps section -> token accounting."""
+        bodies, report = {}, {}
+
+        # Required sections are never cut; they define the floor of the prompt
+        remaining = self.budget - self.counter.count(self.joiner) * max(0, len(self.sections) - 1)
+        for s in self.sections:
+            if s.required:
+                body = s.text if s.items is None else s.item_sep.join(s.items)
+                bodies[s.name] = body or s.empty
+                remaining -= self.counter.count(s.template.replace("{body}", bodies[s.name]))
+
+        # Optional sections fill what is left, highest priority (lowest number) first;
+        # each one's empty placeholder is reserved up front so later sections can't overrun
+        optional = sorted((s for s in self.sections if not s.required), key=lambda s: s.priority)
+        reserved = {s.name: self.counter.count(s.template.replace("{body}", s.empty)) for s in optional}
+        remaining -= sum(reserved.values())
+        for s in optional:
+            remaining += reserved[s.name]
+            room = max(0, remaining - self._frame_cost(s))
+            if s.items is not None:
+                body, truncated, n_items = self._fit_items(s, room)
+                entry = {"items": n_items, "items_offered": len(s.items)}
+            else:
+                body, truncated = self._fit_text(s, room)
+                entry = {}
+            bodies[s.name] = body or s.empty
+            remaining -= self.counter.count(s.template.replace("{body}", bodies[s.name]))
+            entry["truncated"] = truncated
+            report[s.name] = entry
+
+        parts = []
+        for s in self.sections:
+            rendered = s.template.replace("{body}", bodies[s.name])
+            tokens = self.counter.count(rendered)
+            report.setdefault(s.name, {})["tokens"] = tokens
+            parts.append(rendered)
+
+        prompt = self.joiner.join(parts)
+        total = self.counter.count(prompt)
+        report["_total"] = {"tokens": total, "budget": self.budget, "exact": self.counter.exact}
+        if total > self.budget:
+            logger.warning("Prompt exceeds the token budget (%d > %d tokens); required sections are never cut", total, self.budget)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Prompt tokens by section: %s", {k: v["tokens"] for k, v in report.items()})
+        return prompt, report
@@ -0,0 +1,67 @@
+# ============================================================
+# recall_cache.py — TTL/LRU Cache for Hippocampus Search Results
+# ============================================================
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class RecallCache:
+    """
+    Caches raw vector-search hits keyed by query-embedding hash + search options.
+
+    Any write (commit, weight change) calls invalidate(), which bumps the
+    collection version and drops all entries. Searches record the version
+    they started under, so a result racing a write is never stored.
+    Only raw hits are stored — decay and weights are recomputed on every hit.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=300.0):
+        self.max_entries = int(max_entries)
+        self.ttl_seconds = float(ttl_seconds)
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            version, stored_at, value = entry
+            if version != self.version or time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        """Store value; pass the version read before searching so a racing write wins."""
+        with self._lock:
+            version = self.version if version is None else version
+            if version != self.version:
+                return
+            self._entries[key] = (version, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Bump the collection version; every existing entry becomes stale."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,141 @@
+# ============================================================
+# reranker.py — Local Cross-Encoder Rerank Stage for Recall
+# ============================================================
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class Reranker:
+    """
+    Optional second-stage ranker for Hippocampus recall.
+
+    Runs a small local cross-encoder (sentence-transformers, CPU) over the
+    over-fetched candidates and reorders them by (query, memory) relevance.
+    Scores are cached per (query, memory_id). If the latency budget is
+    exceeded the caller keeps the original vector-search order.
+    """
+
+    def __init__(self, model_name=None, batch_size=None, budget_ms=None, cache_size=None):
+        self.model_name = model_name or os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+        self.batch_size = int(batch_size or os.getenv("RERANK_BATCH_SIZE", "16"))
+        self.budget_ms = float(budget_ms or os.getenv("RERANK_BUDGET_MS", "250"))
+        self.cache_size = int(cache_size or os.getenv("RERANK_CACHE_SIZE", "4096"))
+        self.max_chars = int(os.getenv("RERANK_MAX_CHARS", "1000"))
+
+        self._model = None
+        self._load_failed = False
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------
+    # Model loading (lazy; only paid when rerank is first used)
+    # ------------------------------------------------------------
+    def _load_model(self):
+        if self._model is not None or self._load_failed:
+            return self._model
+        try:
+            from sentence_transformers import CrossEncoder
+            logger.info("Loading cross-encoder reranker: %s", self.model_name)
+            self._model = CrossEncoder(self.model_name, device="cpu")
+        except ImportError:
+            logger.warning("sentence-transformers not installed; rerank stage disabled")
+            self._load_failed = True
+        except Exception as e:
+            logger.error("Failed to load reranker model: %s", e)
+            self._load_failed = True
+        return self._model
+
+    @property
+    def available(self):
+        return self._load_model() is not None
+
+    # ------------------------------------------------------------
+    # Score cache (LRU keyed on query + memory id)
+    # ------------------------------------------------------------
+    def _cache_get(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _cache_put(self, key, score):
+        with self._lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    # ------------------------------------------------------------
+    # Rerank
+    # ------------------------------------------------------------
+    def rerank(self, query, candidates, top_k=None):
+        """
+        Reorder candidate memory dicts by cross-encoder relevance.
+
+        Args:
+            query: The recall query text
+            candidates: Memory dicts from Hippocampus (need "id" and "text")
+            top_k: Number of results to keep (default: all)
+
+        Returns:
+            (rows, reranked) — reranked is False when the model is unavailable
+            or the latency budget ran out, in which case rows keep their
+            incoming order.
+        """
+        top_k = top_k or len(candidates)
+        if not candidates or not self.available:
+            return candidates[:top_k], False
+
+        start = time.perf_counter()
+        deadline = start + self.budget_ms / 1000.0
+
+        scores = {}
+        pending = []
+        for idx, m in enumerate(candidates):
+            cached = self._cache_get((query, str(m.get("id"))))
+            if cached is not None:
+                scores[idx] = cached
+            else:
+                pending.append(idx)
+
+        for b in range(0, len(pending), self.batch_size):
+            batch = pending[b:b + self.batch_size]
+            pairs = [(query, (candidates[i].get("text") or "")[:self.max_chars]) for i in batch]
+            try:
+                batch_scores = self._model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            except Exception as e:
+                logger.error("Rerank scoring failed: %s", e)
+                return candidates[:top_k], False
+
+            for i, s in zip(batch, batch_scores):
+                scores[i] = float(s)
+                self._cache_put((query, str(candidates[i].get("id"))), float(s))
+
+            # Checked after each predict so a slow batch cannot overrun the budget unnoticed;
+            # the scores computed so far stay cached for the next recall of this query
+            if time.perf_counter() > deadline:
+                elapsed_ms = (time.perf_counter() - start) * 1000.0
+                logger.warning("Rerank budget exceeded (%.0fms > %.0fms); keeping vector order", elapsed_ms, self.budget_ms)
+                return candidates[:top_k], False
+
+        order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+        rows = []
+        for i in order[:top_k]:
+            m = candidates[i]
+            m["rerank_score"] = scores[i]
+            rows.append(m)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        logger.debug("Reranked %s candidates (%s scored, %s cached) in %.1fms", len(candidates), len(pending), len(candidates) - len(pending), elapsed_ms)
+        return rows, True
@@ -0,0 +1,234 @@
+# ============================================================
+# response_format.py — Structured Output Schema and Section Parsing
+# ============================================================
+"""
+Turns Cortex completions into (state, reflection, keywords, questions).
+
+Two paths:
+- JSON schema: with STRUCTURED_OUTPUT=true, Cortex sends a strict
+  `response_format` built by `json_schema_format()`, so providers that
+  support structured outputs return one JSON object (state names restricted
+  to the vocabulary) that `parse_json_output()` reads with a single
+  json.loads.
+- Text: `parse_sections()` splits the STATE:/REFLECTION:/KEYWORDS:/RESPONSE:
+  layout in one scan over the text and decodes the STATE object in place
+  (markdown fences and prose around it are skipped, a trailing comma is repaired).
+
+`render_sections()` writes parsed JSON back in the text layout, so turn logs
+and the UI see the same response format in both modes.
+"""
+
+import json
+import re
+import logging
+
+from halcyon_prompts import EMOTIVE_STATES, COGNITIVE_STATES
+
+logger = logging.getLogger(__name__)
+
+SECTION_NAMES = ("STATE", "REFLECTION", "KEYWORDS", "RESPONSE", "QUESTIONS")
+
+# Fields each call asks for (and the order they are rendered in)
+CALL_FIELDS = {
+    "reflect": ("state", "reflection", "keywords"),
+    "respond": ("state", "reflection", "response"),
+    "single_pass": ("state", "reflection", "keywords", "response"),
+}
+
+# A section header at the start of a line, tolerating markdown (**STATE:**, ## STATE:)
+_HEADER_RE = re.compile(r"^[ \t>*#_]*(" + "|".join(SECTION_NAMES) + r")[ \t*_]*:[ \t*_]*", re.M | re.I)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_DECODER = json.JSONDecoder()
+
+FALLBACK_STATE = {"emotions": [{"name": "Focus", "intensity": 0.6}]}
+
+
+# ------------------------------------------------------------
+# JSON schema
+# ------------------------------------------------------------
+def _state_schema():
+    props = {}
+    for prefix, vocab in (("emo", EMOTIVE_STATES), ("cog", COGNITIVE_STATES)):
+        for i in range(1, 4):
+            props[f"{prefix}_{i}_name"] = {"type": "string", "enum": list(vocab)}
+            props[f"{prefix}_{i}_intensity"] = {"type": "number", "description": "0.1-1.0"}
+    return {"type": "object", "properties": props, "required": list(props), "additionalProperties": False}
+
+
+_FIELD_SCHEMAS = {
+    "state": _state_schema(),
+    "reflection": {"type": "string"},
+    "keywords": {"type": "array", "items": {"type": "string"}},
+    "response": {"type": "string"},
+}
+
+
+def json_schema_format(call):
+    """OpenAI-style strict `response_format` for a reflect/respond/single_pass call."""
+    fields = CALL_FIELDS[call]
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": f"halcyon_{call}",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {f: _FIELD_SCHEMAS[f] for f in fields},
+                "required": list(fields),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+# ------------------------------------------------------------
+# Parsing
+# ------------------------------------------------------------
+def states_from_flat(d):
+    """Flat emo_N_* / cog_N_* keys (N = 1..3) to the [{name, intensity, type}] list."""
+    all_states = []
+    if not isinstance(d, dict):
+        return all_states
+    for prefix, kind in (("emo", "emotive"), ("cog", "cognitive")):
+        for i in range(1, 4):
+            n = d.get(f"{prefix}_{i}_name")
+            v = d.get(f"{prefix}_{i}_intensity")
+            if n and v is not None:
+                try:
+                    all_states.append({"name": str(n), "intensity": float(v), "type": kind})
+                except (TypeError, ValueError):
+                    pass
+    return all_states
+
+
+def _decode_object(body):
+    """First JSON object in body, skipping any prefix (fences, prose)."""
+    start = body.find("{")
+    if start < 0:
+        return None
+    try:
+        return _DECODER.raw_decode(body, start)[0]
+    except ValueError:
+        pass
+    end = body.find("}", start)
+    if end < 0:
+        return None
+    # Basic fix for common errors (like trailing comma)
+    try:
+        return json.loads(_TRAILING_COMMA_RE.sub(r"\1", body[start:end + 1]))
+    except ValueError:
+        return None
+
+
+def _split_keywords(blob):
+    if isinstance(blob, list):
+        parts = blob
+    else:
+        blob = blob.strip()
+        if blob.startswith("[") and blob.endswith("]"):
+            blob = blob[1:-1]
+        parts = blob.replace("\n", ",").split(",")
+    kws = []
+    for p in parts:
+        p = str(p).strip().strip("\"'").lstrip("-* ").strip()
+        if p:
+            kws.append(p)
+    return kws
+
+
+def split_sections(text):
+    """{SECTION: body} from one scan; a repeated header inside a body is kept as content."""
+    sections, current, start = {}, None, 0
+    for m in _HEADER_RE.finditer(text):
+        name = m.group(1).upper()
+        if name in sections or name == current:
+            continue
+        if current is not None:
+            sections[current] = text[start:m.start()]
+        current, start = name, m.end()
+    if current is not None:
+        sections[current] = text[start:]
+    return {k: v.strip() for k, v in sections.items()}
+
+
+def _result(state_obj, reflection, keywords, questions):
+    state = {"emotions": states_from_flat(state_obj)}
+    ok = bool(state["emotions"])
+    # Fallback to prevent UI crash if parsing fails entirely
+    if not ok:
+        state = {"emotions": list(FALLBACK_STATE["emotions"])}
+    return (state, reflection, keywords, questions if isinstance(questions, dict) else {}), ok
+
+
+def parse_sections(text):
+    """
+    Parse the text layout.
+
+    Returns ((state, reflection, keywords, questions), ok); ok is False when no
+    valid STATE object was found and the fallback state was used.
+    """
+    text = text or ""
+    # Structured output that arrived without the schema path (e.g. after a fallback)
+    parsed = parse_json_output(text) if text.lstrip()[:1] in ("{", "`") else None
+    if parsed is not None:
+        return parsed
+    sections = split_sections(text)
+    questions = {}
+    if "QUESTIONS" in sections:
+        questions = _decode_object(sections["QUESTIONS"]) or {}
+        if not questions and sections["QUESTIONS"].strip() not in ("", "{}"):
+            logger.warning("Failed to parse QUESTIONS JSON")
+    return _result(
+        _decode_object(sections.get("STATE", "")),
+        sections.get("REFLECTION", ""),
+        _split_keywords(sections.get("KEYWORDS", "")),
+        questions,
+    )
+
+
+def _load_output_object(text):
+    """The completion as a structured-output dict (bare or ```json fenced), else None."""
+    text = (text or "").strip()
+    if text.startswith("```"):
+        text = text.strip("`").strip()
+        if text[:4].lower() == "json":
+            text = text[4:].strip()
+    if not text.startswith("{"):
+        return None
+    try:
+        obj = json.loads(text)
+    except ValueError:
+        obj = _decode_object(text)
+    if not isinstance(obj, dict) or not obj.keys() & {"state", "reflection", "response"}:
+        return None
+    return obj
+
+
+def parse_json_output(text):
+    """Parse a JSON-schema completion; None if it is not a JSON object."""
+    obj = _load_output_object(text)
+    if obj is None:
+        return None
+    return _result(
+        obj.get("state"),
+        str(obj.get("reflection") or ""),
+        _split_keywords(obj.get("keywords") or []),
+        obj.get("questions") or {},
+    )
+
+
+def render_sections(text):
+    """Rewrite a JSON completion in the STATE:/REFLECTION:/... text layout (unchanged if not JSON)."""
+    obj = _load_output_object(text)
+    if obj is None:
+        return text
+    parts = []
+    if "state" in obj:
+        parts.append(f"STATE:\n{json.dumps(obj['state'])}")
+    if "reflection" in obj:
+        parts.append(f"REFLECTION:\n{obj['reflection']}")
+    if "keywords" in obj:
+        parts.append(f"KEYWORDS:\n{', '.join(_split_keywords(obj['keywords'] or []))}")
+    if "response" in obj:
+        parts.append(f"RESPONSE:\n{obj['response']}")
+    return "\n\n".join(parts) or text
@@ -0,0 +1,320 @@
+"""
+Headless HTTP/WebSocket server for Hal.
+
+Serves many concurrent sessions from one process: a single Cortex (with its
+HTTP connection pool) and Hippocampus are shared, while each session gets its
+own tenant-scoped Thalamus. Turns run on a bounded worker pool with a request
+timeout; memory commits run on a separate pool that is drained on shutdown.
+
+    python server.py --host 0.0.0.0 --port 8080
+
+Endpoints:
+    GET    /health                 liveness + load
+    GET    /metrics                Prometheus text exposition (telemetry.py)
+    POST   /sessions               {"tenant_id"?} -> {"session_id", "tenant_id"}
+    DELETE /sessions/{session_id}
+    POST   /turn                   {"query", "session_id"? , "tenant_id"?} -> turn result
+    GET    /ws?session_id=&tenant_id=   WebSocket; send {"query"}, receive stage events
+"""
+import os
+import re
+import time
+import uuid
+import asyncio
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web, WSMsgType
+
+import config  # loads .env if present
+from cortex import Cortex
+from hippocampus import Hippocampus
+from thalamus import Thalamus
+from telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _final_response(raw_response):
+    """Pull the RESPONSE section out of the raw model output (mirrors cli.py)."""
+    m_resp = re.search(r"RESPONSE\s*:\s*(.+?)(?:\n[A-Z ]{3,}?:|\Z)", raw_response or "", flags=re.S | re.I)
+    return m_resp.group(1).strip() if m_resp else (raw_response or "")
+
+
+class Session:
+    """Per-session state: a tenant-scoped Thalamus and a lock serialising its turns."""
+
+    def __init__(self, session_id, tenant_id, thalamus):
+        self.session_id = session_id
+        self.tenant_id = tenant_id
+        self.thalamus = thalamus
+        self.lock = asyncio.Lock()
+        self.last_seen = time.monotonic()
+        self.turns = 0
+
+
+class HalServer:
+    def __init__(self, max_concurrency=None, turn_timeout=None, queue_timeout=None,
+                 session_ttl=None, commit_workers=None):
+        self.max_concurrency = int(max_concurrency or os.getenv("SERVER_MAX_CONCURRENCY", "8"))
+        self.turn_timeout = float(turn_timeout or os.getenv("SERVER_TURN_TIMEOUT", "90"))
+        self.queue_timeout = float(queue_timeout or os.getenv("SERVER_QUEUE_TIMEOUT", "10"))
+        self.session_ttl = float(session_ttl or os.getenv("SERVER_SESSION_TTL", "3600"))
+        commit_workers = int(commit_workers or os.getenv("SERVER_COMMIT_WORKERS", "2"))
+
+        # Shared components
+        self.cortex = Cortex()
+        self.hippo = Hippocampus(self.cortex)
+
+        self.turn_pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="hal-turn")
+        self.commit_pool = ThreadPoolExecutor(max_workers=commit_workers, thread_name_prefix="hal-commit")
+        self.sessions = {}
+        self.in_flight = 0
+        self.draining = False
+        self._semaphore = None  # created on the server's event loop
+        self._last_turn_id = 0
+        self._websockets = set()
+        # Background components of every Thalamus opened (narrative and curiosity are shared
+        # per tenant), closed on shutdown even if their sessions were evicted meanwhile
+        self._components = {}
+
+    # ------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------
+    def _get_session(self, session_id=None, tenant_id=None):
+        self._evict_idle_sessions()
+        session = self.sessions.get(session_id) if session_id else None
+        if session is not None and tenant_id and tenant_id != session.tenant_id:
+            raise web.HTTPForbidden(reason="session belongs to a different tenant")
+        if session is None:
+            session_id = session_id or uuid.uuid4().hex
+            tenant_id = tenant_id or self.hippo.default_tenant
+            thalamus = Thalamus(self.cortex, self.hippo, tenant_id=tenant_id, commit_executor=self.commit_pool)
+            for component in (thalamus.narrative, thalamus.curiosity, thalamus.attention):
+                if component is not None:
+                    self._components.setdefault(id(component), component)
+            session = Session(session_id, tenant_id, thalamus)
+            self.sessions[session_id] = session
+            logger.info("Session %s opened (tenant=%s)", session_id, tenant_id)
+        session.last_seen = time.monotonic()
+        return session
+
+    def _evict_idle_sessions(self):
+        cutoff = time.monotonic() - self.session_ttl
+        for sid in [sid for sid, s in self.sessions.items() if s.last_seen < cutoff and not s.lock.locked()]:
+            del self.sessions[sid]
+            logger.info("Session %s evicted after %.0fs idle", sid, self.session_ttl)
+
+    # ------------------------------------------------------------
+    # Turn execution (bounded concurrency + timeout)
+    # ------------------------------------------------------------
+    async def run_turn(self, session, query, on_event=None):
+        if self.draining:
+            raise web.HTTPServiceUnavailable(reason="server is shutting down")
+
+        loop = asyncio.get_running_loop()
+        turn_id = self._next_turn_id()
+        start = time.perf_counter()
+
+        # Turns within a session are serialised; across sessions they share the bounded pool.
+        # Both the session lock and the pool slot are held until the worker really finishes
+        # (worker threads cannot be cancelled), so a timed-out turn still blocks the session's
+        # next one instead of running alongside it on the same Thalamus. Waiting for both
+        # shares one SERVER_QUEUE_TIMEOUT budget.
+        try:
+            await asyncio.wait_for(session.lock.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise web.HTTPServiceUnavailable(reason="session busy")
+        try:
+            remaining = max(0.0, self.queue_timeout - (time.perf_counter() - start))
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=remaining)
+        except asyncio.TimeoutError:
+            session.lock.release()
+            raise web.HTTPServiceUnavailable(reason="server busy")
+        except BaseException:
+            session.lock.release()
+            raise
+
+        self.in_flight += 1
+        try:
+            cf = self.turn_pool.submit(
+                session.thalamus.process_turn,
+                user_query=query,
+                turn_id=turn_id,
+                task_id=f"SRV_{session.session_id}_{turn_id}",
+                on_event=on_event,
+            )
+        except BaseException:
+            self._turn_finished(session)
+            raise
+        cf.add_done_callback(lambda _: loop.call_soon_threadsafe(self._turn_finished, session))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(cf)), timeout=self.turn_timeout)
+        except asyncio.TimeoutError:
+            raise web.HTTPGatewayTimeout(reason=f"turn exceeded {self.turn_timeout:.0f}s")
+
+        if not isinstance(result, tuple):
+            raise web.HTTPInternalServerError(reason=str(result))
+        state, reflection, raw_response = result
+        session.turns += 1
+        return {
+            "session_id": session.session_id,
+            "tenant_id": session.tenant_id,
+            "turn_id": turn_id,
+            "state": state,
+            "reflection": reflection,
+            "response": _final_response(raw_response),
+            "latency_ms": round((time.perf_counter() - start) * 1000.0, 1),
+        }
+
+    def _next_turn_id(self):
+        """Millisecond timestamp like the CLI's turn ids, bumped so concurrent sessions never share one."""
+        self._last_turn_id = max(int(time.time() * 1000), self._last_turn_id + 1)
+        return self._last_turn_id
+
+    def _turn_finished(self, session):
+        self.in_flight -= 1
+        self._semaphore.release()
+        session.lock.release()
+
+    # ------------------------------------------------------------
+    # HTTP handlers
+    # ------------------------------------------------------------
+    async def handle_health(self, request):
+        return web.json_response({
+            "status": "draining" if self.draining else "ok",
+            "sessions": len(self.sessions),
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+        })
+
+    async def handle_metrics(self, request):
+        metrics.set_gauge("server_sessions", len(self.sessions))
+        metrics.set_gauge("server_in_flight_turns", self.in_flight)
+        return web.Response(text=metrics.render(), content_type="text/plain")
+
+    async def handle_create_session(self, request):
+        body = {}
+        if request.can_read_body:
+            try:
+                body = await request.json()
+            except Exception:
+                raise web.HTTPBadRequest(reason="expected JSON body")
+        if not isinstance(body, dict):
+            raise web.HTTPBadRequest(reason="expected a JSON object")
+        session = self._get_session(tenant_id=body.get("tenant_id"))
+        return web.json_response({"session_id": session.session_id, "tenant_id": session.tenant_id})
+
+    async def handle_delete_session(self, request):
+        session = self.sessions.pop(request.match_info["session_id"], None)
+        if session is None:
+            raise web.HTTPNotFound(reason="unknown session")
+        return web.json_response({"session_id": session.session_id, "turns": session.turns})
+
+    async def handle_turn(self, request):
+        try:
+            body = await request.json()
+        except Exception:
+            raise web.HTTPBadRequest(reason="expected JSON body")
+        if not isinstance(body, dict):
+            raise web.HTTPBadRequest(reason="expected a JSON object")
+        query = (body.get("query") or "").strip()
+        if not query:
+            raise web.HTTPBadRequest(reason="missing 'query'")
+        session = self._get_session(body.get("session_id"), body.get("tenant_id"))
+        return web.json_response(await self.run_turn(session, query))
+
+    async def handle_ws(self, request):
+        # Resolved before the upgrade so a tenant mismatch is rejected as a plain HTTP error
+        session = self._get_session(request.query.get("session_id"), request.query.get("tenant_id"))
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        self._websockets.add(ws)
+        await ws.send_json({"type": "session", "session_id": session.session_id, "tenant_id": session.tenant_id})
+
+        loop = asyncio.get_running_loop()
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    query = (msg.json().get("query") or "").strip()
+                except Exception:
+                    query = msg.data.strip()
+                if not query:
+                    continue
+
+                def on_event(stage, data):
+                    # Called from the worker thread; hop back onto the loop to send
+                    asyncio.run_coroutine_threadsafe(ws.send_json({"type": "stage", "stage": stage, **data}), loop)
+
+                try:
+                    result = await self.run_turn(session, query, on_event=on_event)
+                    await ws.send_json({"type": "result", **result})
+                except web.HTTPException as e:
+                    await ws.send_json({"type": "error", "status": e.status, "error": e.reason})
+        finally:
+            self._websockets.discard(ws)
+        return ws
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    async def on_startup(self, app):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def on_shutdown(self, app):
+        """
+        Stop accepting turns, let in-flight turns finish, stop the sessions' background
+        workers (narrative folds, curiosity, journals), then drain pending memory commits.
+        """
+        self.draining = True
+        for ws in list(self._websockets):
+            await ws.close(message=b"server shutdown")
+        logger.info("Shutting down: waiting for %s in-flight turn(s)", self.in_flight)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.turn_pool.shutdown, True)
+        logger.info("Closing %s session component(s)", len(self._components))
+        await loop.run_in_executor(None, self._close_components)
+        logger.info("Draining pending memory commits")
+        await loop.run_in_executor(None, self.commit_pool.shutdown, True)
+        logger.info("Shutdown complete")
+
+    def _close_components(self):
+        for component in self._components.values():
+            try:
+                component.close()
+            except Exception as e:
+                logger.warning("Closing %s failed: %s", type(component).__name__, e)
+        self._components.clear()
+
+    def build_app(self):
+        app = web.Application()
+        app.add_routes([
+            web.get("/health", self.handle_health),
+            web.get("/metrics", self.handle_metrics),
+            web.post("/sessions", self.handle_create_session),
+            web.delete("/sessions/{session_id}", self.handle_delete_session),
+            web.post("/turn", self.handle_turn),
+            web.get("/ws", self.handle_ws),
+        ])
+        app.on_startup.append(self.on_startup)
+        app.on_shutdown.append(self.on_shutdown)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Hal as a headless HTTP/WebSocket server.")
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8080")))
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument("--turn-timeout", type=float, default=None)
+    args = parser.parse_args()
+
+    server = HalServer(max_concurrency=args.max_concurrency, turn_timeout=args.turn_timeout)
+    web.run_app(server.build_app(), host=args.host, port=args.port, shutdown_timeout=server.turn_timeout)
+
+
+if __name__ == "__main__":
+    main()
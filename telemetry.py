@@ -0,0 +1,372 @@
+# ============================================================
+# telemetry.py — Per-Turn Tracing Spans and Metrics
+# ============================================================
+"""
+Lightweight tracing and metrics for the turn pipeline (stdlib only).
+
+- `tracer.turn(...)` opens a root span for a turn; `tracer.span(name)` nests
+  stage spans under whatever span is active on the current thread.
+- `tracer.add(key, n)` attaches counters (tokens, embeddings, hits, cache hits)
+  to the active span and rolls them up to the turn.
+- Every finished span feeds `metrics` (Prometheus text via `metrics.render()`),
+  and finished turns go to the configured exporter:
+    TRACE_EXPORTER=file     JSONL at TRACE_FILE (default runtime_logs/traces.jsonl)
+    TRACE_EXPORTER=console  one JSON line per turn on stdout
+    TRACE_EXPORTER=otel     replay spans into OpenTelemetry (opentelemetry-sdk;
+                            OTLP when OTEL_EXPORTER_OTLP_ENDPOINT is set, else console)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING", "true").lower() in ["true", "1", "yes"]
+
+# Seconds; tuned for a turn that spans sub-ms cache hits to multi-second LLM calls
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# ============================================================
+# Metrics registry (Prometheus text exposition)
+# ============================================================
+class Metrics:
+    """Thread-safe counters, gauges and histograms keyed by name + labels."""
+
+    def __init__(self, namespace="hal"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._help = {}
+
+    def _key(self, name, labels):
+        return f"{self.namespace}_{name}", tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def describe(self, name, text):
+        self._help[f"{self.namespace}_{name}"] = text
+
+    def inc(self, name, value=1.0, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set_gauge(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = float(value)
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * len(DURATION_BUCKETS), 0.0, 0]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    hist[0][i] += 1
+            hist[1] += value
+            hist[2] += 1
+
+    def snapshot(self):
+        """Plain-dict copy of counters and gauges (for /health, benchmarks, tests)."""
+        with self._lock:
+            return {
+                "counters": {name + self._labels(labels): v for (name, labels), v in self._counters.items()},
+                "gauges": {name + self._labels(labels): v for (name, labels), v in self._gauges.items()},
+            }
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._histograms.items())
+
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name in typed:
+                return
+            typed.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{self._labels(labels)} {value:g}")
+        for (name, labels), value in gauges:
+            header(name, "gauge")
+            lines.append(f"{name}{self._labels(labels)} {value:g}")
+        for (name, labels), (buckets, total, count) in histograms:
+            header(name, "histogram")
+            for bound, n in zip(DURATION_BUCKETS, buckets):
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', f'{bound:g}')])} {n}")
+            lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{self._labels(labels)} {total:g}")
+            lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("stage_duration_seconds", "Wall time per pipeline stage (span name).")
+metrics.describe("turns_total", "Completed turns.")
+metrics.describe("llm_tokens_total", "Chat tokens reported by the provider usage field.")
+metrics.describe("events_total", "Span counters (embeddings, qdrant hits, cache hits/misses).")
+metrics.describe("recall_cache_hit_ratio", "Hippocampus recall cache hit ratio since start.")
+metrics.describe("startup_seconds", "Time until each startup component was ready (foreground or background).")
+
+# Component -> seconds until ready; filled as background startup work finishes
+startup_times = {}
+
+
+def record_startup(component, seconds):
+    """Report how long a startup component took to become ready."""
+    startup_times[component] = round(seconds, 3)
+    metrics.set_gauge("startup_seconds", round(seconds, 3), component=component)
+    logger.info("Startup: %s ready in %.0f ms", component, seconds * 1000.0)
+
+
+# ============================================================
+# Spans
+# ============================================================
+class Span:
+    __slots__ = ("name", "attrs", "counters", "children", "start", "start_wall", "duration_ms", "parent")
+
+    def __init__(self, name, parent=None, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.counters = {}
+        self.children = []
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.start_wall = time.time()
+        self.duration_ms = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self.start) * 1000.0
+
+    def elapsed_ms(self):
+        return self.duration_ms if self.duration_ms is not None else (time.perf_counter() - self.start) * 1000.0
+
+    def to_dict(self):
+        out = {"name": self.name, "duration_ms": round(self.elapsed_ms(), 3)}
+        if self.attrs:
+            out["attrs"] = self.attrs
+        if self.counters:
+            out["counters"] = self.counters
+        if self.children:
+            out["children"] = [c.to_dict() for c in self.children]
+        return out
+
+
+class Tracer:
+    """Thread-local span stacks; one root span per turn."""
+
+    def __init__(self, enabled=TRACING_ENABLED):
+        self.enabled = enabled
+        self._local = threading.local()
+        self._exporter = None
+        self._exporter_ready = False
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time a stage; nests under the active span and always feeds the metrics."""
+        if not self.enabled:
+            yield None
+            return
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span = Span(name, parent=parent, **attrs)
+        if parent is not None:
+            parent.children.append(span)
+        stack.append(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=str(e)[:200])
+            raise
+        finally:
+            span.finish()
+            stack.pop()
+            metrics.observe("stage_duration_seconds", span.duration_ms / 1000.0, stage=name)
+
+    @contextmanager
+    def turn(self, **attrs):
+        """Root span for one turn; exported when the block exits."""
+        if not self.enabled:
+            yield None
+            return
+        saved = self._local.__dict__.get("stack")
+        self._local.stack = []
+        root = None
+        try:
+            with self.span("turn", **attrs) as root:
+                yield root
+        finally:
+            self._local.stack = saved
+            if root is not None:
+                metrics.inc("turns_total")
+                self._export(root)
+
+    def add(self, key, n=1):
+        """Increment a counter on the active span and on its turn."""
+        if not self.enabled:
+            return
+        if key in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+            metrics.inc("llm_tokens_total", n, kind=key.replace("_tokens", ""))
+        else:
+            metrics.inc("events_total", n, event=key)
+        span = self.current()
+        while span is not None:
+            span.counters[key] = span.counters.get(key, 0) + n
+            span = span.parent
+
+    def set(self, **attrs):
+        span = self.current()
+        if span is not None:
+            span.set(**attrs)
+
+    def summary(self, root):
+        """Compact trace for turn_log.jsonl: stage durations plus rolled-up counters."""
+        if root is None:
+            return None
+        return {
+            "elapsed_ms": round(root.elapsed_ms(), 3),
+            "counters": dict(root.counters),
+            "spans": [c.to_dict() for c in root.children],
+        }
+
+    # ------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------
+    def _get_exporter(self):
+        if self._exporter_ready:
+            return self._exporter
+        self._exporter_ready = True
+        kind = os.getenv("TRACE_EXPORTER", "").lower()
+        if kind == "file":
+            self._exporter = _FileExporter(os.getenv("TRACE_FILE", os.path.join("runtime_logs", "traces.jsonl")))
+        elif kind == "console":
+            self._exporter = lambda root: print(json.dumps(root.to_dict(), ensure_ascii=False), flush=True)
+        elif kind == "otel":
+            self._exporter = _otel_exporter()
+        elif kind:
+            logger.warning("Unknown TRACE_EXPORTER '%s'; traces are only attached to turn logs", kind)
+        return self._exporter
+
+    def _export(self, root):
+        exporter = self._get_exporter()
+        if exporter is None:
+            return
+        try:
+            exporter(root)
+        except Exception as e:
+            logger.warning("Trace export failed: %s", e)
+
+
+class _FileExporter:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def __call__(self, root):
+        record = {"timestamp": root.start_wall, **root.to_dict()}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def _otel_exporter():
+    """Replay finished span trees into OpenTelemetry (optional dependency)."""
+    try:
+        from opentelemetry import trace as otel_trace
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        logger.warning("TRACE_EXPORTER=otel but opentelemetry-sdk is not installed (pip install opentelemetry-sdk)")
+        return None
+
+    provider = TracerProvider()
+    exporter = None
+    if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            exporter = OTLPSpanExporter()
+        except ImportError:
+            logger.warning("OTEL_EXPORTER_OTLP_ENDPOINT set but opentelemetry-exporter-otlp is not installed; using console")
+    provider.add_span_processor(BatchSpanProcessor(exporter or ConsoleSpanExporter()))
+    otel_tracer = provider.get_tracer("hal")
+
+    def replay(span, context=None):
+        start_ns = int(span.start_wall * 1e9)
+        otel_span = otel_tracer.start_span(span.name, context=context, start_time=start_ns)
+        for k, v in {**span.attrs, **span.counters}.items():
+            otel_span.set_attribute(k, v if isinstance(v, (str, bool, int, float)) else str(v))
+        child_ctx = otel_trace.set_span_in_context(otel_span)
+        for child in span.children:
+            replay(child, child_ctx)
+        otel_span.end(end_time=start_ns + int(span.elapsed_ms() * 1e6))
+
+    return replay
+
+
+tracer = Tracer()
+
+
+# ============================================================
+# Standalone /metrics endpoint (for cli.py / hal_ui.py; server.py serves its own)
+# ============================================================
+def start_metrics_server(port, host="127.0.0.1"):
+    """Serve metrics.render() at http://host:port/metrics on a daemon thread."""
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0].rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info("Metrics available at http://%s:%s/metrics", host, server.server_address[1])
+    return server
@@ -1,41 +1,36 @@
-import os
+import logging
 import threading
 import datetime
-import json
+
+from turn_buffer import RingBuffer, TurnRecord
+from journal import Journal, read_window
+from curiosity import CuriosityQueue
+
+logger = logging.getLogger(__name__)
 
 class TemporalAnchor:
     def __init__(self, hippocampus=None, working_limit=10, anchor_limit=7):
         self.hippocampus = hippocampus
         self.lock = threading.Lock()
-        self.working_window = []
-        self.anchor_window = []
-        self.recall_cache = []
-        self.manual_context = []
-        self.curiosity_queue = []
         self.working_limit = working_limit
         self.anchor_limit = anchor_limit
-        print(f"[TemporalAnchor] Initialized :: working={working_limit} anchor={anchor_limit}")
+        self.working_window = RingBuffer(working_limit)
+        self.anchor_window = RingBuffer(anchor_limit)
+        self.recall_cache = []
+        self.manual_context = []
+        # Bounded and deduplicated; Halcyon's UI swaps in Thalamus' queue when CURIOSITY is on
+        self.curiosity_queue = CuriosityQueue(getattr(hippocampus, "cortex", None), hippocampus)
+        self.journal = None  # set by save/load; appends anchor updates incrementally
+        logger.info("Initialized :: working=%s anchor=%s", working_limit, anchor_limit)
 
     def add_turn(self, user_query, reflection, response, state=None, keywords=None, turn_id=None, task_id=None):
-        turn = {
-            "turn_id": turn_id,
-            "task_id": task_id,
-            "user_query": user_query,
-            "reflection": reflection,
-            "response": response,
-            "state": state or {},
-            "keywords": keywords or [],
-            "timestamp": datetime.datetime.now().isoformat()
-        }
-        with self.lock:
-            self.working_window.append(turn)
-            if len(self.working_window) > self.working_limit:
-                self.working_window.pop(0)
-        print(f"[TemporalAnchor] Turn added :: {len(self.working_window)} tracked")
+        self.working_window.append(TurnRecord(
+            user_query, reflection, response, state=state, keywords=keywords, turn_id=turn_id, task_id=task_id,
+        ))
+        logger.debug("Turn added :: %s tracked", len(self.working_window))
 
     def get_recent(self, n=None):
-        with self.lock:
-            return self.working_window[-(n or self.working_limit):]
+        return self.working_window.tail(n or self.working_limit)
 
     def update_anchor(self, user_query, reflection, response, recalled):
         entry = {
@@ -45,77 +40,87 @@ class TemporalAnchor:
             "linked": [m.get("timestamp") for m in recalled[:5] if isinstance(m, dict)],
             "timestamp": datetime.datetime.now().isoformat()
         }
-        with self.lock:
+        if self.journal is not None:
+            self.journal.append(entry, apply=self.anchor_window.append)
+        else:
             self.anchor_window.append(entry)
-            if len(self.anchor_window) > self.anchor_limit:
-                self.anchor_window.pop(0)
-        print(f"[TemporalAnchor] Anchor updated :: {len(self.anchor_window)} total")
+        logger.debug("Anchor updated :: %s total", len(self.anchor_window))
 
     def recall(self, query, n_results=10):
         if not self.hippocampus:
-            print("[TemporalAnchor] ⚠️ No hippocampus linked; skipping recall.")
+            logger.warning("No hippocampus linked; skipping recall.")
             return []
         try:
             results = self.hippocampus.recall_with_context(query, n_results=n_results)
             self.recall_cache = results or []
-            print(f"[TemporalAnchor] Recall merged :: {len(self.recall_cache)} entries")
+            logger.debug("Recall merged :: %s entries", len(self.recall_cache))
             return self.recall_cache
         except Exception as e:
-            print(f"[TemporalAnchor] ❌ Recall failed: {e}")
+            logger.error("Recall failed: %s", e)
             self.recall_cache = []
             return []
 
     def inject_memories(self, memories):
-        for mem in memories:
-            entry = {
+        entries = [
+            {
                 "query": mem.get("query", ""),
                 "reflection": mem.get("reflection", ""),
                 "timestamp": mem.get("timestamp", ""),
                 "source": "manual_inject"
             }
-            self.manual_context.append(entry)
-        self.recall_cache += self.manual_context
-        print(f"[TemporalAnchor] Injected {len(memories)} memories manually.")
+            for mem in memories
+        ]
+        with self.lock:
+            self.manual_context.extend(entries)
+            # Only the new entries; earlier injections are already in the cache
+            self.recall_cache.extend(entries)
+        logger.debug("Injected %s memories manually.", len(entries))
 
     def add_curiosity_query(self, turn_id, source_reflection, question, reason, source_keywords):
-        entry = {
-            "turn_id": turn_id,
-            "timestamp": datetime.datetime.now().isoformat(),
-            "question": question,
-            "reason": reason,
-            "reflection": source_reflection[:400],
-            "keywords": source_keywords
-        }
-        with self.lock:
-            self.curiosity_queue.append(entry)
-        print(f"[TemporalAnchor] 🧠 Queued Curiosity: {question[:50]}...")
+        self.curiosity_queue.offer(
+            {"question": question, "reason": reason},
+            turn_id=turn_id, reflection=source_reflection, keywords=source_keywords,
+        )
+        logger.debug("Queued Curiosity: %s...", question[:50])
 
     def get_curiosity_queue(self):
-        with self.lock:
-            return list(self.curiosity_queue)
+        return self.curiosity_queue.items()
 
     def clear_curiosity_queue(self, index=None):
-        with self.lock:
-            if index is None:
-                self.curiosity_queue.clear()
-                print("[TemporalAnchor] Cleared all curiosity.")
-            elif 0 <= index < len(self.curiosity_queue):
-                del self.curiosity_queue[index]
-                print(f"[TemporalAnchor] Cleared curiosity index {index}.")
+        if index is None:
+            self.curiosity_queue.clear()
+            logger.info("Cleared all curiosity.")
+        elif self.curiosity_queue.remove(index):
+            logger.info("Cleared curiosity index %s.", index)
 
     def save(self, path="./memory_journals/anchor.json"):
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(self.anchor_window, f, indent=2)
-        print(f"[TemporalAnchor] Anchor saved ({len(self.anchor_window)} entries)")
+        """Checkpoint the anchor window on the first save to `path`; later saves write only new entries."""
+        if self.journal is not None and self.journal.path == path:
+            self.journal.flush()
+        else:
+            self._attach_journal(path, seq=0).checkpoint()
+        logger.info("Anchor saved (%s entries)", len(self.anchor_window))
 
     def load(self, path="./memory_journals/anchor.json"):
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                self.anchor_window = json.load(f)
-            print(f"[TemporalAnchor] Anchor loaded ({len(self.anchor_window)})")
+        entries, seq = read_window(path)
+        if entries:
+            self.anchor_window.replace(entries)
+            logger.info("Anchor loaded (%s)", len(self.anchor_window))
         else:
-            print("[TemporalAnchor] No saved anchor found.")
+            logger.info("No saved anchor found.")
+        self._attach_journal(path, seq=seq)
+
+    def _attach_journal(self, path, seq):
+        if self.journal is not None:
+            self.journal.close()
+        self.journal = Journal.from_env(path, self.anchor_window.tail, seq=seq)
+        return self.journal
+
+    def close(self):
+        """Write any anchor updates the journal has not autosaved yet."""
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
 
     def build_anchor_frame(self, n_turns=3):
         turns = self.get_recent(n_turns)
@@ -124,4 +129,4 @@ class TemporalAnchor:
     def clear_recall(self):
         with self.lock:
             self.recall_cache.clear()
-        print("[TemporalAnchor] Recall cache cleared")
+        logger.info("Recall cache cleared")
@@ -1,112 +1,282 @@
 import datetime
+import contextvars
 import json
 import os
+import logging
+import threading
 
-from hippocampus import Hippocampus  # TemporalAnchor gone
+from hippocampus import Hippocampus, tenant_log_root  # TemporalAnchor gone
+from attention import Attention
+from narrative import NarrativeSummarizer
+from curiosity import CuriosityQueue
+from telemetry import tracer
 
-DEBUG = True
-def dprint(msg: str):
-    if DEBUG:
-        print(msg, flush=True)
+# Serialises appends so concurrent turns (batch/server) never interleave log lines
+_LOG_LOCK = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+TURN_MODES = ("two_pass", "single_pass")
 
 # ============================================================
 # Thalamus — Central Orchestrator (Anchorless Version)
 # ============================================================
 class Thalamus:
-    def __init__(self, cortex, hippocampus):
+    def __init__(self, cortex, hippocampus, tenant_id=None, commit_executor=None, turn_mode=None):
         self.cortex = cortex
         self.hippocampus = hippocampus
         self.cortex.hippocampus = hippocampus
 
-        print("[Thalamus] Hippocampus + Cortex bound.")
+        # Tenant scoping: memories, recent turns and logs are isolated per tenant
+        self.tenant_id = tenant_id or hippocampus.default_tenant
+
+        logger.info("Hippocampus + Cortex bound (tenant=%s)", self.tenant_id)
+
+        # Optional executor for memory commits; when set, commits run off the turn path
+        # and the owner drains them by shutting the executor down
+        self.commit_executor = commit_executor
+
+        # Adaptive recall sizes the memory set from the score distribution
+        self.adaptive_recall = os.getenv("ADAPTIVE_RECALL", "true").lower() in ["true", "1", "yes"]
 
-        self.log_root = "./runtime_logs"
+        # two_pass: reflect, then respond (two LLM calls); single_pass: one call does both
+        self.turn_mode = (turn_mode or os.getenv("TURN_MODE", "two_pass")).lower()
+        if self.turn_mode not in TURN_MODES:
+            logger.warning("Unknown TURN_MODE %r; using two_pass", self.turn_mode)
+            self.turn_mode = "two_pass"
+
+        self.log_root = tenant_log_root(self.tenant_id, base="./runtime_logs")
         os.makedirs(self.log_root, exist_ok=True)
         self._create_daily_dir()
 
+        # Working memory in front of Hippocampus: serves recent turns, merges live context into
+        # recall and skips the long-term search when a buffered turn already matches the query
+        self.attention = None
+        if os.getenv("WORKING_MEMORY", "true").lower() in ["true", "1", "yes"]:
+            self.attention = Attention(
+                hippocampus,
+                working_limit=int(os.getenv("WORKING_MEMORY_SIZE", "10")),
+                skip_threshold=float(os.getenv("WORKING_MEMORY_SKIP_THRESHOLD", "0.9")),
+                live_threshold=float(os.getenv("WORKING_MEMORY_LIVE_THRESHOLD", "0.5")),
+                live_max=int(os.getenv("WORKING_MEMORY_LIVE_MAX", "2")),
+                reuse_max=int(os.getenv("WORKING_MEMORY_REUSE_MAX", "2")),
+            )
+
+        # Rolling summary of turns older than the recent-turns window, folded in the background
+        self.narrative = None
+        if os.getenv("NARRATIVE_SUMMARY", "false").lower() in ["true", "1", "yes"]:
+            self.narrative = NarrativeSummarizer.from_env(self.cortex, os.path.join(self.log_root, "narrative_summary.json"))
+
+        # Questions raised while reflecting go to a per-tenant queue answered from memory in idle time
+        self.curiosity = None
+        if os.getenv("CURIOSITY", "false").lower() in ["true", "1", "yes"]:
+            self.curiosity = CuriosityQueue.from_env(self.cortex, hippocampus, self.tenant_id)
+
     def _create_daily_dir(self):
         date_dir = datetime.date.today().isoformat()
         self.current_log_dir = os.path.join(self.log_root, date_dir)
         os.makedirs(self.current_log_dir, exist_ok=True)
         self.current_log_path = os.path.join(self.current_log_dir, "turn_log.jsonl")
-        print(f"[Thalamus] Logging active :: {self.current_log_path}")
+        logger.info("Turn logging active :: %s", self.current_log_path)
 
     def log_turn(self, turn_data: dict):
         try:
             if datetime.date.today().isoformat() not in self.current_log_dir:
                 self._create_daily_dir()
-            with open(self.current_log_path, "a", encoding="utf-8") as f:
-                json.dump(turn_data, f, ensure_ascii=False)
-                f.write("\n")
-            print(f"[Thalamus] 🧾 Logged turn {turn_data.get('turn_id')}")
+            line = json.dumps(turn_data, ensure_ascii=False) + "\n"
+            with _LOG_LOCK, open(self.current_log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.hippocampus.record_turn(turn_data, tenant_id=self.tenant_id)
+            logger.debug("Logged turn %s", turn_data.get("turn_id"))
         except Exception as e:
-            print(f"[Thalamus] ⚠️ Logging failed: {e}")
+            logger.warning("Turn logging failed: %s", e)
+
+    def _emit(self, on_event, stage, **data):
+        """Report turn progress to an optional listener (e.g. a WebSocket stream)."""
+        if on_event is None:
+            return
+        try:
+            on_event(stage, data)
+        except Exception as e:
+            logger.warning("Event listener failed on '%s': %s", stage, e)
+
+    def _commit_memory(self, **commit_kwargs):
+        try:
+            # On a commit executor this runs outside the turn, so it only feeds metrics
+            with tracer.span("commit"):
+                self.hippocampus.delayed_commit(**commit_kwargs)
+        except Exception as e:
+            logger.warning("Memory commit failed: %s", e)
+
+    def _long_term_recall(self, user_query, recall_stats):
+        if self.adaptive_recall:
+            return self.hippocampus.recall_adaptive(
+                user_query, max_results=25, stats=recall_stats, tenant_id=self.tenant_id
+            )
+        memories = self.hippocampus.recall_with_context(user_query, n_results=25, tenant_id=self.tenant_id)
+        recall_stats.update({"fetched": len(memories), "kept": len(memories), "stop_reason": "fixed"})
+        return memories
 
-    def process_turn(self, user_query, turn_id, task_id):
+    def _query_vector(self, user_query):
+        """Query embedding under the cache key recall uses, so the search reuses it."""
+        try:
+            return self.cortex.embed(user_query, cache_key=f"content:{user_query}")
+        except Exception as e:
+            logger.warning("Query embedding for working memory failed: %s", e)
+            return None
+
+    def _recent_turns(self, n):
+        """Newest-first recent turns; from working memory once it holds any, else the tenant's logs."""
+        if self.attention is None:
+            return self.hippocampus.get_recent_turns(n=n, tenant_id=self.tenant_id)
+        if not self.attention.get_focus():
+            logged = self.hippocampus.get_recent_turns(n=self.attention.working_limit, tenant_id=self.tenant_id)
+            self.attention.seed(reversed(logged))
+        return self.attention.get_recent_turns(n)[::-1]
+
+    def process_turn(self, user_query, turn_id, task_id, on_event=None):
+        with tracer.turn(turn_id=turn_id, tenant_id=self.tenant_id, mode=self.turn_mode) as trace_root:
+            return self._process_turn(user_query, turn_id, task_id, on_event, trace_root)
+
+    def _process_turn(self, user_query, turn_id, task_id, on_event, trace_root):
         timestamp = datetime.datetime.now().isoformat()
-        print(f"--- TURN {turn_id} INITIATED ---")
-        print(f"[Thalamus] user_query={user_query!r}")
+        logger.info("Turn %s started", turn_id)
+        logger.debug("Turn %s user_query=%r", turn_id, user_query)
         
         # Clear embedding cache at the start of each turn
         self.cortex.clear_embedding_cache()
+        if self.curiosity is not None:
+            self.curiosity.touch()  # hold off background answering while the turn runs
 
-        try:
-            result = self.cortex.feel_and_reflect(user_query, turn_id, timestamp)
-            state, reflection, keywords, questions = (result + ([], {}))[:4]
-        except Exception as e:
-            print(f"[Thalamus] ⚠️ Reflection phase crashed: {e}")
-            return "(reflection phase failed)"
+        single_pass = self.turn_mode == "single_pass"
+        if not single_pass:
+            try:
+                with tracer.span("reflect"):
+                    result = self.cortex.feel_and_reflect(user_query, turn_id, timestamp)
+                state, reflection, keywords, questions = (result + ([], {}))[:4]
+            except Exception as e:
+                logger.error("Reflection phase crashed: %s", e)
+                return "(reflection phase failed)"
+            self._emit(on_event, "reflection", state=state, reflection=reflection, keywords=keywords)
 
-        print("[Thalamus] Recalling memories...")
-        memories = self.hippocampus.recall_with_context(user_query, n_results=25)
+        logger.debug("Recalling memories...")
+        recall_stats = {}
+        query_vector, searched = None, None
+        with tracer.span("recall", adaptive=self.adaptive_recall) as span:
+            if self.attention is not None:
+                query_vector = self._query_vector(user_query)
+                memories, searched = self.attention.recall_for_turn(
+                    user_query, query_vector, lambda: self._long_term_recall(user_query, recall_stats),
+                    stats=recall_stats,
+                )
+                if recall_stats.get("stop_reason") == "working_memory":
+                    tracer.add("working_memory_hits")
+            else:
+                memories = self._long_term_recall(user_query, recall_stats)
+            if span is not None:
+                span.set(memories_used=len(memories), stop_reason=recall_stats.get("stop_reason"))
 
-        print("[Thalamus] Fetching recent turns...")
-        recent_turns = self.hippocampus.get_recent_turns(n=3)  # New assumption
+        self._emit(on_event, "recall", memories_used=len(memories), memories_fetched=recall_stats.get("fetched", len(memories)))
 
-        print("[Thalamus] Generating response...")
-        response_data = self.cortex.respond(
-            user_query=user_query,
-            state=state,
-            reflection=reflection,
-            recent_turns=recent_turns,
-            memories=memories
-        )
+        logger.debug("Fetching recent turns...")
+        with tracer.span("recent_turns"):
+            recent_turns = self._recent_turns(3)
+
+        logger.debug("Generating response...")
+        max_memories = len(memories) if self.adaptive_recall else 20
+        narrative = self.narrative.current() if self.narrative is not None else None
+        if single_pass:
+            # Recall above ran on the raw query, so one completion can reflect and respond
+            prior_state = next((t.get("state") for t in recent_turns if t.get("state")), None)
+            with tracer.span("respond", single_pass=True):
+                response_data = self.cortex.reflect_and_respond(
+                    user_query=user_query,
+                    turn_id=turn_id,
+                    timestamp=timestamp,
+                    recent_turns=recent_turns,
+                    memories=memories,
+                    max_memories=max_memories,
+                    prior_state=prior_state,
+                    narrative=narrative,
+                )
+            state, reflection = response_data.get("state"), response_data.get("reflection")
+            self._emit(on_event, "reflection", state=state, reflection=reflection, keywords=response_data.get("keywords", []))
+        else:
+            with tracer.span("respond"):
+                response_data = self.cortex.respond(
+                    user_query=user_query,
+                    state=state,
+                    reflection=reflection,
+                    recent_turns=recent_turns,
+                    memories=memories,
+                    max_memories=max_memories,
+                    narrative=narrative,
+                )
 
         response_text = response_data.get("raw", "")
         state = response_data.get("state", state)
         reflection = response_data.get("reflection", reflection)
-        keywords = response_data.get("keywords", [])
-        questions = response_data.get("questions", {})
+        keywords = response_data.get("keywords") or (keywords if not single_pass else [])
+        questions = response_data.get("questions") or (questions if not single_pass else {})
 
         turn_data = {
             "turn_id": turn_id,
             "task_id": f"TUI_{turn_id}",
+            "tenant_id": self.tenant_id,
             "timestamp": timestamp,
+            "turn_mode": self.turn_mode,
             "user_query": user_query,
             "reflection": reflection,
             "response": response_text,
             "state": state or {},
             "keywords": keywords or [],
-            "memories_used": len(memories)
+            "memories_used": len(memories),
+            "memories_fetched": recall_stats.get("fetched", len(memories)),
+            "recall_stop_reason": recall_stats.get("stop_reason")
         }
+        # Spans up to the response; log write and commit timings go to the exporter/metrics
+        trace = tracer.summary(trace_root)
+        if trace is not None:
+            counters = trace["counters"]
+            turn_data["llm_tokens"] = {
+                "prompt": counters.get("prompt_tokens", 0),
+                "completion": counters.get("completion_tokens", 0),
+                "cached": counters.get("cached_tokens", 0),
+            }
+            turn_data["trace"] = trace
 
-        self.log_turn(turn_data)
+        self._emit(on_event, "response", state=state, reflection=reflection, response=response_text)
 
-        try:
-            self.hippocampus.delayed_commit(
-                user_query=user_query,
-                reflection=reflection,
-                response=response_text,
-                state_json=state,
-                metadata={
-                    "turn_id": turn_id,
-                    "task_id": task_id,
-                    "keywords": keywords or [],
-                },
+        with tracer.span("log_write"):
+            self.log_turn(turn_data)
+        if self.attention is not None:
+            self.attention.push_turn(
+                user_query, reflection, response_text, state=state, keywords=keywords, turn_id=turn_id,
+                task_id=task_id, embedding=query_vector, recalled=searched,
             )
-        except Exception as e:
-            print(f"[Thalamus] ⚠️ Memory commit failed: {e}")
+        if self.narrative is not None:
+            self.narrative.observe(turn_data)
+        if self.curiosity is not None:
+            self.curiosity.offer(questions, turn_id=turn_id, reflection=reflection, keywords=keywords, state=state)
+
+        commit_kwargs = dict(
+            user_query=user_query,
+            reflection=reflection,
+            response=response_text,
+            state_json=state,
+            metadata={
+                "turn_id": turn_id,
+                "task_id": task_id,
+                "keywords": keywords or [],
+            },
+            tenant_id=self.tenant_id,
+        )
+        if self.commit_executor is not None:
+            # Carry the turn's context so the commit reuses this turn's cached embeddings
+            self.commit_executor.submit(contextvars.copy_context().run, self._commit_memory, **commit_kwargs)
+        else:
+            self._commit_memory(**commit_kwargs)
 
-        print(f"--- TURN {turn_id} COMPLETED ---\n")
+        logger.info("Turn %s completed (%d memories)", turn_id, len(memories))
         return state, reflection, response_text
 # ============================================================
\ No newline at end of file
@@ -0,0 +1,123 @@
+# ============================================================
+# turn_buffer.py — Fixed-Capacity Turn Windows (Attention / TemporalAnchor)
+# ============================================================
+"""
+Ring buffers and compact turn records for the short-term windows.
+
+- RingBuffer: a deque with maxlen, so appends evict the oldest entry in O(1)
+  instead of list.pop(0). The lock is held only for the append or for
+  slicing the requested tail; tail(n) copies n references, not the window.
+- TurnRecord: a slotted, read-only turn snapshot. It is a Mapping, so
+  existing callers keep using turn["user_query"] / turn.get("state"), and
+  snapshots can share records without defensive copies. `embedding` (the
+  query vector) and `recalled` (the long-term memories the turn used) ride
+  along as attributes for the working-memory cache, outside the mapping view.
+"""
+
+import datetime
+import threading
+from collections import deque
+from collections.abc import Mapping
+from itertools import islice
+
+
+class TurnRecord(Mapping):
+    FIELDS = ("turn_id", "task_id", "user_query", "reflection", "response", "state", "keywords", "timestamp")
+    __slots__ = FIELDS + ("embedding", "recalled")
+
+    def __init__(self, user_query, reflection, response, state=None, keywords=None,
+                 turn_id=None, task_id=None, timestamp=None, embedding=None, recalled=None):
+        setattr_ = object.__setattr__
+        setattr_(self, "embedding", embedding)
+        setattr_(self, "recalled", recalled)
+        setattr_(self, "turn_id", turn_id)
+        setattr_(self, "task_id", task_id)
+        setattr_(self, "user_query", user_query)
+        setattr_(self, "reflection", reflection)
+        setattr_(self, "response", response)
+        setattr_(self, "state", state or {})
+        setattr_(self, "keywords", keywords or [])
+        setattr_(self, "timestamp", timestamp or datetime.datetime.now().isoformat())
+
+    @classmethod
+    def from_dict(cls, turn, **extra):
+        """Record for a logged turn dict (e.g. from Hippocampus.get_recent_turns)."""
+        return cls(
+            turn.get("user_query", ""), turn.get("reflection", ""), turn.get("response", ""),
+            state=turn.get("state"), keywords=turn.get("keywords"), turn_id=turn.get("turn_id"),
+            task_id=turn.get("task_id"), timestamp=turn.get("timestamp"), **extra,
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TurnRecord is read-only")
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in self.FIELDS}
+
+    def __repr__(self):
+        return f"TurnRecord(turn_id={self.turn_id!r}, user_query={(self.user_query or '')[:40]!r})"
+
+
+class RingBuffer:
+    __slots__ = ("_items", "_lock")
+
+    def __init__(self, capacity, items=()):
+        self._items = deque(items, maxlen=max(1, int(capacity)))
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return self._items.maxlen
+
+    def append(self, item):
+        with self._lock:
+            self._items.append(item)  # maxlen drops the oldest
+
+    def tail(self, n=None):
+        """Newest n items, oldest first (all items when n is None)."""
+        with self._lock:
+            if n is None or n >= len(self._items):
+                return list(self._items)
+            if n <= 0:
+                return []
+            newest = list(islice(reversed(self._items), n))
+        newest.reverse()
+        return newest
+
+    def last(self):
+        with self._lock:
+            return self._items[-1] if self._items else None
+
+    def replace(self, items):
+        """Swap in new contents (e.g. after loading from disk), keeping the newest that fit."""
+        fresh = deque(items, maxlen=self._items.maxlen)
+        with self._lock:
+            self._items = fresh
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return len(self._items) > 0
+
+    def __iter__(self):
+        return iter(self.tail())
+
+    def __getitem__(self, index):
+        with self._lock:
+            return self._items[index]